@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+"""
+Run the sequenceplot benchmarks and write the results as JSON.
+
+Every case runs in its own Python process so that its peak memory can
+be measured. Building the diagram, emitting pic with run() and
+rendering with pic2plot are timed separately.
+
+Usage:
+    python -m benchmarks.runner [--full] [--render] [-o results.json]
+    python -m benchmarks.runner --case messageFlood participants=10 messages=100
+
+"""
+
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from optparse import OptionParser
+
+import sequenceplot
+from benchmarks.workloads import quickSuite, fullSuite, workloads
+
+
+class CountingFile:
+    """
+    Write-only file that discards its data, counting the bytes written.
+
+    """
+    def __init__(self):
+        self.size = 0
+
+    def write(self, buf):
+        self.size = self.size + len(buf)
+
+
+def runCase(name, params, render=False):
+    """
+    Build, emit and optionally render one workload in this process.
+
+    Returns:
+    dictionary of measurements
+
+    """
+    result = {'workload': name, 'params': params}
+
+    start = time.time()
+    diagram = workloads[name](**params)
+    result['buildSeconds'] = time.time() - start
+    result['operations'] = len(diagram.declarations) + len(diagram.operations)
+
+    outfile = CountingFile()
+    start = time.time()
+    diagram.run(outfile)
+    result['runSeconds'] = time.time() - start
+    result['picBytes'] = outfile.size
+
+    if render:
+        directory = tempfile.mkdtemp()
+        try:
+            start = time.time()
+            diagram.render(os.path.join(directory, name), 'svg')
+            result['renderSeconds'] = time.time() - start
+        except sequenceplot.RenderError as e:
+            result['renderError'] = str(e)
+        finally:
+            shutil.rmtree(directory)
+
+    # kilobytes on Linux, bytes on Mac OS X
+    result['peakMemory'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return result
+
+
+def spawnCase(name, params, render=False):
+    """
+    Run one workload in a child process and return its measurements.
+
+    """
+    cmdList = [sys.executable, '-m', 'benchmarks.runner', '--case', name]
+    if render:
+        cmdList.append('--render')
+    cmdList.extend(['{0}={1}'.format(key, value) for key, value in sorted(params.items())])
+
+    p = subprocess.Popen(cmdList, stdout=subprocess.PIPE)
+    output = p.communicate()[0]
+    if p.returncode != 0:
+        return {'workload': name, 'params': params, 'error': 'exit status {0}'.format(p.returncode)}
+    return json.loads(output)
+
+
+def main(argv=None):
+    parser = OptionParser(usage='%prog [options] [--case workload key=value ...]')
+    parser.add_option('--full', action='store_true', default=False,
+                      help='run the full suite, up to 10k participants and 1M messages')
+    parser.add_option('--render', action='store_true', default=False,
+                      help='also time rendering with pic2plot')
+    parser.add_option('--case', metavar='WORKLOAD',
+                      help='run a single workload in this process and print its result')
+    parser.add_option('-o', '--output', metavar='FILE',
+                      help='write results to FILE instead of stdout')
+    options, args = parser.parse_args(argv)
+
+    if options.case is not None:
+        params = dict([(key, int(value)) for key, value in [arg.split('=', 1) for arg in args]])
+        print json.dumps(runCase(options.case, params, options.render))
+        return 0
+
+    if options.full:
+        suite = fullSuite
+    else:
+        suite = quickSuite
+
+    results = []
+    for function, params in suite:
+        result = spawnCase(function.__name__, params, options.render)
+        results.append(result)
+        sys.stderr.write('{0} {1}: build {2:.3f}s run {3:.3f}s\n'.format(result['workload'],
+                                                                       params,
+                                                                       result.get('buildSeconds', 0),
+                                                                       result.get('runSeconds', 0)))
+
+    report = {'version': sequenceplot.__version__,
+              'python': platform.python_version(),
+              'platform': platform.platform(),
+              'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'results': results}
+
+    if options.output is None:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+    else:
+        with open(options.output, 'w') as outfile:
+            json.dump(report, outfile, indent=2, sort_keys=True)
+            outfile.write('\n')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
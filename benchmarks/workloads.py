@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+"""
+Synthetic diagram workloads, modelled on the examples directory.
+
+Each workload is a function taking its size parameters as keyword
+arguments and returning a fully built SequenceDiagram.
+
+"""
+
+from sequenceplot import SequenceObject, Placeholder, SequenceDiagram
+
+
+def messageFlood(participants, messages):
+    """
+    A client calling methods on a pool of servers in turn, as in
+    authentication.py.
+
+    """
+    client = SequenceObject('c: client')
+    servers = [SequenceObject('s{0}: server'.format(i)) for i in range(participants - 1)]
+    diagram = SequenceDiagram([client] + servers)
+
+    for count in range(messages // 2):
+        server = servers[count % len(servers)]
+        client.callMethod(server, 'request{0}()'.format(count % 100), response='ok')
+
+    return diagram
+
+
+def nestedCalls(participants, messages, depth):
+    """
+    Chains of nested activations depth levels deep, as in
+    nestedActivation.py.
+
+    """
+    objects = [SequenceObject('o{0}: worker'.format(i)) for i in range(participants)]
+    diagram = SequenceDiagram(objects)
+    count = 0
+
+    while count < messages:
+        chain = [objects[(count + level) % participants] for level in range(depth + 1)]
+        for caller, callee in zip(chain, chain[1:]):
+            caller.pushMethod(callee, 'call()')
+        for caller, callee in reversed(zip(chain, chain[1:])):
+            caller.popMethod(callee, 'done')
+        count = count + 2 * depth
+
+    return diagram
+
+
+def framedCalls(participants, messages, frames):
+    """
+    Messages grouped into frames, each spanning the whole diagram.
+
+    """
+    objects = [SequenceObject('o{0}: peer'.format(i)) for i in range(participants)]
+    diagram = SequenceDiagram(objects)
+    perFrame = max(1, messages // frames)
+
+    for frame in range(frames):
+        name = diagram.beginFrame(objects[0], 'loop {0}'.format(frame))
+        for count in range(perFrame):
+            source = objects[count % participants]
+            target = objects[(count + 1) % participants]
+            source.message(target, 'tick()')
+            diagram.step()
+        diagram.endFrame(objects[-1], name)
+
+    return diagram
+
+
+def lifecycle(participants, messages):
+    """
+    A factory creating, using and destroying short-lived instances, as
+    in createDestroy.py.
+
+    """
+    factory = SequenceObject('f: factory')
+    instances = [Placeholder() for i in range(participants)]
+    diagram = SequenceDiagram([factory] + instances)
+    perInstance = max(1, messages // participants)
+
+    for index, instance in enumerate(instances):
+        factory.createInstance(instance, 'i{0}: instance'.format(index))
+        for count in range(perInstance):
+            factory.callMethod(instance, 'use()')
+        factory.destroyInstance(instance)
+
+    return diagram
+
+
+# (workload, size parameters) of the quick and full suites
+quickSuite = [
+    (messageFlood, {'participants': 10, 'messages': 100}),
+    (messageFlood, {'participants': 100, 'messages': 10000}),
+    (nestedCalls, {'participants': 10, 'messages': 1000, 'depth': 8}),
+    (framedCalls, {'participants': 10, 'messages': 1000, 'frames': 50}),
+    (lifecycle, {'participants': 100, 'messages': 1000}),
+    ]
+
+fullSuite = quickSuite + [
+    (messageFlood, {'participants': 1000, 'messages': 100000}),
+    (messageFlood, {'participants': 10000, 'messages': 1000000}),
+    (nestedCalls, {'participants': 100, 'messages': 100000, 'depth': 32}),
+    (framedCalls, {'participants': 100, 'messages': 100000, 'frames': 1000}),
+    (lifecycle, {'participants': 10000, 'messages': 100000}),
+    ]
+
+workloads = dict([(function.__name__, function) for function, params in fullSuite])
@@ -16,6 +16,7 @@
 # Author: Charles Y. Choi
 
 from SequenceObject import SequenceObject
+from Operations import ACTOR
 
 class Actor(SequenceObject):
     """
@@ -29,12 +30,7 @@ class Actor(SequenceObject):
             actor(name,label);
         
         """
-        template = 'actor({0},"{1}");'
-
         if self.label is None:
             self.label = ""
             
-        buf = template.format(self.picName(),
-                              self.label)
-
-        self.parent.addTransaction(buf)
+        self.parent.addOperation(ACTOR, self, self.label)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+import multiprocessing
+import Queue
+import threading
+
+from BatchRender import RenderResult
+
+renderSlots = multiprocessing.cpu_count()
+renderQueue = Queue.Queue()
+renderWorkers = []
+workersLock = threading.Lock()
+
+
+def setRenderConcurrency(n):
+    """
+    Set the maximum number of pic2plot processes run at once by
+    renderAsync, the number of render worker threads. Surplus workers
+    exit once the renders queued ahead of them have started.
+
+    Args:
+    n -- maximum number of concurrent pic2plot processes
+
+    """
+    global renderSlots
+    if n < 1:
+        raise ValueError('Render concurrency must be at least 1: {0}'.format(n))
+    with workersLock:
+        renderSlots = n
+        while len(renderWorkers) > n:
+            renderWorkers.pop()
+            renderQueue.put(None)
+
+
+def renderWorker():
+    """
+    Run queued renders until a None job is taken from the queue.
+
+    """
+    while True:
+        work = renderQueue.get()
+        if work is None:
+            return
+        work()
+
+
+def startRenderWorkers():
+    """
+    Start render worker threads until there are renderSlots of them.
+
+    """
+    with workersLock:
+        while len(renderWorkers) < renderSlots:
+            worker = threading.Thread(target=renderWorker, name='sequenceplot-render')
+            worker.daemon = True
+            worker.start()
+            renderWorkers.append(worker)
+
+
+class RenderHandle:
+    """
+    Handle on a render running in the background, returned by
+    renderAsync.
+
+    Attributes:
+    result -- RenderResult for the render, complete once done() is true
+
+    """
+    def __init__(self, result, callback=None):
+        self.result = result
+        self.callback = callback
+        self.finished = threading.Event()
+
+    def done(self):
+        return self.finished.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Block until the render has finished or timeout seconds have
+        passed. Returns True if the render has finished.
+
+        """
+        self.finished.wait(timeout)
+        return self.finished.is_set()
+
+    def outfileName(self):
+        """
+        Block until the render has finished and return the name of the
+        rendered file, raising the render's error if it failed.
+
+        """
+        self.finished.wait()
+        if self.result.error is not None:
+            raise self.result.error
+        return self.result.outfileName
+
+    def complete(self, error):
+        self.result.error = error
+        try:
+            if self.callback is not None:
+                self.callback(self.result)
+        finally:
+            self.finished.set()
+
+
+def renderAsync(diagram, filenamePrefix, filetype='svg', cache=None, timeout=None, callback=None):
+    """
+    Render diagram without blocking the caller. The pic file is
+    written before returning, so the diagram may be changed afterwards;
+    pic2plot then runs on one of renderSlots worker threads, which take
+    renders from renderQueue in the order they were submitted.
+
+    Args:
+    diagram -- SequenceDiagram to render
+    filenamePrefix -- output filename prefix string
+    filetype -- output format, legal values are those supported by pic2plot
+    cache -- optional RenderCache instance; hits are not sent to pic2plot
+    timeout -- optional number of seconds to allow pic2plot to run
+    callback -- optional callable, called with the RenderResult on the
+                render thread once the render has finished, before the
+                handle is marked done
+
+    Returns:
+    RenderHandle for the render
+
+    """
+    handle = RenderHandle(RenderResult(filenamePrefix, filenamePrefix + '.' + filetype), callback)
+
+    try:
+        picFilename = diagram.writePic(filenamePrefix)
+    except Exception as e:
+        handle.complete(e)
+        return handle
+
+    def work():
+        error = None
+        try:
+            diagram.renderPicFile(picFilename, filetype, cache, timeout)
+        except Exception as e:
+            error = e
+        handle.complete(error)
+
+    startRenderWorkers()
+    renderQueue.put(work)
+
+    return handle
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+import multiprocessing
+import os
+import time
+from multiprocessing.pool import ThreadPool
+
+from Pic2plot import runPic2plot, runPlot
+
+
+class RenderResult:
+    """
+    Outcome of rendering one diagram of a batch.
+
+    Attributes:
+    filenamePrefix -- output filename prefix the diagram was rendered to
+    outfileName -- name of the rendered output file
+    error -- exception raised while rendering, or None on success
+
+    """
+    def __init__(self, filenamePrefix, outfileName, error=None):
+        self.filenamePrefix = filenamePrefix
+        self.outfileName = outfileName
+        self.error = error
+        self.cacheKey = None
+
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.error is None:
+            return 'RenderResult({0!r})'.format(self.outfileName)
+        return 'RenderResult({0!r}, error={1!r})'.format(self.outfileName, str(self.error))
+
+
+def renderJob(job):
+    """
+    Run pic2plot for one (picFilename, outfileName, filetype) job,
+    returning the exception instead of raising it, and the wall time
+    taken.
+
+    """
+    start = time.time()
+    try:
+        runPic2plot(*job)
+    except Exception as e:
+        return e, time.time() - start
+    return None, time.time() - start
+
+
+def recordRender(diagram, result, seconds, cached):
+    """
+    Record a successful render in the RenderStats of diagram, if any.
+
+    """
+    stats = getattr(diagram, 'stats', None)
+    if stats is not None:
+        stats.recordRender(diagram, result.outfileName, seconds,
+                           os.path.getsize(result.outfileName), cached)
+
+
+def renderMany(diagrams, filetype='svg', jobs=None, cache=None):
+    """
+    Render many diagrams, running the pic2plot invocations on a bounded
+    pool of workers. The pic files are generated in the calling process;
+    only the pic2plot subprocesses run concurrently.
+
+    Args:
+    diagrams -- sequence of (filenamePrefix, SequenceDiagram) pairs. Renders
+                are recorded in the RenderStats of diagrams that have one.
+    filetype -- output format, legal values are those supported by pic2plot
+    jobs -- maximum number of concurrent pic2plot processes (default: number of CPUs)
+    cache -- optional RenderCache instance; hits are not sent to pic2plot
+
+    Returns:
+    list of RenderResult instances, in the order of diagrams
+
+    """
+    if jobs is None:
+        jobs = multiprocessing.cpu_count()
+
+    results = []
+    renderJobs = []
+
+    for filenamePrefix, diagram in diagrams:
+        result = RenderResult(filenamePrefix, filenamePrefix + '.' + filetype)
+        results.append(result)
+        try:
+            picFilename = diagram.writePic(filenamePrefix)
+            if cache is not None:
+                result.cacheKey = cache.key(picFilename, diagram.params, diagram.picPath, filetype)
+                start = time.time()
+                if cache.fetch(result.cacheKey, result.outfileName):
+                    recordRender(diagram, result, time.time() - start, True)
+                    continue
+        except Exception as e:
+            result.error = e
+            continue
+        renderJobs.append((diagram, result, (picFilename, result.outfileName, filetype)))
+
+    if len(renderJobs) <= 1 or jobs <= 1:
+        outcomes = [renderJob(job) for diagram, result, job in renderJobs]
+    else:
+        pool = ThreadPool(min(jobs, len(renderJobs)))
+        try:
+            outcomes = pool.map(renderJob, [job for diagram, result, job in renderJobs], 1)
+        finally:
+            pool.close()
+            pool.join()
+
+    for (diagram, result, job), (error, seconds) in zip(renderJobs, outcomes):
+        result.error = error
+        if cache is not None and error is None:
+            try:
+                cache.store(result.cacheKey, result.outfileName)
+            except (IOError, OSError) as e:
+                result.error = e
+        if result.error is None:
+            recordRender(diagram, result, seconds, False)
+
+    return results
+
+
+def convertJob(job):
+    """
+    Run plot for one (metaFilename, outfileName, filetype, timeout)
+    job, returning the exception instead of raising it, and the wall
+    time taken.
+
+    """
+    start = time.time()
+    try:
+        runPlot(*job)
+    except Exception as e:
+        return e, time.time() - start
+    return None, time.time() - start
+
+
+def renderFormats(diagram, filenamePrefix, filetypes=('svg', 'png', 'ps'), jobs=None, cache=None,
+                  timeout=None):
+    """
+    Render one diagram to several output formats, running pic2plot only
+    once. pic2plot renders the pic to a GNU metafile, filenamePrefix.meta,
+    which is kept alongside the outputs and converted to each format by
+    plotutils' plot program, the conversions running concurrently.
+
+    Args:
+    diagram -- SequenceDiagram instance
+    filenamePrefix -- output filename prefix string
+    filetypes -- output formats, legal values are those supported by plot
+    jobs -- maximum number of concurrent plot processes (default: one per format)
+    cache -- optional RenderCache instance. Outputs and the metafile are
+             looked up and stored under their own file types; pic2plot is
+             not run if every output, or the metafile, is cached.
+    timeout -- optional number of seconds to allow each of pic2plot and plot to run
+
+    Returns:
+    list of RenderResult instances, in the order of filetypes. Should
+    pic2plot fail, every result carries its error.
+
+    """
+    if jobs is None:
+        jobs = len(filetypes)
+
+    picFilename = diagram.writePic(filenamePrefix)
+    metaFilename = filenamePrefix + '.meta'
+    results = []
+    convertJobs = []
+
+    for filetype in filetypes:
+        result = RenderResult(filenamePrefix, filenamePrefix + '.' + filetype)
+        results.append(result)
+        if cache is not None:
+            result.cacheKey = cache.key(picFilename, diagram.params, diagram.picPath, filetype)
+            start = time.time()
+            if cache.fetch(result.cacheKey, result.outfileName):
+                recordRender(diagram, result, time.time() - start, True)
+                continue
+        convertJobs.append((result, (metaFilename, result.outfileName, filetype, timeout)))
+
+    if not convertJobs:
+        return results
+
+    try:
+        metaKey = None
+        if cache is not None:
+            metaKey = cache.key(picFilename, diagram.params, diagram.picPath, 'meta')
+        if metaKey is None or not cache.fetch(metaKey, metaFilename):
+            runPic2plot(picFilename, metaFilename, 'meta', timeout)
+            if metaKey is not None:
+                cache.store(metaKey, metaFilename)
+    except Exception as e:
+        for result, job in convertJobs:
+            result.error = e
+        return results
+
+    if len(convertJobs) <= 1 or jobs <= 1:
+        outcomes = [convertJob(job) for result, job in convertJobs]
+    else:
+        pool = ThreadPool(min(jobs, len(convertJobs)))
+        try:
+            outcomes = pool.map(convertJob, [job for result, job in convertJobs], 1)
+        finally:
+            pool.close()
+            pool.join()
+
+    for (result, job), (error, seconds) in zip(convertJobs, outcomes):
+        result.error = error
+        if cache is not None and error is None:
+            try:
+                cache.store(result.cacheKey, result.outfileName)
+            except (IOError, OSError) as e:
+                result.error = e
+        if result.error is None:
+            recordRender(diagram, result, seconds, False)
+
+    return results
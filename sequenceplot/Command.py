@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+"""
+Command line bulk renderer.
+
+Renders many diagram inputs with a pool of worker processes, so the
+cost of starting Python and importing the package is paid once per
+worker rather than once per diagram. Inputs that have not changed since
+their last successful render, and whose output is still there, are
+skipped.
+
+Usage:
+    python -m sequenceplot [-j N] [-T type] [-o dir] [--force] input...
+    python -m sequenceplot [-j N] [-e engine] --serve [host:]port
+
+Builder modules (.py) are Python scripts like those in the examples
+folder. They are executed in their own directory and render their
+diagrams themselves; as their outputs are not known, an unchanged
+builder is skipped even if its outputs have been removed. Spec files (.seq) are parsed by SpecParser without
+running any code, and rendered as the -T file type into the -o
+directory, or next to the spec by default.
+
+With --serve, specs are rendered on request by a RenderServer instead,
+at most -j at once.
+
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import time
+from optparse import OptionParser
+
+from sequenceplot.SpecParser import loadSpec
+from sequenceplot.RenderServer import RenderService, serve
+
+
+def runBuilderModule(path, filetype, engine, outputDirectory):
+    """
+    Execute a builder module in its own directory, as if it had been
+    run as a script. Builder modules choose their own output, so the
+    output options are ignored.
+
+    """
+    directory = os.path.dirname(path) or '.'
+    cwd = os.getcwd()
+    argv = sys.argv
+
+    os.chdir(directory)
+    sys.argv = [path]
+    try:
+        namespace = {'__name__': '__main__', '__file__': path}
+        execfile(os.path.basename(path), namespace)
+    finally:
+        sys.argv = argv
+        os.chdir(cwd)
+
+
+def builderOutputs(path, filetype, engine, outputDirectory):
+    """
+    Return the files a builder module is known to render: none, as
+    builder modules choose their own output.
+
+    """
+    return []
+
+
+def specPrefix(path, outputDirectory):
+    prefix = os.path.splitext(path)[0]
+    if outputDirectory is not None:
+        prefix = os.path.join(outputDirectory, os.path.basename(prefix))
+    return prefix
+
+
+def renderSpecFile(path, filetype, engine, outputDirectory):
+    """
+    Parse a spec file and render its diagram.
+
+    """
+    loadSpec(path).render(specPrefix(path, outputDirectory), filetype, engine)
+
+
+def specOutputs(path, filetype, engine, outputDirectory):
+    """
+    Return the files renderSpecFile renders for a spec file.
+
+    """
+    return [specPrefix(path, outputDirectory) + '.' + filetype]
+
+
+# input runner by file extension
+inputRunners = {
+    '.py': runBuilderModule,
+    '.seq': renderSpecFile,
+    }
+
+# expected outputs by file extension
+inputOutputs = {
+    '.py': builderOutputs,
+    '.seq': specOutputs,
+    }
+
+
+def renderInput(job):
+    """
+    Render one input, returning (path, seconds, error message or None).
+    Run in a worker process.
+
+    Args:
+    job -- tuple of (path, filetype, engine, outputDirectory)
+
+    """
+    path = job[0]
+    start = time.time()
+    try:
+        inputRunners[os.path.splitext(path)[1]](*job)
+    except SystemExit as e:
+        if e.code:
+            return path, time.time() - start, 'exited with status {0}'.format(e.code)
+    except Exception as e:
+        return path, time.time() - start, '{0}: {1}'.format(e.__class__.__name__, e)
+    return path, time.time() - start, None
+
+
+def inputStamp(job):
+    """
+    Return what identifies a render of job: the modification time and
+    size of its input, and the output options.
+
+    """
+    status = os.stat(job[0])
+    return [status.st_mtime, status.st_size] + list(job[1:])
+
+
+def outputsExist(job):
+    """
+    Return True if every output expected from job exists.
+
+    """
+    outputs = inputOutputs[os.path.splitext(job[0])[1]](*job)
+    return all(os.path.exists(name) for name in outputs)
+
+
+def loadState(stateFilename):
+    try:
+        with open(stateFilename) as infile:
+            return json.load(infile)
+    except (IOError, ValueError):
+        return {}
+
+
+def saveState(stateFilename, state):
+    temporary = stateFilename + '.tmp'
+    with open(temporary, 'w') as outfile:
+        json.dump(state, outfile, indent=1, sort_keys=True)
+    os.rename(temporary, stateFilename)
+
+
+def main(argv=None):
+    parser = OptionParser(usage='%prog [options] input...')
+    parser.add_option('-j', '--jobs', type='int', default=multiprocessing.cpu_count(),
+                      help='number of inputs to render in parallel (default: number of CPUs)')
+    parser.add_option('-T', dest='filetype', default='svg',
+                      help='file type to render spec files as (default: %default)')
+    parser.add_option('-o', '--output', metavar='DIR',
+                      help='directory to render spec files into (default: next to each spec)')
+    parser.add_option('-e', '--engine', default='pic2plot', choices=['pic2plot', 'native'],
+                      help="engine to render spec files with, 'pic2plot' or 'native' (default: %default)")
+    parser.add_option('-f', '--force', action='store_true', default=False,
+                      help='render inputs even if they have not changed')
+    parser.add_option('--state', metavar='FILE', default='.sequenceplot-state.json',
+                      help='file recording the inputs already rendered (default: %default)')
+    parser.add_option('--serve', metavar='[HOST:]PORT',
+                      help='serve spec render requests over HTTP on PORT (host default: localhost)')
+    parser.add_option('-q', '--quiet', action='store_true', default=False,
+                      help='only report failures')
+    options, args = parser.parse_args(argv)
+
+    if options.serve is not None:
+        host, separator, port = options.serve.rpartition(':')
+        if not port.isdigit():
+            parser.error('invalid --serve address: {0}'.format(options.serve))
+        serve((host or 'localhost', int(port)),
+              RenderService(maxRenders=options.jobs, engine=options.engine),
+              options.quiet)
+        return 0
+
+    if not args:
+        parser.error('no inputs given')
+
+    inputs = []
+    for path in args:
+        if os.path.splitext(path)[1] not in inputRunners:
+            parser.error('unsupported input type: {0}'.format(path))
+        if not os.path.exists(path):
+            parser.error('no such file: {0}'.format(path))
+        inputs.append(os.path.abspath(path))
+
+    outputDirectory = options.output
+    if outputDirectory is not None:
+        outputDirectory = os.path.abspath(outputDirectory)
+        if not os.path.isdir(outputDirectory):
+            os.makedirs(outputDirectory)
+
+    state = loadState(options.state)
+    pending = []
+    for path in inputs:
+        job = (path, options.filetype, options.engine, outputDirectory)
+        if not options.force and state.get(path) == inputStamp(job) and outputsExist(job):
+            if not options.quiet:
+                print '{0}: unchanged'.format(path)
+        else:
+            pending.append(job)
+
+    start = time.time()
+    if len(pending) <= 1 or options.jobs <= 1:
+        results = [renderInput(job) for job in pending]
+    else:
+        pool = multiprocessing.Pool(min(options.jobs, len(pending)))
+        try:
+            results = pool.map(renderInput, pending, 1)
+        finally:
+            pool.close()
+            pool.join()
+
+    failures = 0
+    for job, (path, seconds, error) in zip(pending, results):
+        if error is None:
+            state[path] = inputStamp(job)
+            if not options.quiet:
+                print '{0}: {1:.3f}s'.format(path, seconds)
+        else:
+            failures = failures + 1
+            state.pop(path, None)
+            sys.stderr.write('{0}: failed after {1:.3f}s: {2}\n'.format(path, seconds, error))
+
+    saveState(options.state, state)
+
+    if not options.quiet:
+        print '{0} rendered, {1} unchanged, {2} failed in {3:.3f}s'.format(len(results) - failures,
+                                                                        len(inputs) - len(pending),
+                                                                        failures,
+                                                                        time.time() - start)
+    if failures:
+        return 1
+    return 0
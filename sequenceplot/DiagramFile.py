@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+"""
+Compact binary file format for built diagrams.
+
+A diagram file starts with the magic bytes 'SQPL' and a format version,
+followed by a sequence of sections, each a typed array prefixed by its
+type code and length. Operations are stored as their array-backed
+columns with their interned label tables, so saving and loading a
+diagram copies arrays rather than re-running the builder. Arrays are
+stored little-endian.
+
+Files are read through mmap by default, so that only the pages of a
+large file that are decoded are read into memory, once.
+
+Version 2 adds a final section recording the ignored inactive() calls
+of the diagram; version 1 files are still read.
+
+"""
+
+import ast
+import mmap
+import struct
+import sys
+from array import array
+
+from SequenceObject import SequenceObject
+from Actor import Actor
+from Placeholder import Placeholder
+from Operations import OperationList, operationArity
+
+fileMagic = 'SQPL'
+fileVersion = 2
+
+headerFormat = struct.Struct('<4sHH')
+arrayFormat = struct.Struct('<cI')
+
+# object kinds, in the order tried by objectKind()
+objectClasses = (Actor, Placeholder, SequenceObject)
+
+
+def objectKind(obj):
+    for kind, objectClass in enumerate(objectClasses):
+        if isinstance(obj, objectClass):
+            return kind
+    raise ValueError('Cannot save object {0!r}'.format(obj))
+
+
+def writeArray(outfile, values):
+    """
+    Write an array section.
+
+    """
+    if sys.byteorder == 'big' and values.itemsize > 1:
+        values = array(values.typecode, values)
+        values.byteswap()
+    outfile.write(arrayFormat.pack(values.typecode, len(values)))
+    outfile.write(values.tostring())
+
+
+def writeStrings(outfile, strings):
+    """
+    Write a list of strings as an array section of their lengths, -1
+    standing for None, followed by a section of their UTF-8 bytes.
+
+    """
+    lengths = array('i')
+    data = []
+    for string in strings:
+        if string is None:
+            lengths.append(-1)
+            continue
+        if isinstance(string, unicode):
+            string = string.encode('utf-8')
+        lengths.append(len(string))
+        data.append(string)
+
+    writeArray(outfile, lengths)
+    writeArray(outfile, array('c', ''.join(data)))
+
+
+def writeOperations(outfile, operations):
+    writeArray(outfile, operations.codes)
+    writeArray(outfile, operations.args)
+    writeStrings(outfile, operations.labels)
+
+
+class DiagramReader:
+    """
+    Reads the sections of a diagram file from a string or mmap buffer.
+
+    """
+    def __init__(self, data):
+        self.data = data
+        self.position = headerFormat.size
+
+        if len(data) < headerFormat.size:
+            raise ValueError('Not a SequencePlot diagram file')
+        magic, version, flags = headerFormat.unpack(data[:headerFormat.size])
+        if magic != fileMagic:
+            raise ValueError('Not a SequencePlot diagram file')
+        if version > fileVersion:
+            raise ValueError('Unsupported diagram file version {0}'.format(version))
+        self.version = version
+
+    def readArray(self, typecode):
+        start = self.position
+        end = start + arrayFormat.size
+        if end > len(self.data):
+            raise ValueError('Truncated diagram file')
+        foundTypecode, count = arrayFormat.unpack(self.data[start:end])
+        if foundTypecode != typecode:
+            raise ValueError('Corrupt diagram file: expected {0!r} array, found {1!r}'.format(typecode,
+                                                                                            foundTypecode))
+
+        result = array(typecode)
+        start = end
+        end = start + count * result.itemsize
+        if end > len(self.data):
+            raise ValueError('Truncated diagram file')
+        result.fromstring(self.data[start:end])
+        if sys.byteorder == 'big' and result.itemsize > 1:
+            result.byteswap()
+
+        self.position = end
+        return result
+
+    def readStrings(self):
+        lengths = self.readArray('i')
+        data = self.readArray('c').tostring()
+        result = []
+        position = 0
+
+        for length in lengths:
+            if length < 0:
+                result.append(None)
+            else:
+                result.append(data[position:position + length])
+                position = position + length
+
+        return result
+
+    def readOperations(self):
+        operations = OperationList()
+        operations.codes = self.readArray('B')
+        operations.args = self.readArray('i')
+        operations.labels = self.readStrings()
+
+        if operations.codes and max(operations.codes) >= len(operationArity):
+            raise ValueError('Corrupt diagram file: unknown opcode {0}'.format(max(operations.codes)))
+        if sum(map(operationArity.__getitem__, operations.codes)) != len(operations.args):
+            raise ValueError('Corrupt diagram file: inconsistent operation arguments')
+
+        operations.labelIds = dict((label, labelId) for labelId, label in enumerate(operations.labels))
+        return operations
+
+
+def writeDiagram(diagram, outfile):
+    """
+    Write a built diagram to a binary file handle.
+
+    Args:
+    diagram -- SequenceDiagram instance; streaming diagrams cannot be saved
+    outfile -- file handle opened for binary writing
+
+    """
+    if diagram.sink is not None:
+        raise ValueError('Streaming diagrams cannot be saved')
+
+    with diagram.lock:
+        objects = [None] * len(diagram.objectIndex)
+        for obj, index in diagram.objectIndex.items():
+            objects[index] = obj
+
+        keys = sorted(diagram.params.keys())
+
+        outfile.write(headerFormat.pack(fileMagic, fileVersion, 0))
+        writeArray(outfile, array('i', [len(objects), diagram.nameIndex, int(diagram.drawSync)]))
+        writeArray(outfile, array('B', [objectKind(obj) for obj in objects]))
+        writeArray(outfile, array('i', [obj.activeCount for obj in objects]))
+        writeStrings(outfile, [obj.label for obj in objects])
+        writeArray(outfile, array('i', [diagram.objectIndex[obj] for obj in diagram.objectList]))
+        writeStrings(outfile, keys + [repr(diagram.params[key]) for key in keys])
+        writeOperations(outfile, diagram.declarations)
+        writeOperations(outfile, diagram.operations)
+
+        ignored = array('i')
+        for obj, position in diagram.ignoredInactive:
+            ignored.append(diagram.objectIndex[obj])
+            ignored.append(position)
+        writeArray(outfile, ignored)
+
+
+def readDiagram(diagram, data):
+    """
+    Restore a saved diagram into a new, empty diagram.
+
+    Args:
+    diagram -- SequenceDiagram instance to restore into
+    data -- contents of a diagram file, as a string or mmap
+
+    """
+    reader = DiagramReader(data)
+
+    count, nameIndex, drawSync = reader.readArray('i')
+    kinds = reader.readArray('B')
+    activeCounts = reader.readArray('i')
+    labels = reader.readStrings()
+    live = reader.readArray('i')
+    params = reader.readStrings()
+    declarations = reader.readOperations()
+    operations = reader.readOperations()
+    if reader.version >= 2:
+        ignored = reader.readArray('i')
+    else:
+        ignored = array('i')
+
+    if not (count == len(kinds) == len(activeCounts) == len(labels)):
+        raise ValueError('Corrupt diagram file: inconsistent object tables')
+    if kinds and max(kinds) >= len(objectClasses):
+        raise ValueError('Corrupt diagram file: unknown object kind {0}'.format(max(kinds)))
+    if live and not (0 <= min(live) and max(live) < count):
+        raise ValueError('Corrupt diagram file: object index out of range')
+    if len(ignored) % 2 or (ignored and not (0 <= min(ignored[::2]) and max(ignored[::2]) < count)):
+        raise ValueError('Corrupt diagram file: object index out of range')
+
+    with diagram.lock:
+        objects = []
+        for index in range(count):
+            obj = objectClasses[kinds[index]](labels[index])
+            obj.parent = diagram
+            obj.activeCount = activeCounts[index]
+            diagram.objectIndex[obj] = index
+            objects.append(obj)
+
+        diagram.objectList.extend([objects[index] for index in live])
+        diagram.ignoredInactive.extend([(objects[index], position)
+                                        for index, position in zip(ignored[::2], ignored[1::2])])
+
+        half = len(params) // 2
+        for key, value in zip(params[:half], params[half:]):
+            diagram.params[key] = ast.literal_eval(value)
+
+        diagram.nameIndex = nameIndex
+        diagram.drawSync = bool(drawSync)
+        diagram.declarations = declarations
+        diagram.operations = operations
+
+    return diagram
+
+
+def loadDiagram(diagram, filename, mmapped=True):
+    """
+    Restore a diagram file into a new, empty diagram.
+
+    Args:
+    diagram -- SequenceDiagram instance to restore into
+    filename -- diagram file name
+    mmapped -- if True (default), read the file through mmap
+
+    """
+    with open(filename, 'rb') as infile:
+        if not mmapped:
+            return readDiagram(diagram, infile.read())
+
+        try:
+            data = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped
+            return readDiagram(diagram, infile.read())
+
+        try:
+            return readDiagram(diagram, data)
+        finally:
+            data.close()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+import sys
+
+from Operations import STEP, operationArity, objectPicName
+from SvgRenderer import SvgRenderer
+
+
+class IncrementalRenderer:
+    """
+    Native SVG renderer for a diagram that keeps growing, such as a live
+    view of in-flight requests.
+
+    The layout state of the SvgRenderer (current position, lifestart
+    and activation depth of every lifeline) is kept between calls, and
+    each update() only interprets the operations recorded since the
+    previous one. Elements are converted to SVG once, in absolute
+    coordinates, and the document places them with a translation, so
+    earlier output never has to be regenerated.
+
+    The lifeline tails drawn by completing the objects, and a trailing
+    step that later steps may still be merged into, are provisional:
+    write() draws them into each document without keeping them in the
+    layout state.
+
+    Changing a diagram parameter changes the whole layout, so the next
+    update() starts over from the first operation.
+
+    Attributes:
+    diagram -- SequenceDiagram being rendered
+    renderer -- SvgRenderer holding the layout state
+    fragments -- SVG of all committed elements, one string per element
+
+    """
+    def __init__(self, diagram):
+        if diagram.sink is not None:
+            raise ValueError('Streaming diagram does not keep its operations for rendering')
+
+        self.diagram = diagram
+        self.reset()
+
+    def reset(self):
+        """
+        Discard the layout state, so that the next update() lays out
+        the diagram from the start.
+
+        """
+        self.params = self.diagram.params.genPicOperations()
+        self.renderer = SvgRenderer(self.diagram.params)
+        self.fragments = []
+        self.declarationCursor = (0, 0)
+        self.operationCursor = (0, 0)
+
+        # position of the next object declaration in the header row
+        self.headerX = 0.0
+        self.headerY = 0.0
+
+    def update(self):
+        """
+        Interpret the operations recorded since the last update.
+
+        Returns:
+        list of SVG strings of the elements added by those operations,
+        or of all elements if the layout had to start over
+
+        """
+        with self.diagram.lock:
+            if self.diagram.params.genPicOperations() != self.params:
+                self.reset()
+
+            renderer = self.renderer
+            start = len(renderer.elements)
+            declarations = self.diagram.declarations
+            operations = self.diagram.operations
+
+            if self.declarationCursor != declarations.end():
+                self.feedDeclarations(declarations)
+
+            stop = len(operations)
+            if stop and operations.codes[-1] == STEP:
+                stop = stop - 1
+
+            index, position = self.operationCursor
+            for code, args in operations.iterate(self.operationCursor):
+                if index >= stop:
+                    break
+                renderer.feedOperation(code, args)
+                index, position = index + 1, position + operationArity[code]
+            self.operationCursor = (index, position)
+
+        added = [renderer.svgElement(element) for element in renderer.elements[start:]]
+        self.fragments.extend(added)
+        return added
+
+    def feedDeclarations(self, declarations):
+        """
+        Lay out new object declarations in the header row, where run()
+        places all declarations ahead of the other operations.
+
+        """
+        renderer = self.renderer
+        saved = renderer.hereX, renderer.hereY, renderer.direction
+
+        renderer.hereX, renderer.hereY, renderer.direction = self.headerX, self.headerY, 'right'
+        for code, args in declarations.iterate(self.declarationCursor):
+            renderer.feedOperation(code, args)
+        self.headerX, self.headerY = renderer.hereX, renderer.hereY
+        self.declarationCursor = declarations.end()
+
+        if self.operationCursor != (0, 0):
+            renderer.hereX, renderer.hereY, renderer.direction = saved
+
+    def provisional(self):
+        """
+        Return the SVG of the trailing step and the lifeline tails, and
+        the bounds of the diagram including them, leaving the layout
+        state unchanged.
+
+        """
+        renderer = self.renderer
+        bounds = renderer.bounds and list(renderer.bounds)
+        saved = (renderer.hereX, renderer.hereY, renderer.direction, renderer.lastBox,
+                 len(renderer.elements), bounds)
+        lifestarts = [(lifeline, lifeline.lifestart) for lifeline in renderer.lifelines.values()]
+
+        try:
+            with self.diagram.lock:
+                operations = self.diagram.operations
+                if self.operationCursor[0] < len(operations):
+                    for code, args in operations.iterate(self.operationCursor):
+                        renderer.feedOperation(code, args)
+                objectIndex = self.diagram.objectIndex
+                names = [objectPicName(objectIndex[obj]) for obj in self.diagram.objectList
+                         if obj in objectIndex]
+
+            for name in names:
+                renderer.complete(name)
+
+            added = [renderer.svgElement(element) for element in renderer.elements[saved[4]:]]
+            bounds = list(renderer.bounds or [0.0, 0.0, 0.0, 0.0])
+        finally:
+            renderer.hereX, renderer.hereY, renderer.direction, renderer.lastBox = saved[:4]
+            del renderer.elements[saved[4]:]
+            renderer.bounds = saved[5]
+            for lifeline, lifestart in lifestarts:
+                lifeline.lifestart = lifestart
+
+        return added, bounds
+
+    def write(self, outfile=None):
+        """
+        Bring the layout up to date and write the whole diagram as an
+        SVG document into outfile. If outfile is None, then write to
+        stdout.
+
+        Only the new operations are laid out; the SVG of earlier
+        elements is reused as is.
+
+        """
+        if outfile is None:
+            outfile = sys.stdout
+
+        self.update()
+        tails, bounds = self.provisional()
+        renderer = self.renderer
+
+        committed = renderer.bounds
+        renderer.bounds = bounds
+        try:
+            renderer.writeHeader(outfile)
+        finally:
+            renderer.bounds = committed
+
+        outfile.write('<g transform="translate({0:.2f},{1:.2f})">\n'.format(
+            (renderer.margin - bounds[0]) * renderer.scale,
+            (bounds[3] + renderer.margin) * renderer.scale))
+        for fragment in self.fragments:
+            outfile.write(fragment)
+            outfile.write('\n')
+        for fragment in tails:
+            outfile.write(fragment)
+            outfile.write('\n')
+        outfile.write('</g>\n')
+        renderer.writeFooter(outfile)
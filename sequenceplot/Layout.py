@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+"""
+Layout of a diagram computed in Python, ahead of rendering.
+
+The layout is obtained by running the operations of a diagram through
+the SvgRenderer state machine, which follows the geometry of the
+sequence.pic macros, without writing any SVG. It gives the lifeline
+positions and the bounding box of the picture in pic inches, which are
+used to set diagramWidth and diagramHeight (maxpswid and maxpsht) so
+that pic2plot neither shrinks nor clips the output.
+
+Text extents are estimated, so the computed box may differ slightly
+from the one pic2plot arrives at. Raw pic operations added with
+SequenceDiagram.pic() that the native engine cannot interpret are
+skipped, and do not count towards the box.
+
+"""
+
+import math
+
+
+class DiagramLayout:
+    """
+    Layout of a diagram, in pic inches.
+
+    Attributes:
+    bounds -- bounding box of the picture as (minX, minY, maxX, maxY),
+              with y growing upwards
+    width -- width of the bounding box
+    height -- height of the bounding box
+    lifelines -- dictionary mapping each sequence object of the diagram,
+                 live or not, to the x position of its lifeline
+
+    """
+    def __init__(self, bounds, lifelines):
+        self.bounds = tuple(bounds)
+        self.width = bounds[2] - bounds[0]
+        self.height = bounds[3] - bounds[1]
+        self.lifelines = lifelines
+
+    def __repr__(self):
+        return 'DiagramLayout(width={0:.2f}, height={1:.2f})'.format(self.width, self.height)
+
+
+def layoutDiagram(diagram):
+    """
+    Compute the layout of diagram from its parameters and recorded
+    operations.
+
+    Args:
+    diagram -- SequenceDiagram instance, not streaming
+
+    Returns:
+    DiagramLayout of the diagram
+
+    """
+    with diagram.lock:
+        renderer = diagram.nativeRenderer(skipRaw=True)
+        objects = [(obj, obj.picName()) for obj in diagram.objectIndex]
+
+    bounds = renderer.bounds or [0.0, 0.0, 0.0, 0.0]
+    lifelines = {}
+
+    for obj, picName in objects:
+        lifeline = renderer.lifelines.get(picName)
+        if lifeline is not None:
+            lifelines[obj] = lifeline.x
+
+    return DiagramLayout(bounds, lifelines)
+
+
+def roundUp(value, step=0.01):
+    return math.ceil(value / step - 1e-9) * step
+
+
+def autoSizeDiagram(diagram, slack=0.25):
+    """
+    Set the diagramWidth and diagramHeight parameters of diagram to
+    its computed size plus slack, so that pic2plot renders it at full
+    size.
+
+    Args:
+    diagram -- SequenceDiagram instance, not streaming
+    slack -- inches added to each dimension to absorb differences in
+             text extents
+
+    Returns:
+    DiagramLayout the sizes were computed from
+
+    """
+    layout = layoutDiagram(diagram)
+    diagram.setParam('diagramWidth', round(roundUp(layout.width + slack), 2))
+    diagram.setParam('diagramHeight', round(roundUp(layout.height + slack), 2))
+    return layout
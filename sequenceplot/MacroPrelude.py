@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+"""
+Inline only the sequence.pic macros a diagram uses.
+
+Instead of having pic2plot read all of sequence.pic through copy, the
+macro file is parsed once per process into its default parameter
+settings and its macro definitions, stripped of comments, each with the
+macros it calls. A
+diagram's prelude then holds the defaults plus the definitions of the
+macros its operations use and everything those depend on.
+
+"""
+
+import re
+import threading
+
+from Operations import operationTable, RAW
+
+defineExpr = re.compile(r'^define\s+(\w+)\s*\{')
+callExpr = re.compile(r'\b(\w+)\s*\(')
+
+# Macro invoked by each opcode, None for raw pic.
+codeMacros = [callExpr.match(template) and callExpr.match(template).group(1)
+              for template, kinds in operationTable]
+
+macroTables = {}
+macroTablesLock = threading.Lock()
+
+
+def braceDepth(line):
+    """
+    Return the change in brace nesting caused by line, ignoring braces
+    in strings and comments.
+
+    """
+    depth = 0
+    quoted = False
+
+    for c in line:
+        if c == '"':
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif c == '#':
+            break
+        elif c == '{':
+            depth = depth + 1
+        elif c == '}':
+            depth = depth - 1
+
+    return depth
+
+
+class MacroTable:
+    """
+    Parsed contents of a pic macro file.
+
+    Attributes:
+    preamble -- statements outside of any macro definition, in file order
+    names -- macro names, in file order
+    definitions -- dictionary of macro name to its definition text
+    dependencies -- dictionary of macro name to the set of macros it calls
+
+    """
+    def __init__(self, infile):
+        self.preamble = []
+        self.names = []
+        self.definitions = {}
+        self.dependencies = {}
+
+        name = None
+        depth = 0
+        body = []
+
+        for line in infile:
+            line = line.rstrip('\n')
+
+            if name is None:
+                match = defineExpr.match(line)
+                if match is None:
+                    statement = line.strip()
+                    if statement and not statement.startswith('#'):
+                        self.preamble.append(line)
+                    continue
+                name = match.group(1)
+                depth = 0
+                body = []
+
+            if line.strip() and not line.lstrip().startswith('#'):
+                body.append(line)
+            depth = depth + braceDepth(line)
+
+            if depth <= 0:
+                self.names.append(name)
+                self.definitions[name] = '\n'.join(body)
+                name = None
+
+        if name is not None:
+            raise ValueError('Unterminated definition of macro {0}'.format(name))
+
+        for name in self.names:
+            calls = set(callExpr.findall(self.definitions[name]))
+            calls.discard(name)
+            self.dependencies[name] = calls.intersection(self.definitions)
+
+    def closure(self, names):
+        """
+        Return the set of macros in names together with every macro
+        they depend on. Names that are not macros are ignored.
+
+        """
+        result = set()
+        pending = [name for name in names if name in self.definitions]
+
+        while pending:
+            name = pending.pop()
+            if name not in result:
+                result.add(name)
+                pending.extend(self.dependencies[name])
+
+        return result
+
+    def prelude(self, names):
+        """
+        Return the lines defining the default parameters and the macros
+        in names with their dependencies, in file order.
+
+        """
+        used = self.closure(names)
+        bufList = list(self.preamble)
+        bufList.extend([self.definitions[name] for name in self.names if name in used])
+        return bufList
+
+
+def loadMacroTable(picPath):
+    """
+    Return the MacroTable for the macro file picPath, parsing it on
+    first use only.
+
+    """
+    with macroTablesLock:
+        try:
+            return macroTables[picPath]
+        except KeyError:
+            with open(picPath) as infile:
+                table = MacroTable(infile)
+            macroTables[picPath] = table
+            return table
+
+
+def usedMacros(operationLists):
+    """
+    Return the set of macro names called by the operations in
+    operationLists. Raw pic operations are scanned for macro calls.
+
+    Args:
+    operationLists -- sequence of OperationList instances
+
+    """
+    result = set()
+
+    for operations in operationLists:
+        codes = set(operations.codes)
+        result.update([codeMacros[code] for code in codes if codeMacros[code] is not None])
+
+        if RAW in codes:
+            for code, args in operations:
+                if code == RAW:
+                    result.update(callExpr.findall(args[0]))
+
+    return result
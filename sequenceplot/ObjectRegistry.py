@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+from collections import OrderedDict
+
+
+class ObjectRegistry:
+    """
+    Ordered collection of the live objects of a diagram.
+
+    Objects are kept in the order they were added, and can be removed
+    or looked up by label in constant time. The registry supports the
+    list operations used on SequenceDiagram.objectList: len(), in,
+    iteration, append(), extend() and remove().
+
+    Objects are indexed under their label at the time they are added
+    or relabeled; the indexed label of each object is kept, so that
+    later direct changes to obj.label do not break remove().
+
+    """
+    def __init__(self, objects=()):
+        self.objects = OrderedDict()
+        self.labels = {}
+        self.extend(objects)
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __iter__(self):
+        return iter(self.objects)
+
+    def __contains__(self, obj):
+        return obj in self.objects
+
+    def __repr__(self):
+        return repr(list(self.objects))
+
+    def append(self, obj):
+        """
+        Add obj after all other objects. Adding an object that is
+        already present does nothing.
+
+        """
+        if obj in self.objects:
+            return
+
+        self.objects[obj] = obj.label
+        self.labels.setdefault(obj.label, OrderedDict())[obj] = None
+
+    def extend(self, objects):
+        for obj in objects:
+            self.append(obj)
+
+    def remove(self, obj):
+        """
+        Remove obj. Raises ValueError if obj is not present.
+
+        """
+        try:
+            label = self.objects.pop(obj)
+        except KeyError:
+            raise ValueError('{0!r} is not in the diagram'.format(obj))
+
+        self.unlabel(obj, label)
+
+    def unlabel(self, obj, label):
+        objects = self.labels[label]
+        del objects[obj]
+        if not objects:
+            del self.labels[label]
+
+    def relabel(self, obj, label):
+        """
+        Change the label of obj, keeping the label lookup up to date.
+
+        """
+        if obj in self.objects:
+            self.unlabel(obj, self.objects[obj])
+            self.objects[obj] = label
+            self.labels.setdefault(label, OrderedDict())[obj] = None
+        obj.label = label
+
+    def find(self, label):
+        """
+        Return the earliest added object with the given label, or None
+        if there is none.
+
+        """
+        objects = self.labels.get(label)
+        if not objects:
+            return None
+        return next(iter(objects))
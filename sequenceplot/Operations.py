@@ -0,0 +1,311 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+"""
+Compact intermediate representation of the operations recorded by a
+SequenceDiagram.
+
+Each operation is an opcode plus a fixed number of integer arguments,
+stored in array-backed columns. Object arguments are the diagram's
+object indices, and labels are interned into a shared label table, so
+repeated labels are stored once. Consecutive steps are merged into a
+single STEP operation carrying the number of steps. Pic text is only
+produced on demand by picOperation().
+
+"""
+
+from array import array
+
+from sequenceplot import picEscapeString
+
+(OBJECT,
+ ACTOR,
+ PLACEHOLDER,
+ MESSAGE,
+ RMESSAGE,
+ CMESSAGE,
+ DMESSAGE,
+ DELETE,
+ COMPLETE,
+ ACTIVE,
+ INACTIVE,
+ STEP,
+ ASYNC,
+ SYNC,
+ OCONSTRAINT,
+ LCONSTRAINT,
+ LCONSTRAINT_BELOW,
+ BEGIN_FRAME,
+ END_FRAME,
+ COMMENT,
+ CONNECT_TO_COMMENT,
+ RAW) = range(22)
+
+# Argument kinds:
+#   o -- object index, emitted as its pic name O<index>
+#   n -- count, stored directly
+#   q -- label, emitted as an escaped pic string
+#   r -- label, emitted verbatim
+#   t -- multi-line text, emitted as one pic string per line
+operationTable = [
+    ('object({0},"{1}");', 'oq'),
+    ('actor({0},"{1}");', 'oq'),
+    ('pobject({0});', 'o'),
+    ('message({0},{1},"{2}");', 'ooq'),
+    ('rmessage({0},{1},"{2}");', 'ooq'),
+    ('cmessage({0},{1},"{2}");', 'ooq'),
+    ('dmessage({0},{1});', 'oo'),
+    ('delete({0});', 'o'),
+    ('complete({0});', 'o'),
+    ('active({0});', 'o'),
+    ('inactive({0});', 'o'),
+    ('step();', 'n'),
+    ('async();', ''),
+    ('sync();', ''),
+    ('oconstraint("{0}");', 'q'),
+    ('lconstraint({0},"{1}");', 'oq'),
+    ('lconstraint_below({0},"{1}");', 'oq'),
+    ('begin_frame({0},{1},"{2}");', 'orq'),
+    ('end_frame({0},{1});', 'or'),
+    ('comment({0},{1},{2},{3} {4});', 'orrrt'),
+    ('connect_to_comment({0},{1});', 'or'),
+    ('{0}', 'r'),
+    ]
+
+# Operations declaring objects; these are emitted ahead of all others.
+declarationCodes = (OBJECT, ACTOR, PLACEHOLDER)
+
+# Names of the operations, as used in statistics.
+operationNames = ['object', 'actor', 'pobject', 'message', 'rmessage', 'cmessage',
+                  'dmessage', 'delete', 'complete', 'active', 'inactive', 'step',
+                  'async', 'sync', 'oconstraint', 'lconstraint', 'lconstraint_below',
+                  'begin_frame', 'end_frame', 'comment', 'connect_to_comment', 'raw']
+
+operationKinds = [kinds for template, kinds in operationTable]
+operationArity = [len(kinds) for kinds in operationKinds]
+
+# Distance the operations moving down the diagram move it by, following
+# the macros of sequence.pic, as multiples of (messageSpacing, boxHeight).
+# STEP moves it count times, and a message to self a further
+# selfMessageHeight inches.
+operationHeights = {
+    MESSAGE: (1, 0),
+    RMESSAGE: (1, 0),
+    CMESSAGE: (1.5, 0.5),
+    DMESSAGE: (2, 0),
+    STEP: (1, 0),
+    LCONSTRAINT: (0, 0.5),
+    LCONSTRAINT_BELOW: (0, 0.5),
+    BEGIN_FRAME: (0, 1),
+    }
+
+selfMessageHeight = 0.25
+
+
+def objectPicName(index):
+    """
+    Return the pic name of the object with the given index.
+
+    """
+    return 'O{0}'.format(index)
+
+
+def operationHeight(code, args, spacing, boxHeight):
+    """
+    Return the distance an operation moves down the diagram, in inches.
+
+    Args:
+    code -- opcode
+    args -- decoded arguments of the operation
+    spacing -- messageSpacing parameter, in inches
+    boxHeight -- boxHeight parameter, in inches
+
+    """
+    try:
+        spacings, boxHeights = operationHeights[code]
+    except KeyError:
+        return 0
+
+    height = spacings * spacing + boxHeights * boxHeight
+    if code == STEP:
+        height = height * args[0]
+    elif code == MESSAGE and args[0] == args[1]:
+        height = height + selfMessageHeight
+    return height
+
+
+def picOperation(code, args):
+    """
+    Format a decoded operation as a line of pic.
+
+    Args:
+    code -- opcode
+    args -- decoded arguments, object indices and label strings
+
+    """
+    if code == STEP and args[0] != 1:
+        return 'down; move spacing * {0};'.format(args[0])
+
+    template, kinds = operationTable[code]
+    values = []
+
+    for kind, arg in zip(kinds, args):
+        if kind == 'o':
+            values.append(objectPicName(arg))
+        elif kind == 'q':
+            values.append(picEscapeString(arg))
+        elif kind == 't':
+            values.append(''.join(['"{0}"'.format(picEscapeString(line))
+                                   for line in arg.splitlines()]))
+        else:
+            values.append(arg)
+
+    return template.format(*values)
+
+
+class OperationList(object):
+    """
+    Array-backed list of diagram operations.
+
+    Attributes:
+    codes -- array of opcodes, one per operation
+    args -- flat array of the integer arguments of all operations
+    labels -- table of interned labels, indexed by label id
+
+    """
+    __slots__ = ('codes', 'args', 'labels', 'labelIds')
+
+    def __init__(self):
+        self.codes = array('B')
+        self.args = array('i')
+        self.labels = []
+        self.labelIds = {}
+
+    def __len__(self):
+        return len(self.codes)
+
+    def intern(self, label):
+        """
+        Return the id of label in the label table, adding it if needed.
+
+        """
+        try:
+            return self.labelIds[label]
+        except KeyError:
+            labelId = len(self.labels)
+            self.labels.append(label)
+            self.labelIds[label] = labelId
+            return labelId
+
+    def append(self, code, args):
+        """
+        Append an operation. A STEP following another STEP is merged
+        into it.
+
+        Args:
+        code -- opcode
+        args -- object indices, counts and label strings, as given by operationKinds[code]
+
+        """
+        if code == STEP and self.codes and self.codes[-1] == STEP:
+            self.args[-1] = self.args[-1] + args[0]
+            return
+
+        self.codes.append(code)
+
+        for kind, arg in zip(operationKinds[code], args):
+            if kind in 'on':
+                self.args.append(arg)
+            else:
+                self.args.append(self.intern(arg))
+
+    def decode(self, code, position):
+        """
+        Decode the arguments of the operation code whose arguments start
+        at position in the args column.
+
+        """
+        labels = self.labels
+        result = []
+
+        for kind in operationKinds[code]:
+            value = self.args[position]
+            if kind in 'on':
+                result.append(value)
+            else:
+                result.append(labels[value])
+            position = position + 1
+
+        return tuple(result)
+
+    def __iter__(self):
+        """
+        Iterate over (opcode, decoded arguments) pairs.
+
+        """
+        return self.iterate((0, 0))
+
+    def iterate(self, cursor):
+        """
+        Iterate over the (opcode, decoded arguments) pairs of the
+        operations from cursor on.
+
+        Args:
+        cursor -- (operation index, args position) pair, as returned
+                  by end() or mark()
+
+        """
+        index, position = cursor[0], cursor[1]
+
+        for code in self.codes[index:]:
+            yield code, self.decode(code, position)
+            position = position + operationArity[code]
+
+    def end(self):
+        """
+        Return the cursor just past the last operation.
+
+        """
+        return len(self.codes), len(self.args)
+
+    def mark(self):
+        """
+        Return a position that truncate() can later restore.
+
+        """
+        if self.args:
+            return len(self.codes), len(self.args), self.args[-1]
+        return len(self.codes), len(self.args), None
+
+    def truncate(self, mark):
+        """
+        Remove every operation appended after mark was taken, undoing
+        any steps merged into the last operation since.
+
+        """
+        del self.codes[mark[0]:]
+        del self.args[mark[1]:]
+        if mark[2] is not None:
+            self.args[-1] = mark[2]
+
+    def picLines(self):
+        """
+        Iterate over the operations formatted as lines of pic.
+
+        """
+        for code, args in self:
+            yield picOperation(code, args)
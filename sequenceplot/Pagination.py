@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+"""
+Split tall sequence diagrams into pages.
+
+The operations of a diagram are laid end to end, and a new page is
+started before an operation that would take the page past its height
+budget. Pages are never broken inside a frame or between a comment and
+its connections. Every page re-declares all lifelines so objects keep
+their columns, and starts from the activation depth and sync state the
+previous page ended in.
+
+"""
+
+import sys
+
+from Operations import *
+
+
+def spanNames(code, args):
+    """
+    Return the frame or comment name an operation refers to, or None.
+
+    """
+    if code in (BEGIN_FRAME, END_FRAME, COMMENT, CONNECT_TO_COMMENT):
+        return args[1]
+    return None
+
+
+class DiagramPage:
+    """
+    One page of a paginated SequenceDiagram. A page can be passed to
+    renderMany in place of a diagram.
+
+    Attributes:
+    diagram -- SequenceDiagram the page belongs to
+    params -- PicParams of the diagram
+    picPath -- path of sequence.pic
+    stats -- RenderStats instance of the diagram, or None
+    declarations -- OperationList declaring all lifelines of the page
+    operations -- OperationList of the page's other operations
+
+    """
+    def __init__(self, diagram):
+        self.diagram = diagram
+        self.params = diagram.params
+        self.picPath = diagram.picPath
+        self.stats = diagram.stats
+        self.declarations = OperationList()
+        self.operations = OperationList()
+
+    def run(self, outfile=None):
+        """
+        Write the page as pic into outfile. If outfile is None, then
+        write to stdout.
+
+        """
+        if outfile is None:
+            outfile = sys.stdout
+
+        lines = []
+        lines.extend(self.diagram.startPicCode((self.declarations, self.operations)))
+        lines.extend(self.declarations.picLines())
+        lines.extend(self.operations.picLines())
+        lines.extend(self.diagram.endPicCode())
+
+        for line in lines:
+            outfile.write(line)
+            outfile.write('\n')
+
+    def writePic(self, filenamePrefix):
+        picFilename = filenamePrefix + '.pic'
+
+        with open(picFilename, 'w') as outfile:
+            self.run(outfile)
+
+        return picFilename
+
+
+class Paginator:
+    """
+    Splits the operations of a diagram into DiagramPage instances.
+
+    """
+    def __init__(self, diagram, pageHeight):
+        self.diagram = diagram
+        self.pageHeight = pageHeight
+        self.pages = []
+
+        # state carried from page to page, keyed by object index
+        self.activeDepth = {}
+        self.ended = set()
+        self.created = {}
+        self.asyncMode = False
+
+    def paginate(self):
+        declarations = list(self.diagram.declarations)
+        operations = list(self.diagram.operations)
+
+        # Last use of every frame and comment name, and the creation
+        # point of every object created by a message.
+        spanEnd = {}
+        creation = {}
+        for position, (code, args) in enumerate(operations):
+            name = spanNames(code, args)
+            if name is not None:
+                spanEnd[name] = position
+            if code == CMESSAGE:
+                creation.setdefault(args[1], position)
+
+        spacing = float(self.diagram.params.messageSpacing)
+        boxHeight = float(self.diagram.params.boxHeight)
+
+        page = self.startPage(declarations)
+        height = 0.0
+        advanced = False
+        openUntil = -1
+
+        for position, (code, args) in enumerate(operations):
+            advance = operationHeight(code, args, spacing, boxHeight)
+
+            if (advance and advanced and position > openUntil
+                and height + advance > self.pageHeight):
+                self.finishPage(page, declarations, creation, position)
+                page = self.startPage(declarations)
+                height = 0.0
+                advanced = False
+
+            name = spanNames(code, args)
+            if name is not None:
+                openUntil = max(openUntil, spanEnd[name])
+
+            page.operations.append(code, args)
+            self.track(code, args)
+            height = height + advance
+            advanced = advanced or bool(advance)
+
+        self.finishPage(page, declarations, creation, len(operations))
+        return self.pages
+
+    def startPage(self, declarations):
+        page = DiagramPage(self.diagram)
+
+        for code, args in declarations:
+            index = args[0]
+            if index in self.ended:
+                page.declarations.append(PLACEHOLDER, (index,))
+            elif code == PLACEHOLDER and index in self.created:
+                page.declarations.append(OBJECT, (index, self.created[index]))
+            else:
+                page.declarations.append(code, args)
+
+        if self.pages:
+            for index, depth in sorted(self.activeDepth.items()):
+                if depth and index not in self.ended:
+                    page.operations.append(RAW, ('active_{0}={1};'.format(objectPicName(index), depth),))
+            if self.asyncMode:
+                page.operations.append(ASYNC, ())
+
+        self.pages.append(page)
+        return page
+
+    def finishPage(self, page, declarations, creation, position):
+        for code, args in declarations:
+            index = args[0]
+            if index in self.ended:
+                continue
+            if index not in self.created and creation.get(index, -1) >= position:
+                continue
+            page.operations.append(COMPLETE, (index,))
+
+    def track(self, code, args):
+        if code == ACTIVE:
+            self.activeDepth[args[0]] = self.activeDepth.get(args[0], 0) + 1
+        elif code == INACTIVE:
+            self.activeDepth[args[0]] = self.activeDepth.get(args[0], 0) - 1
+        elif code == ASYNC:
+            self.asyncMode = True
+        elif code == SYNC:
+            self.asyncMode = False
+        elif code == CMESSAGE:
+            self.created[args[1]] = args[2]
+        elif code == DMESSAGE:
+            self.ended.add(args[1])
+        elif code == DELETE:
+            self.ended.add(args[0])
+
+
+def paginate(diagram, pageHeight):
+    """
+    Split the operations of diagram into pages of at most pageHeight
+    inches of messages each.
+
+    Args:
+    diagram -- SequenceDiagram to split
+    pageHeight -- height budget of a page, in inches
+
+    Returns:
+    list of DiagramPage instances
+
+    """
+    return Paginator(diagram, pageHeight).paginate()
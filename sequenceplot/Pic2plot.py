@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+import errno
+import os
+import signal
+import subprocess
+import threading
+
+from sequenceplot import RenderError
+
+
+def pic2plotCommand(picFilename, filetype):
+    """
+    Build the pic2plot command line for rendering picFilename, or
+    standard input if picFilename is None.
+
+    """
+    cmdList = []
+    cmdList.append('pic2plot')
+    cmdList.append('-T{0}'.format(filetype))
+    if picFilename is not None:
+        cmdList.append(picFilename)
+    return cmdList
+
+
+def killProcessGroup(p, expired):
+    """
+    Kill the process group led by p, taking any children of pic2plot
+    with it, and set the expired event.
+
+    """
+    expired.set()
+    try:
+        os.killpg(p.pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+def runPic2plot(picFilename, outfileName, filetype, timeout=None):
+    """
+    Run pic2plot on picFilename, streaming its output directly into
+    outfileName. The process is waited for, and a non-zero exit status
+    raises RenderError carrying pic2plot's diagnostics.
+
+    pic2plot is started in its own process group. If timeout expires
+    before it exits, the whole group is killed and RenderError is
+    raised.
+
+    Args:
+    picFilename -- pic file to render
+    outfileName -- file to write the rendered diagram to
+    filetype -- output format, legal values are those supported by pic2plot
+    timeout -- optional number of seconds to allow pic2plot to run
+
+    """
+    runTool('pic2plot', pic2plotCommand(picFilename, filetype), picFilename, outfileName, timeout)
+
+
+def plotCommand(metaFilename, filetype):
+    """
+    Build the plot command line for converting the GNU metafile
+    metaFilename.
+
+    """
+    cmdList = []
+    cmdList.append('plot')
+    cmdList.append('-T{0}'.format(filetype))
+    cmdList.append(metaFilename)
+    return cmdList
+
+
+def runPlot(metaFilename, outfileName, filetype, timeout=None):
+    """
+    Convert a GNU metafile written by pic2plot -Tmeta to filetype with
+    the plotutils plot program, streaming its output directly into
+    outfileName. Failures and timeouts are handled as by runPic2plot().
+
+    Args:
+    metaFilename -- GNU metafile to convert
+    outfileName -- file to write the converted diagram to
+    filetype -- output format, legal values are those supported by plot
+    timeout -- optional number of seconds to allow plot to run
+
+    """
+    runTool('plot', plotCommand(metaFilename, filetype), metaFilename, outfileName, timeout)
+
+
+def runTool(program, cmdList, infileName, outfileName, timeout=None):
+    """
+    Run cmdList in its own process group with its output written to
+    outfileName, raising RenderError naming program and infileName if
+    it fails or outlives timeout.
+
+    The output is written to a temporary file renamed over outfileName
+    once the program has succeeded, so a previous outfileName, which
+    may be hard linked into a RenderCache, is replaced rather than
+    truncated, and is left as it was if the program fails.
+
+    """
+    temporary = outfileName + '.tmp'
+    try:
+        with open(temporary, 'wb') as outfile:
+            try:
+                p = subprocess.Popen(cmdList, stdout=outfile, stderr=subprocess.PIPE,
+                                     preexec_fn=os.setsid)
+            except OSError as e:
+                raise RenderError('Unable to run {0}: {1}'.format(program, e))
+
+            timer = None
+            expired = threading.Event()
+            if timeout is not None:
+                timer = threading.Timer(timeout, killProcessGroup, (p, expired))
+                timer.start()
+
+            try:
+                errors = p.communicate()[1]
+            finally:
+                if timer is not None:
+                    timer.cancel()
+
+        if expired.is_set() and p.returncode != 0:
+            raise RenderError('{0} timed out on {1} after {2} seconds'.format(program, infileName, timeout))
+
+        if p.returncode != 0:
+            raise RenderError('{0} failed on {1} (exit status {2}): {3}'.format(program,
+                                                                              infileName,
+                                                                              p.returncode,
+                                                                              errors.strip()))
+
+        os.rename(temporary, outfileName)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def drain(infile, chunks):
+    """
+    Read infile to its end, appending what is read to chunks.
+
+    """
+    for chunk in iter(lambda: infile.read(4096), ''):
+        chunks.append(chunk)
+
+
+def feedPic(writePic, infile, failures):
+    """
+    Write pic into the stdin pipe of pic2plot and close it. A broken
+    pipe means pic2plot exited early, which is reported by its exit
+    status; other errors are appended to failures.
+
+    """
+    try:
+        writePic(infile)
+    except IOError as e:
+        if e.errno != errno.EPIPE:
+            failures.append(e)
+    except Exception as e:
+        failures.append(e)
+
+    try:
+        infile.close()
+    except IOError:
+        pass
+
+
+def streamPic2plot(writePic, outfile, filetype, timeout=None, chunkSize=65536):
+    """
+    Run pic2plot on pic piped to its standard input, copying its output
+    to outfile in chunks as it is produced. No temporary file is
+    written and at most one chunk of output is held in memory.
+
+    The pic is written and pic2plot's diagnostics are drained on
+    background threads, so pic2plot cannot block on a full pipe. As
+    with runPic2plot(), a non-zero exit status or an expired timeout
+    raises RenderError.
+
+    Args:
+    writePic -- callable writing the pic to the file handle it is given
+    outfile -- writable file handle to copy the rendered diagram to
+    filetype -- output format, legal values are those supported by pic2plot
+    timeout -- optional number of seconds to allow pic2plot to run
+    chunkSize -- number of bytes to copy at a time
+
+    """
+    cmdList = pic2plotCommand(None, filetype)
+
+    try:
+        p = subprocess.Popen(cmdList, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                             stderr=subprocess.PIPE, preexec_fn=os.setsid)
+    except OSError as e:
+        raise RenderError('Unable to run pic2plot: {0}'.format(e))
+
+    timer = None
+    expired = threading.Event()
+    if timeout is not None:
+        timer = threading.Timer(timeout, killProcessGroup, (p, expired))
+        timer.start()
+
+    failures = []
+    errors = []
+    threads = [threading.Thread(target=feedPic, args=(writePic, p.stdin, failures)),
+               threading.Thread(target=drain, args=(p.stderr, errors))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    try:
+        for chunk in iter(lambda: p.stdout.read(chunkSize), ''):
+            outfile.write(chunk)
+    except:
+        killProcessGroup(p, threading.Event())
+        raise
+    finally:
+        p.stdout.close()
+        for thread in threads:
+            thread.join()
+        p.stderr.close()
+        p.wait()
+        if timer is not None:
+            timer.cancel()
+
+    if failures:
+        raise failures[0]
+
+    if expired.is_set() and p.returncode != 0:
+        raise RenderError('pic2plot timed out on standard input after {0} seconds'.format(timeout))
+
+    if p.returncode != 0:
+        raise RenderError('pic2plot failed on standard input (exit status {0}): {1}'.format(p.returncode,
+                                                                                          ''.join(errors).strip()))
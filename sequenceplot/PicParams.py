@@ -27,35 +27,33 @@ class PicParams:
     underline = 1
 
     paramAttributes = {}
-    
-    def __init__(self):
 
-        self.paramAttributes['boxHeight'] = { 'picName': 'boxht',
-                                              'description': 'Object box height'}
-        
-        self.paramAttributes['boxWidth'] = { 'picName': 'boxwid',
-                                             'description': 'Object box width'}
-        
-        self.paramAttributes['activeWidth'] = { 'picName': 'awid',
-                                                'description': 'Active lifeline width'}
-        
-        self.paramAttributes['messageSpacing'] = { 'picName': 'spacing',
-                                                   'description': 'Spacing between messages'}
-        
-        self.paramAttributes['objectSpacing'] = { 'picName': 'movewid',
-                                                  'description': 'Spacing between objects'}
-        
-        self.paramAttributes['dashInterval'] = { 'picName': 'dashwid',
-                                                 'description': 'Interval for dashed lines'}
-        
-        self.paramAttributes['diagramWidth'] = { 'picName': 'maxpswid',
-                                                 'description': 'Maximum width of picture'}
+    paramAttributes['boxHeight'] = { 'picName': 'boxht',
+                                     'description': 'Object box height'}
+
+    paramAttributes['boxWidth'] = { 'picName': 'boxwid',
+                                    'description': 'Object box width'}
+
+    paramAttributes['activeWidth'] = { 'picName': 'awid',
+                                       'description': 'Active lifeline width'}
+
+    paramAttributes['messageSpacing'] = { 'picName': 'spacing',
+                                          'description': 'Spacing between messages'}
+
+    paramAttributes['objectSpacing'] = { 'picName': 'movewid',
+                                         'description': 'Spacing between objects'}
+
+    paramAttributes['dashInterval'] = { 'picName': 'dashwid',
+                                        'description': 'Interval for dashed lines'}
+
+    paramAttributes['diagramWidth'] = { 'picName': 'maxpswid',
+                                        'description': 'Maximum width of picture'}
 
-        self.paramAttributes['diagramHeight'] = { 'picName': 'maxpsht',
-                                                  'description': 'Maximum height of picture'}
+    paramAttributes['diagramHeight'] = { 'picName': 'maxpsht',
+                                         'description': 'Maximum height of picture'}
 
-        self.paramAttributes['underline'] = { 'picName': 'underline',
-                                              'description': 'Underline the name of objects'}
+    paramAttributes['underline'] = { 'picName': 'underline',
+                                     'description': 'Underline the name of objects'}
 
     def keys(self):
         result = self.paramAttributes.keys()
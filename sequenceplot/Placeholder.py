@@ -16,6 +16,7 @@
 # Author: Charles Y. Choi
 
 from SequenceObject import SequenceObject
+from Operations import PLACEHOLDER
 
 class Placeholder(SequenceObject):
     """
@@ -31,6 +32,5 @@ class Placeholder(SequenceObject):
             placeholder_object(name);
             
         """
-        buf = 'pobject({0});'.format(self.picName())
-        self.parent.transactions.append(buf)
+        self.parent.addOperation(PLACEHOLDER, self)
 
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+import os
+import shutil
+import hashlib
+import tempfile
+
+picDigests = {}
+
+
+def fileDigest(path):
+    """
+    Return the SHA-1 hex digest of the file at path, memoized per
+    process on the file's path and modification time.
+
+    """
+    stamp = (path, os.path.getmtime(path))
+    if stamp not in picDigests:
+        with open(path, 'rb') as infile:
+            picDigests[stamp] = hashlib.sha1(infile.read()).hexdigest()
+    return picDigests[stamp]
+
+
+class RenderCache:
+    """
+    Content-addressed on-disk cache of rendered diagrams.
+
+    Entries are keyed on the generated pic text, the diagram
+    parameters, the contents of sequence.pic and the output
+    format. When maxBytes is given, least recently used entries are
+    evicted once the cache grows beyond it.
+
+    """
+    def __init__(self, directory, maxBytes=None, hardlink=False):
+        """
+        Constructor for a render cache.
+
+        Args:
+        directory -- directory holding the cached outputs; created if missing
+        maxBytes -- size bound of the cache in bytes, None for unbounded
+        hardlink -- if True, hits are hard linked to the output file instead
+                    of copied. Rewriting a linked output in place also
+                    rewrites the cache entry.
+
+        """
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.hardlink = hardlink
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def key(self, picFilename, params, picPath, filetype):
+        """
+        Compute the cache key of a render.
+
+        Args:
+        picFilename -- pic file written by SequenceDiagram.writePic()
+        params -- PicParams instance of the diagram
+        picPath -- path of sequence.pic
+        filetype -- output format
+
+        """
+        digest = hashlib.sha1()
+        with open(picFilename, 'rb') as infile:
+            for block in iter(lambda: infile.read(65536), ''):
+                digest.update(block)
+        digest.update('\0')
+        for key in sorted(params.keys()):
+            digest.update('{0}={1};'.format(key, params[key]))
+        digest.update('\0')
+        digest.update(fileDigest(picPath))
+        digest.update('\0')
+        digest.update(filetype)
+        return digest.hexdigest() + '.' + filetype
+
+    def entryPath(self, key):
+        return os.path.join(self.directory, key)
+
+    def fetch(self, key, outfileName):
+        """
+        Place the cached output for key at outfileName.
+
+        Returns:
+        True on a cache hit, False otherwise.
+
+        """
+        entry = self.entryPath(key)
+
+        if os.path.exists(outfileName):
+            os.unlink(outfileName)
+
+        try:
+            if self.hardlink:
+                try:
+                    os.link(entry, outfileName)
+                except OSError:
+                    if not os.path.exists(entry):
+                        raise
+                    shutil.copyfile(entry, outfileName)
+            else:
+                shutil.copyfile(entry, outfileName)
+        except (IOError, OSError):
+            return False
+
+        # mark the entry as recently used
+        os.utime(entry, None)
+        return True
+
+    def store(self, key, outfileName):
+        """
+        Add the rendered file outfileName to the cache under key.
+
+        """
+        handle, tempName = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+        os.close(handle)
+        shutil.copyfile(outfileName, tempName)
+        os.rename(tempName, self.entryPath(key))
+
+        if self.maxBytes is not None:
+            self.evict(self.maxBytes)
+
+    def evict(self, maxBytes):
+        """
+        Remove least recently used entries until the cache holds at
+        most maxBytes.
+
+        """
+        entries = []
+        total = 0
+
+        for name in os.listdir(self.directory):
+            if name.startswith('.tmp'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            entries.append((info.st_mtime, info.st_size, path))
+            total = total + info.st_size
+
+        entries.sort()
+
+        for mtime, size, path in entries:
+            if total <= maxBytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total = total - size
@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+"""
+Local HTTP service rendering diagram specs.
+
+A long running server amortizes interpreter start-up and package import
+across many renders. Specs in the SpecParser format are POSTed to
+/render, with the output format given by the query parameter type
+(svg by default), and the rendered diagram is returned as the response
+body. GET /stats returns the service counters as JSON.
+
+Identical requests arriving while one is being rendered wait for that
+render instead of starting their own, recent results are kept in an
+in-memory LRU cache, and the number of concurrent renders is bounded.
+
+Usage:
+    python -m sequenceplot --serve [host:]port
+
+"""
+
+import hashlib
+import json
+import multiprocessing
+import threading
+import urlparse
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from collections import OrderedDict
+from SocketServer import ThreadingMixIn
+
+from sequenceplot import SyntaxError, RenderError
+from SpecParser import parseSpec
+
+# content type by output format
+contentTypes = {
+    'svg': 'image/svg+xml',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'ps': 'application/postscript',
+    'ai': 'application/postscript',
+    'fig': 'application/x-xfig',
+    'cgm': 'image/cgm',
+    }
+
+
+class PendingRender:
+    """
+    A render in progress, shared by the identical requests waiting
+    for it.
+
+    """
+    def __init__(self):
+        self.finished = threading.Event()
+        self.output = None
+        self.error = None
+
+    def wait(self):
+        self.finished.wait()
+        if self.error is not None:
+            raise self.error
+        return self.output
+
+    def complete(self, output, error):
+        self.output = output
+        self.error = error
+        self.finished.set()
+
+
+class RenderService:
+    """
+    Renders specs to bytes, coalescing identical concurrent requests
+    and caching recent results. Safe to use from several threads.
+
+    Attributes:
+    cacheSize -- maximum number of results kept in the LRU cache
+    engine -- render engine, 'pic2plot' or 'native'
+    timeout -- number of seconds to allow each render, or None
+    requests -- number of render() calls
+    hits -- number of requests answered from the cache
+    coalesced -- number of requests answered by another request's render
+    renders -- number of renders run
+    failures -- number of renders that failed
+
+    """
+    def __init__(self, cacheSize=256, maxRenders=None, engine='pic2plot', timeout=60):
+        """
+        Constructor for a render service.
+
+        Args:
+        cacheSize -- maximum number of results kept in the LRU cache
+        maxRenders -- maximum number of renders run at once (default: number of CPUs)
+        engine -- 'pic2plot' (default) or 'native'
+        timeout -- number of seconds to allow each render, or None
+
+        """
+        if maxRenders is None:
+            maxRenders = multiprocessing.cpu_count()
+
+        self.cacheSize = cacheSize
+        self.engine = engine
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(maxRenders)
+        self.lock = threading.Lock()
+        self.cache = OrderedDict()
+        self.pending = {}
+        self.requests = 0
+        self.hits = 0
+        self.coalesced = 0
+        self.renders = 0
+        self.failures = 0
+
+    def render(self, spec, filetype='svg'):
+        """
+        Return spec rendered as filetype. Raises SyntaxError for
+        invalid specs and RenderError if rendering fails.
+
+        Args:
+        spec -- spec text
+        filetype -- output format, one of the keys of contentTypes
+
+        """
+        if not self.supports(filetype):
+            raise ValueError('Unsupported output type for the {0} engine: {1}'.format(self.engine, filetype))
+
+        key = hashlib.sha1('\0'.join((self.engine, filetype, spec))).digest()
+        leading = False
+
+        with self.lock:
+            self.requests = self.requests + 1
+            output = self.cache.pop(key, None)
+            if output is not None:
+                self.hits = self.hits + 1
+                self.cache[key] = output
+                return output
+
+            pending = self.pending.get(key)
+            if pending is not None:
+                self.coalesced = self.coalesced + 1
+            else:
+                pending = PendingRender()
+                self.pending[key] = pending
+                leading = True
+
+        if not leading:
+            return pending.wait()
+
+        output = None
+        error = None
+        try:
+            diagram = parseSpec(spec)
+            with self.slots:
+                output = diagram.renderBytes(filetype, self.engine, self.timeout)
+        except Exception as e:
+            error = e
+
+        with self.lock:
+            del self.pending[key]
+            self.renders = self.renders + 1
+            if error is None:
+                self.cache[key] = output
+                while len(self.cache) > self.cacheSize:
+                    self.cache.popitem(last=False)
+            else:
+                self.failures = self.failures + 1
+
+        pending.complete(output, error)
+        return pending.wait()
+
+    def supports(self, filetype):
+        """
+        Return True if the engine of the service renders filetype. The
+        native engine only renders svg.
+
+        """
+        if self.engine == 'native':
+            return filetype == 'svg'
+        return filetype in contentTypes
+
+    def summary(self):
+        """
+        Return the service counters as a dictionary, suitable for
+        serializing as JSON.
+
+        """
+        with self.lock:
+            return {'requests': self.requests,
+                    'hits': self.hits,
+                    'coalesced': self.coalesced,
+                    'renders': self.renders,
+                    'failures': self.failures,
+                    'cached': len(self.cache),
+                    'pending': len(self.pending)}
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP front end of the RenderService of the server.
+
+    """
+    server_version = 'SequencePlot'
+    maxSpecBytes = 16 * 1024 * 1024
+
+    def do_GET(self):
+        if urlparse.urlparse(self.path).path != '/stats':
+            self.send_error(404)
+            return
+        self.reply(200, 'application/json', json.dumps(self.server.service.summary()))
+
+    def do_POST(self):
+        url = urlparse.urlparse(self.path)
+        if url.path != '/render':
+            self.send_error(404)
+            return
+
+        filetype = urlparse.parse_qs(url.query).get('type', ['svg'])[-1]
+        service = self.server.service
+        if not service.supports(filetype):
+            self.reply(400, 'text/plain',
+                       'Unsupported output type for the {0} engine: {1}\n'.format(service.engine, filetype))
+            return
+
+        try:
+            length = int(self.headers.getheader('Content-Length'))
+        except (TypeError, ValueError):
+            self.send_error(411)
+            return
+        if length > self.maxSpecBytes:
+            self.send_error(413)
+            return
+
+        spec = self.rfile.read(length)
+
+        try:
+            output = service.render(spec, filetype)
+        except SyntaxError as e:
+            self.reply(400, 'text/plain', '{0}\n'.format(e.value))
+        except RenderError as e:
+            self.reply(500, 'text/plain', '{0}\n'.format(e.value))
+        except Exception as e:
+            self.reply(500, 'text/plain', '{0}: {1}\n'.format(e.__class__.__name__, e))
+        else:
+            self.reply(200, contentTypes[filetype], output)
+
+    def reply(self, code, contentType, body):
+        self.send_response(code)
+        self.send_header('Content-Type', contentType)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+class RenderServer(ThreadingMixIn, HTTPServer):
+    """
+    Threaded HTTP server handing each request to a RenderService.
+
+    Attributes:
+    service -- RenderService rendering the requests
+    quiet -- if True, requests are not logged to stderr
+
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, service=None, quiet=False):
+        """
+        Constructor for a render server.
+
+        Args:
+        address -- (host, port) pair to listen on; port 0 picks a free port
+        service -- RenderService instance (default: a new RenderService)
+        quiet -- if True, requests are not logged to stderr
+
+        """
+        if service is None:
+            service = RenderService()
+        self.service = service
+        self.quiet = quiet
+        HTTPServer.__init__(self, address, RenderRequestHandler)
+
+
+def serve(address, service=None, quiet=False):
+    """
+    Serve render requests on address until interrupted.
+
+    Args:
+    address -- (host, port) pair to listen on
+    service -- RenderService instance (default: a new RenderService)
+    quiet -- if True, requests are not logged to stderr
+
+    """
+    server = RenderServer(address, service, quiet)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
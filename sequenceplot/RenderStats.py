@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+import threading
+
+from Operations import operationNames
+
+
+class CountingFile:
+    """
+    File wrapper counting the bytes written through it. With no file
+    to wrap, the data is discarded.
+
+    """
+    def __init__(self, outfile=None):
+        self.outfile = outfile
+        self.size = 0
+
+    def write(self, buf):
+        self.size = self.size + len(buf)
+        if self.outfile is not None:
+            self.outfile.write(buf)
+
+
+class RenderStats:
+    """
+    Collects build, emission and render metrics of the diagrams it is
+    attached to. One instance may be shared by many diagrams to
+    aggregate their metrics, and is safe to use from several threads.
+
+    Attributes:
+    operations -- dictionary of operation name to number of operations recorded
+    runs -- number of run() calls
+    runSeconds -- total wall time spent in run()
+    picBytes -- total bytes of pic emitted by run()
+    renders -- number of rendered files, cache hits included
+    cacheHits -- number of renders served from a RenderCache
+    renderSeconds -- total wall time spent rendering, pic2plot included
+    outputBytes -- total size of the rendered files
+    callback -- optional callable, called with a dictionary of metrics
+                after every run() and render
+
+    """
+    def __init__(self, callback=None):
+        self.operations = {}
+        self.runs = 0
+        self.runSeconds = 0.0
+        self.picBytes = 0
+        self.renders = 0
+        self.cacheHits = 0
+        self.renderSeconds = 0.0
+        self.outputBytes = 0
+        self.callback = callback
+        self.lock = threading.Lock()
+
+    def countOperation(self, code):
+        name = operationNames[code]
+        with self.lock:
+            self.operations[name] = self.operations.get(name, 0) + 1
+
+    def recordRun(self, diagram, seconds, picBytes):
+        """
+        Record one run() of diagram.
+
+        """
+        with self.lock:
+            self.runs = self.runs + 1
+            self.runSeconds = self.runSeconds + seconds
+            self.picBytes = self.picBytes + picBytes
+
+        if self.callback is not None:
+            self.callback({'event': 'run',
+                           'diagram': diagram,
+                           'seconds': seconds,
+                           'picBytes': picBytes})
+
+    def recordRender(self, diagram, outfileName, seconds, outputBytes, cached=False):
+        """
+        Record the rendering of diagram into outfileName, None for
+        renders into a file handle.
+
+        """
+        with self.lock:
+            self.renders = self.renders + 1
+            self.renderSeconds = self.renderSeconds + seconds
+            self.outputBytes = self.outputBytes + outputBytes
+            if cached:
+                self.cacheHits = self.cacheHits + 1
+
+        if self.callback is not None:
+            self.callback({'event': 'render',
+                           'diagram': diagram,
+                           'outfileName': outfileName,
+                           'seconds': seconds,
+                           'outputBytes': outputBytes,
+                           'cached': cached})
+
+    def summary(self):
+        """
+        Return the collected totals as a dictionary, suitable for
+        serializing as JSON.
+
+        """
+        with self.lock:
+            return {'operations': dict(self.operations),
+                    'runs': self.runs,
+                    'runSeconds': self.runSeconds,
+                    'picBytes': self.picBytes,
+                    'renders': self.renders,
+                    'cacheHits': self.cacheHits,
+                    'renderSeconds': self.renderSeconds,
+                    'outputBytes': self.outputBytes}
@@ -17,18 +17,71 @@
 
 import sys
 import os
-import subprocess
+import threading
+import time
+from StringIO import StringIO
 
-from sequenceplot import SyntaxError, picEscapeString
+from sequenceplot import SyntaxError
 from PicParams import PicParams
+from Operations import *
+from SvgRenderer import SvgRenderer
+from Pic2plot import runPic2plot, streamPic2plot
+from AsyncRender import renderAsync
+from MacroPrelude import loadMacroTable, usedMacros
+from ObjectRegistry import ObjectRegistry
+from Pagination import paginate
+from BatchRender import renderMany, renderFormats
+from RenderStats import CountingFile
+from DiagramFile import writeDiagram, loadDiagram
+from Layout import layoutDiagram, autoSizeDiagram
+from Validation import findProblems, validateDiagram
+
+picPaths = []
+
+
+def findPicPath():
+    """
+    Locate sequence.pic on sys.path. The search is done once per
+    process.
+
+    Returns:
+    path of sequence.pic, or None if it cannot be found
+
+    """
+    if not picPaths:
+        for path in sys.path:
+            testPath = os.path.join(path, 'sequenceplot', 'sequence.pic')
+            if os.path.exists(testPath):
+                picPaths.append(testPath)
+                break
+
+    if picPaths:
+        return picPaths[0]
+    return None
+
 
 class SequenceDiagram:
     """
     Class to configure and render a UML sequence diagram.
 
     Attributes:
-    objectList -- list of sequence objects in the diagram.
-    transactions -- list of all UMLGraph pic operations.
+    objectList -- ObjectRegistry of the live sequence objects in the diagram,
+                  in the order they were added.
+    objectIndex -- dictionary mapping each sequence object to its index. The
+                   pic name of an object is O<index>.
+    declarations -- OperationList of the object declarations. They are
+                    emitted ahead of all other operations, so objects added
+                    after the first message still head their lifelines.
+    operations -- OperationList of all other recorded UMLGraph operations.
+                  Empty in streaming mode.
+    sink -- output file handle of a streaming diagram, None otherwise.
+    stats -- optional RenderStats instance collecting operation counts
+             and run() and render timings of the diagram.
+    strict -- if True, the diagram is validated before it is written
+              out or rendered.
+    ignoredInactive -- list of (object, number of operations recorded
+                       before the call) for the inactive() calls made on
+                       objects that were not active.
     frameCount -- counter for frames
     params -- dictionary of UMLGraph pic variables. Use the method setParam(key, value)
               to alter a parameter.
@@ -43,29 +96,55 @@ class SequenceDiagram:
              diagramHeight - Maximume height of diagram
              underline - Underline the name of objects
 
+    All state is held per instance, so independent diagrams can be
+    built concurrently from different threads. Operations recorded on
+    one diagram from several threads are each recorded atomically, in
+    the order their threads record them.
+
     """
 
-    objectList = [] 
-    transactions = []
-    params = PicParams()
-    picPath = None
-    nameIndex = 0
-    drawSync = True
-    
-    def __init__(self, objects=None):
+    def __init__(self, objects=None, sink=None, stats=None, strict=False):
         """
         Constructor for a sequence diagram.
-        
-        """
+
+        Args:
+        objects -- list of SequenceObject instances to add to the diagram
+        sink -- optional output file handle. When given, the diagram is
+                streamed: pic is written to sink as operations are
+                added instead of being kept in memory, and run()
+                finishes the stream. Object declarations are held back
+                until the first other operation, so parameters may be
+                set after construction; parameters set later are
+                written at that point of the stream. All objects must
+                be added before the first message.
+        stats -- optional RenderStats instance. Every recorded operation
+                 is counted by kind, including the lifeline completions
+                 added by each run(), and non-streaming run() calls and
+                 renders are timed.
+        strict -- if True, the diagram is validated before it is
+                  written out or rendered, raising ValidationError if
+                  it has problems. Streaming diagrams are not validated.
+        
+        """
+        self.objectList = ObjectRegistry()
+        self.objectIndex = {}
+        self.declarations = OperationList()
+        self.operations = OperationList()
+        self.params = PicParams()
+        self.nameIndex = 0
+        self.drawSync = True
+        self.sink = sink
+        self.streamState = None
+        self.pendingSteps = 0
+        self.lock = threading.RLock()
+        self.stats = stats
+        self.strict = strict
+        self.ignoredInactive = []
 
         if objects:
             self.addObjects(objects)
 
-        for path in sys.path:
-            testPath = os.path.join(path, 'sequenceplot', 'sequence.pic')
-            if os.path.exists(testPath):
-                self.picPath = testPath
-                break
+        self.picPath = findPicPath()
             
         if self.picPath is None:
             sys.stderr.write('ERROR: Unable to locate file "sequence.pic". '
@@ -76,13 +155,99 @@ class SequenceDiagram:
 
     def addTransaction(self, operation):
         """
-        Add pic operation to list of transactions.
+        Add raw pic operation to list of operations.
 
         Args:
         operation -- pic operation
         
         """
-        self.transactions.append(operation)
+        self.addOperation(RAW, operation)
+
+
+    def addOperation(self, code, *args):
+        """
+        Record an operation.
+
+        Args:
+        code -- opcode, one of the constants of the Operations module
+        args -- SequenceObject instances and label strings, as given by
+                operationKinds[code]
+
+        """
+        values = []
+
+        for kind, arg in zip(operationKinds[code], args):
+            if kind == 'o':
+                values.append(arg.picIndex())
+            else:
+                values.append(arg)
+
+        with self.lock:
+            if self.stats is not None:
+                self.stats.countOperation(code)
+
+            if code in declarationCodes:
+                if self.streamState is not None:
+                    raise ValueError('Objects of a streaming diagram must be added before its first message')
+                self.declarations.append(code, values)
+            elif self.sink is not None:
+                self.streamOperation(code, values)
+            else:
+                self.operations.append(code, values)
+
+
+    def streamOperation(self, code, values):
+        """
+        Write an operation of a streaming diagram through to its sink.
+        Steps are held back until the next operation, so that
+        consecutive steps are written as one.
+
+        Args:
+        code -- opcode
+        values -- object indices and label strings of the operation
+
+        """
+        if self.streamState is None:
+            self.startStream()
+        elif self.streamState == 'finished':
+            raise ValueError('Streaming diagram has already been finished by run()')
+
+        if code == STEP:
+            self.pendingSteps = self.pendingSteps + values[0]
+            return
+
+        self.flushSteps()
+        self.sink.write(picOperation(code, values))
+        self.sink.write('\n')
+
+
+    def flushSteps(self):
+        """
+        Write the steps held back by streamOperation to the sink.
+
+        """
+        if self.pendingSteps:
+            self.sink.write(picOperation(STEP, (self.pendingSteps,)))
+            self.sink.write('\n')
+            self.pendingSteps = 0
+
+
+    def startStream(self):
+        """
+        Write the preliminary pic operations and the held back object
+        declarations of a streaming diagram to its sink.
+
+        """
+        for line in self.startPicCode():
+            self.sink.write(line)
+            self.sink.write('\n')
+
+        for line in self.declarations.picLines():
+            self.sink.write(line)
+            self.sink.write('\n')
+
+        self.declarations = OperationList()
+        self.streamState = 'started'
 
 
     def setParam(self, key, value):
@@ -107,6 +272,10 @@ class SequenceDiagram:
         """
         self.params[key] = value
 
+        if self.streamState == 'started':
+            self.flushSteps()
+            self.sink.write('{0}={1};\n'.format(self.params.info(key)['picName'], value))
+
 
     def add(self, obj):
         """
@@ -116,9 +285,11 @@ class SequenceDiagram:
         obj -- SequenceObject instance
         
         """
-        self.objectList.append(obj)
-        obj.parent = self
-        obj.picObjectInit()
+        with self.lock:
+            self.objectList.append(obj)
+            obj.parent = self
+            self.assignObjectIndex(obj)
+            obj.picObjectInit()
 
     def addObjects(self, objList):
         """
@@ -128,22 +299,61 @@ class SequenceDiagram:
         objList -- list of SequenceObject instances
         
         """
-        
-        self.objectList.extend(objList)
+        with self.lock:
+            self.objectList.extend(objList)
 
-        for obj in objList:
-            obj.parent = self
-            obj.picObjectInit()
-        
+            for obj in objList:
+                obj.parent = self
+                self.assignObjectIndex(obj)
+                obj.picObjectInit()
+
+    def findObject(self, label):
+        """
+        Return the earliest added live object with the given label, or
+        None if there is none.
+
+        Args:
+        label -- label of the object
 
-    def startPicCode(self):
+        """
+        with self.lock:
+            return self.objectList.find(label)
+
+    def assignObjectIndex(self, obj):
+        """
+        Assign the next object index to obj and record it in
+        objectIndex. Indices are given in the order objects are added,
+        so the generated pic names O[0..n] are the same on every run.
+
+        Args:
+        obj -- SequenceObject instance
+
+        """
+        with self.lock:
+            if obj not in self.objectIndex:
+                self.objectIndex[obj] = len(self.objectIndex)
+
+            return self.objectIndex[obj]
+
+    def startPicCode(self, operationLists=None):
         """
         Insert preliminary pic operations.
+
+        When operationLists is given, only the sequence.pic macros used
+        by those operations are inlined. Otherwise, as when streaming
+        before the operations are known, all of sequence.pic is copied.
+
+        Args:
+        operationLists -- optional sequence of OperationList instances
         
         """
         bufList = []
         bufList.append('.PS')
-        bufList.append('copy "{0}";'.format(self.picPath));
+        if operationLists is None:
+            bufList.append('copy "{0}";'.format(self.picPath));
+        else:
+            macroTable = loadMacroTable(self.picPath)
+            bufList.extend(macroTable.prelude(usedMacros(operationLists)))
 
         bufList.extend(self.params.genPicOperations())
         
@@ -160,68 +370,454 @@ class SequenceDiagram:
     
     def run(self, outfile=None):
         """
-        Write out all stored UMLGraph pic operations stored in
-        transactions into outfile. If outfile is None, then write to
-        stdout.
+        Write out all UMLGraph operations stored in operations as pic
+        into outfile. If outfile is None, then write to stdout.
 
         Args:
         outfile -- output file handle
 
         """
-        for obj in self.objectList:
-            obj.complete()
+        if self.sink is not None:
+            if outfile is not None and outfile is not self.sink:
+                raise ValueError('Streaming diagram can only be written to its sink')
+            self.finishStream()
+            return
+
+        if self.strict:
+            self.validate()
 
         if outfile is None:
             outfile = sys.stdout
 
-        for line in self.startPicCode():
-            outfile.write(line)
-            outfile.write('\n')
-        
-        for line in self.transactions:
-            outfile.write(line)
-            outfile.write('\n')
+        if self.stats is not None:
+            outfile = CountingFile(outfile)
+            start = time.time()
+
+        with self.lock:
+            # Completing the lifelines is not recorded, so that running
+            # the diagram again produces the same output. The lock keeps
+            # other threads from seeing the completions.
+            mark = self.operations.mark()
+            for obj in self.objectList:
+                obj.complete()
+
+            try:
+                for line in self.startPicCode((self.declarations, self.operations)):
+                    outfile.write(line)
+                    outfile.write('\n')
+
+                for line in self.declarations.picLines():
+                    outfile.write(line)
+                    outfile.write('\n')
+
+                for line in self.operations.picLines():
+                    outfile.write(line)
+                    outfile.write('\n')
+
+                for line in self.endPicCode():
+                    outfile.write(line)
+                    outfile.write('\n')
+            finally:
+                self.operations.truncate(mark)
+
+        if self.stats is not None:
+            self.stats.recordRun(self, time.time() - start, outfile.size)
+
+
+    def finishStream(self):
+        """
+        Complete all lifelines and write the finalizing pic operations
+        of a streaming diagram to its sink.
+
+        """
+        if self.streamState is None:
+            self.startStream()
+
+        for obj in self.objectList:
+            obj.complete()
 
+        self.flushSteps()
         for line in self.endPicCode():
-            outfile.write(line)
-            outfile.write('\n')
+            self.sink.write(line)
+            self.sink.write('\n')
+
+        self.streamState = 'finished'
 
 
-    def render(self, filenamePrefix, filetype='svg'):
+    def render(self, filenamePrefix, filetype='svg', engine='pic2plot', cache=None, timeout=None):
         """
         Render sequence diagram using call to pic2plot.
 
         Args:
         filenamePrefix -- output filename prefix string
         filetype -- output format, legal values are those supported by pic2plot
+        engine -- 'pic2plot' (default) or 'native'. The native engine
+                  writes SVG directly without generating pic or running
+                  pic2plot, and only supports the filetype 'svg'.
+        cache -- optional RenderCache instance. On a hit the cached
+                 output is reused and pic2plot is not run.
+        timeout -- optional number of seconds to allow pic2plot to run
         
         """
 
+        if engine == 'native':
+            self.renderNative(filenamePrefix, filetype)
+            return
+
+        if engine != 'pic2plot':
+            raise ValueError('Unknown render engine: {0}'.format(engine))
+
+        picFilename = self.writePic(filenamePrefix)
+        self.renderPicFile(picFilename, filetype, cache, timeout)
+
+    def renderPicFile(self, picFilename, filetype='svg', cache=None, timeout=None):
+        """
+        Run pic2plot on a pic file previously written by writePic,
+        consulting cache first if one is given.
+
+        Args:
+        picFilename -- pic file returned by writePic
+        filetype -- output format, legal values are those supported by pic2plot
+        cache -- optional RenderCache instance
+        timeout -- optional number of seconds to allow pic2plot to run
+
+        """
+        outfileName = os.path.splitext(picFilename)[0] + '.' + filetype
+        start = time.time()
+        cached = False
+
+        if cache is None:
+            runPic2plot(picFilename, outfileName, filetype, timeout)
+        else:
+            key = cache.key(picFilename, self.params, self.picPath, filetype)
+            cached = cache.fetch(key, outfileName)
+            if not cached:
+                runPic2plot(picFilename, outfileName, filetype, timeout)
+                cache.store(key, outfileName)
+
+        if self.stats is not None:
+            self.stats.recordRender(self, outfileName, time.time() - start,
+                                    os.path.getsize(outfileName), cached)
+
+    def renderFormats(self, filenamePrefix, filetypes=('svg', 'png', 'ps'), jobs=None, cache=None,
+                      timeout=None):
+        """
+        Render sequence diagram to several output formats, running
+        pic2plot once to a GNU metafile, filenamePrefix.meta, and
+        converting it to each format concurrently with plotutils' plot.
+
+        Args:
+        filenamePrefix -- output filename prefix string
+        filetypes -- output formats, legal values are those supported by plot
+        jobs -- maximum number of concurrent conversions (default: one per format)
+        cache -- optional RenderCache instance
+        timeout -- optional number of seconds to allow each of pic2plot and plot to run
+
+        Returns:
+        list of RenderResult instances, in the order of filetypes
+
+        """
+        return renderFormats(self, filenamePrefix, filetypes, jobs, cache, timeout)
+
+    def renderAsync(self, filenamePrefix, filetype='svg', cache=None, timeout=None, callback=None):
+        """
+        Render sequence diagram using pic2plot without blocking. The pic
+        file is written before returning; pic2plot runs on one of the
+        AsyncRender.renderSlots worker threads.
+
+        Args:
+        filenamePrefix -- output filename prefix string
+        filetype -- output format, legal values are those supported by pic2plot
+        cache -- optional RenderCache instance
+        timeout -- optional number of seconds to allow pic2plot to run
+        callback -- optional callable, called with the RenderResult once done
+
+        Returns:
+        RenderHandle for the render
+
+        """
+        return renderAsync(self, filenamePrefix, filetype, cache, timeout, callback)
+
+    def writePic(self, filenamePrefix):
+        """
+        Write the pic operations of the diagram into filenamePrefix.pic.
+
+        Args:
+        filenamePrefix -- output filename prefix string
+
+        Returns:
+        picFilename -- name of the written pic file
+
+        """
         picFilename = filenamePrefix + '.pic'
-        outfileName = filenamePrefix + '.' + filetype
-        
+
         with open(picFilename, 'w') as outfile:
             self.run(outfile)
 
-        cmdList = []
-        cmdList.append('pic2plot')
-        cmdList.append('-T{0}'.format(filetype))
-        cmdList.append(picFilename)
+        return picFilename
+
+    def save(self, filename):
+        """
+        Save the participants, operations and parameters of the diagram
+        in the binary diagram file format, so it can later be loaded and
+        rendered without building it again. Streaming diagrams cannot be
+        saved.
+
+        Args:
+        filename -- diagram file name
+
+        """
+        with open(filename, 'wb') as outfile:
+            writeDiagram(self, outfile)
+
+    @classmethod
+    def load(cls, filename, mmapped=True, stats=None):
+        """
+        Load a diagram saved by save().
+
+        Args:
+        filename -- diagram file name
+        mmapped -- if True (default), read the file through mmap
+        stats -- optional RenderStats instance for the loaded diagram
+
+        Returns:
+        the loaded diagram
+
+        """
+        return loadDiagram(cls(stats=stats), filename, mmapped)
 
-        p = subprocess.Popen(cmdList, stdout=subprocess.PIPE)
+    def renderNative(self, filenamePrefix, filetype='svg'):
+        """
+        Render sequence diagram to SVG with the built-in SvgRenderer,
+        bypassing pic2plot entirely.
 
-        with open(outfileName, 'w') as outfile:
-            outfile.write(p.stdout.read())
+        Args:
+        filenamePrefix -- output filename prefix string
+        filetype -- output format, only 'svg' is supported
 
-    def svg(self, filenamePrefix):
+        """
+        if filetype != 'svg':
+            raise ValueError('The native engine only renders svg, not {0}'.format(filetype))
+
+        start = time.time()
+        renderer = self.nativeRenderer()
+
+        outfileName = filenamePrefix + '.' + filetype
+        temporary = outfileName + '.tmp'
+        with open(temporary, 'w') as outfile:
+            renderer.write(outfile)
+        os.rename(temporary, outfileName)
+
+        if self.stats is not None:
+            self.stats.recordRender(self, outfileName, time.time() - start,
+                                    os.path.getsize(outfileName))
+
+    def nativeRenderer(self, skipRaw=False):
+        """
+        Interpret the operations of the diagram with a new SvgRenderer,
+        ready to be written.
+
+        Args:
+        skipRaw -- if True, raw pic operations the renderer cannot
+                   interpret are skipped instead of raising SyntaxError
+
+        """
+        if self.sink is not None:
+            raise ValueError('Streaming diagram does not keep its operations for rendering')
+
+        if self.strict:
+            self.validate()
+
+        with self.lock:
+            mark = self.operations.mark()
+            for obj in self.objectList:
+                obj.complete()
+
+            renderer = SvgRenderer(self.params)
+            try:
+                for code, args in self.declarations:
+                    renderer.feedOperation(code, args)
+                for code, args in self.operations:
+                    if code == RAW and skipRaw:
+                        try:
+                            renderer.feedOperation(code, args)
+                        except SyntaxError:
+                            pass
+                    else:
+                        renderer.feedOperation(code, args)
+            finally:
+                self.operations.truncate(mark)
+
+        return renderer
+
+    def ignoreInactive(self, obj):
+        """
+        Note an inactive() call on obj, which is not active, so that
+        validate() can report it.
+
+        """
+        with self.lock:
+            self.ignoredInactive.append((obj, len(self.operations)))
+
+    def problems(self):
+        """
+        Check the recorded operations for mistakes that would garble
+        the rendered diagram, such as messages to deleted objects,
+        unmatched frames or inactive() calls on inactive objects. The
+        check is a single pass over the operations.
+
+        Returns:
+        list of problem descriptions, empty if the diagram is valid
+
+        """
+        return findProblems(self)
+
+    def validate(self):
+        """
+        Check the recorded operations as problems() does, raising
+        ValidationError listing every problem found.
+
+        """
+        validateDiagram(self)
+
+    def layout(self):
+        """
+        Compute the lifeline positions and bounding box of the diagram
+        from its parameters and recorded operations, without rendering.
+        Raw pic operations that the native engine cannot interpret are
+        left out of the measurement.
+
+        Returns:
+        DiagramLayout, in pic inches
+
+        """
+        return layoutDiagram(self)
+
+    def autoSize(self, slack=0.25):
+        """
+        Set diagramWidth and diagramHeight to the computed size of the
+        diagram, so that it renders at full size the first time. Call
+        it once all operations are recorded. Raw pic operations that
+        the native engine cannot interpret are not measured, so leave
+        room for them in slack.
+
+        Args:
+        slack -- inches added to each dimension (default 0.25)
+
+        Returns:
+        DiagramLayout the sizes were computed from
+
+        """
+        return autoSizeDiagram(self, slack)
+
+    def renderTo(self, outfile, filetype='svg', engine='pic2plot', timeout=None):
+        """
+        Render sequence diagram into a writable file handle, without
+        writing any file. With pic2plot, the pic is piped to its
+        standard input and its output is copied to outfile in chunks as
+        it is produced.
+
+        Args:
+        outfile -- writable file handle, such as a socket file or sys.stdout
+        filetype -- output format, legal values are those supported by pic2plot
+        engine -- 'pic2plot' (default) or 'native'
+        timeout -- optional number of seconds to allow pic2plot to run
+
+        """
+        if engine not in ('pic2plot', 'native'):
+            raise ValueError('Unknown render engine: {0}'.format(engine))
+
+        if engine == 'native' and filetype != 'svg':
+            raise ValueError('The native engine only renders svg, not {0}'.format(filetype))
+
+        if self.sink is not None:
+            raise ValueError('Streaming diagram does not keep its operations for rendering')
+
+        if self.strict:
+            self.validate()
+
+        start = time.time()
+        if self.stats is not None:
+            outfile = CountingFile(outfile)
+
+        if engine == 'native':
+            self.nativeRenderer().write(outfile)
+        else:
+            streamPic2plot(self.run, outfile, filetype, timeout)
+
+        if self.stats is not None:
+            self.stats.recordRender(self, None, time.time() - start, outfile.size)
+
+    def renderBytes(self, filetype='svg', engine='pic2plot', timeout=None):
+        """
+        Render sequence diagram in memory, without writing any file.
+
+        Args:
+        filetype -- output format, legal values are those supported by pic2plot
+        engine -- 'pic2plot' (default) or 'native'
+        timeout -- optional number of seconds to allow pic2plot to run
+
+        Returns:
+        the rendered diagram as a string
+
+        """
+        outfile = StringIO()
+        self.renderTo(outfile, filetype, engine, timeout)
+        return outfile.getvalue()
+
+    def pages(self, pageHeight=None):
+        """
+        Split the diagram into pages. Each page re-declares all
+        lifelines and carries over the activation depth and sync state
+        of the page before it.
+
+        Args:
+        pageHeight -- height budget of a page in inches (default: the
+                      diagramHeight parameter less two object box heights)
+
+        Returns:
+        list of DiagramPage instances
+
+        """
+        if self.sink is not None:
+            raise ValueError('Streaming diagram does not keep its operations for pagination')
+
+        if pageHeight is None:
+            pageHeight = float(self.params.diagramHeight) - 2 * float(self.params.boxHeight)
+
+        with self.lock:
+            return paginate(self, pageHeight)
+
+    def renderPages(self, filenamePrefix, filetype='svg', pageHeight=None, jobs=None, cache=None):
+        """
+        Render the diagram as pages filenamePrefix-001, filenamePrefix-002,
+        ..., running pic2plot on the pages concurrently.
+
+        Args:
+        filenamePrefix -- output filename prefix string
+        filetype -- output format, legal values are those supported by pic2plot
+        pageHeight -- height budget of a page in inches, see pages()
+        jobs -- maximum number of concurrent pic2plot processes (default: number of CPUs)
+        cache -- optional RenderCache instance
+
+        Returns:
+        list of RenderResult instances, one per page
+
+        """
+        pages = self.pages(pageHeight)
+        pagePrefixes = ['{0}-{1:03d}'.format(filenamePrefix, number + 1) for number in range(len(pages))]
+        return renderMany(zip(pagePrefixes, pages), filetype, jobs, cache)
+
+    def svg(self, filenamePrefix, engine='pic2plot'):
         """
         Convenience method to render diagram in SVG format.
 
         Args:
         filenamePrefix -- string of prefix to use to generate output file
+        engine -- 'pic2plot' (default) or 'native'
         
         """
-        self.render(filenamePrefix, 'svg')
+        self.render(filenamePrefix, 'svg', engine)
 
     def gif(self, filenamePrefix):
         """
@@ -261,16 +857,16 @@ class SequenceDiagram:
         Args:
         n -- number of UMLGraph pic macro steps to make.
 
+        Consecutive steps are recorded as a single operation, emitted
+        as one move of n times the message spacing.
+
         Corresponding UMLGraph operation:
             step();
             
         
         """
-        count = 0;
-
-        while count < n:
-            self.transactions.append('step();')
-            count = count + 1
+        if n > 0:
+            self.addOperation(STEP, n)
             
         
     def async(self):
@@ -282,9 +878,10 @@ class SequenceDiagram:
             async();
         
         """
-        if self.drawSync:
-            self.transactions.append('async();')
-            self.drawSync = False
+        with self.lock:
+            if self.drawSync:
+                self.addOperation(ASYNC)
+                self.drawSync = False
                 
     def sync(self):
         """
@@ -294,9 +891,10 @@ class SequenceDiagram:
             sync();
 
         """
-        if not self.drawSync:
-            self.transactions.append('sync();')
-            self.drawSync = True
+        with self.lock:
+            if not self.drawSync:
+                self.addOperation(SYNC)
+                self.drawSync = True
 
     def oconstraint(self, label):
         """
@@ -310,10 +908,7 @@ class SequenceDiagram:
             oconstraint(label);
         
         """
-        template = 'oconstraint("{0}");'
-
-        buf = template.format(picEscapeString(label))
-        self.addTransaction(buf)
+        self.addOperation(OCONSTRAINT, label)
 
 
     def genPicName(self):
@@ -321,8 +916,9 @@ class SequenceDiagram:
         Generate a new pic name in form N_[0..n].
 
         """
-        name = 'N_{0}'.format(self.nameIndex)
-        self.nameIndex = self.nameIndex + 1
+        with self.lock:
+            name = 'N_{0}'.format(self.nameIndex)
+            self.nameIndex = self.nameIndex + 1
         return name
 
 
@@ -343,12 +939,7 @@ class SequenceDiagram:
             self.step(steps)
 
         name = self.genPicName()
-        template = 'begin_frame({0},{1},"{2}");'
-        buf = template.format(lobject.picName(),
-                              name,
-                              picEscapeString(label))
-
-        self.addTransaction(buf)
+        self.addOperation(BEGIN_FRAME, lobject, name, label)
 
         return name
 
@@ -367,11 +958,7 @@ class SequenceDiagram:
         if steps:
             self.step(steps)
 
-        template = 'end_frame({0},{1});'
-        buf = template.format(robject.picName(),
-                              name)
-
-        self.addTransaction(buf)
+        self.addOperation(END_FRAME, robject, name)
             
         
 
@@ -395,26 +982,7 @@ class SequenceDiagram:
         """
 
         name = self.genPicName()
-
-        bufList = []
-        bufList.append('comment(')
-        bufList.append(obj.picName())
-        bufList.append(',')
-        bufList.append(name)
-        bufList.append(',')
-        bufList.append(lineMovement)
-        bufList.append(',')
-        bufList.append(boxSize)
-        bufList.append(' ')
-
-        textList = text.splitlines()
-        for line in textList:
-            escapedLine = picEscapeString(line)
-            bufList.append('"{0}"'.format(escapedLine))
-
-        bufList.append(');')
-        
-        self.addTransaction(''.join(bufList))
+        self.addOperation(COMMENT, obj, name, lineMovement, boxSize, text)
 
         return name
 
@@ -429,17 +997,13 @@ class SequenceDiagram:
         
         """
         
-        template = 'connect_to_comment({0},{1});'
-        buf = template.format(obj.picName(),
-                              name)
-
-        self.addTransaction(buf)
+        self.addOperation(CONNECT_TO_COMMENT, obj, name)
         
         
          
     def pic(self, op):
         """
-        Add raw pic operation to transaction list. There is no syntax
+        Add raw pic operation to the operation list. There is no syntax
         checking of pic.
 
         Args:
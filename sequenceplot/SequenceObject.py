@@ -16,7 +16,7 @@
 # Author: Charles Y. Choi
 import sys
 
-from sequenceplot import picEscapeString
+from Operations import *
 
 class SequenceObject:
     """
@@ -46,9 +46,9 @@ class SequenceObject:
             active(object);
         
         """
-        self.activeCount = self.activeCount + 1
-        buf = 'active({0});'.format(self.picName())
-        self.parent.addTransaction(buf)
+        with self.parent.lock:
+            self.activeCount = self.activeCount + 1
+            self.parent.addOperation(ACTIVE, self)
 
         
     def inactive(self):
@@ -56,17 +56,21 @@ class SequenceObject:
         Changes the object's status to inactive, and changes its
         lifeline drawing style correspondingly. An inactive call on a
         nested object invocation will result in showing a simple
-        active swimlane.
+        active swimlane. An inactive call on an object that is not
+        active draws nothing, and is reported by
+        SequenceDiagram.validate().
         
         Corresponding UMLGraph operation:
             inactive(object);
 
         
         """
-        if self.activeCount > 0:
-            buf = 'inactive({0});'.format(self.picName())
-            self.parent.addTransaction(buf)
-            self.activeCount = self.activeCount - 1
+        with self.parent.lock:
+            if self.activeCount > 0:
+                self.parent.addOperation(INACTIVE, self)
+                self.activeCount = self.activeCount - 1
+            else:
+                self.parent.ignoreInactive(self)
 
     def delete(self):
         """
@@ -79,8 +83,7 @@ class SequenceObject:
 
         
         """
-        buf = 'delete({0});'.format(self.picName())
-        self.parent.addTransaction(buf)
+        self.parent.addOperation(DELETE, self)
         self.parent.objectList.remove(self)
 
         
@@ -94,13 +97,8 @@ class SequenceObject:
             create_message(from_object,to_object,object_label);
         
         """
-        target.label = targetLabel
-        template = 'cmessage({0},{1},"{2}");'
-        buf = template.format(self.picName(),
-                              target.picName(),
-                              picEscapeString(targetLabel))
-        
-        self.parent.addTransaction(buf)
+        self.parent.objectList.relabel(target, targetLabel)
+        self.parent.addOperation(CMESSAGE, self, target, targetLabel)
 
     def dmessage(self, target):
         """
@@ -113,12 +111,7 @@ class SequenceObject:
             destroy_message(from_object,to_object);
             
         """
-        template = 'dmessage({0},{1});'
-        
-        buf = template.format(self.picName(),
-                              target.picName())
-        
-        self.parent.addTransaction(buf)
+        self.parent.addOperation(DMESSAGE, self, target)
 
     def message(self, target, request):
         """
@@ -130,13 +123,7 @@ class SequenceObject:
             message(from_object,to_object,label)
         
         """
-        template = 'message({0},{1},"{2}");'
-        
-        buf = template.format(self.picName(),
-                              target.picName(),
-                              picEscapeString(request))
-        
-        self.parent.addTransaction(buf)
+        self.parent.addOperation(MESSAGE, self, target, request)
         
 
 
@@ -150,13 +137,7 @@ class SequenceObject:
             return_message(from_object,to_object,label)
         
         """
-        template = 'rmessage({0},{1},"{2}");'
-
-        buf = template.format(self.picName(),
-                              target.picName(),
-                              picEscapeString(response))
-
-        self.parent.addTransaction(buf)
+        self.parent.addOperation(RMESSAGE, self, target, response)
 
 
     def pushMethod(self, target, request, sync=True):
@@ -278,21 +259,26 @@ class SequenceObject:
             object(name, label);
         
         """
-        template = 'object({0},"{1}");'
+        self.parent.addOperation(OBJECT, self, self.label)
+
 
-        buf = template.format(self.picName(),
-                              picEscapeString(self.label))
+    def picIndex(self):
+        """
+        Returns the index assigned to this object by the diagram it
+        was added to.
 
-        self.parent.addTransaction(buf)
+        """
+        result = self.parent.objectIndex[self]
+        return result
 
 
     def picName(self):
         """
-        Generates UMLGraph pic name based on python id of the instance of
-        this object.
+        Returns the UMLGraph pic name assigned to this object by the
+        diagram it was added to.
         
         """
-        result = 'O_{0}'.format(id(self))
+        result = objectPicName(self.picIndex())
         return result
 
 
@@ -305,10 +291,7 @@ class SequenceObject:
             complete(name);
         
         """
-        template = 'complete({0});'
-                
-        buf = template.format(self.picName())
-        self.parent.addTransaction(buf)
+        self.parent.addOperation(COMPLETE, self)
 
 
     def lconstraint(self, label):
@@ -324,10 +307,7 @@ class SequenceObject:
             lconstraint(object,label);
         
         """
-        template = 'lconstraint({0},"{1}");'
-        buf = template.format(self.picName(),
-                              picEscapeString(label))
-        self.parent.addTransaction(buf)
+        self.parent.addOperation(LCONSTRAINT, self, label)
 
 
     def lconstraintBelow(self, label):
@@ -339,8 +319,5 @@ class SequenceObject:
         
         """
 
-        template = 'lconstraint_below({0},"{1}");'
-        buf = template.format(self.picName(),
-                              picEscapeString(label))
-        self.addTransaction(buf)
+        self.parent.addOperation(LCONSTRAINT_BELOW, self, label)
         
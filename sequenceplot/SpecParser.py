@@ -0,0 +1,409 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+"""
+Parser for a line oriented text format describing sequence diagrams.
+
+Each line holds one statement. Blank lines and lines starting with #
+are ignored. Participants are declared with
+
+    participant name[: label]
+    actor name[: label]
+    placeholder name
+
+or implicitly, as plain objects labeled with their name, the first
+time they are used. Messages are written as
+
+    a -> b: request        a.callMethod(b, 'request')
+    a ->> b: request       a.callMethod(b, 'request', requestSync=False)
+    a => b: request        a.pushMethod(b, 'request')
+    b --> a: response      a.popMethod(b, 'response')
+
+and the remaining statements are
+
+    message a b: text      a.message(b, 'text'), without stepping
+    return a b: text       a.rmessage(b, 'text'), without stepping
+    create a b: label      a.createInstance(b, 'label')
+    destroy a b            a.destroyInstance(b)
+    activate a             a.active()
+    deactivate a           a.inactive()
+    delete a               a.delete()
+    complete a             a.complete()
+    constraint a: text     a.lconstraint('text')
+    note a[, b...]: text   comment on a, connected to b...
+    frame a: label         begins a frame at a
+    end b                  ends the innermost open frame at b
+    step [n]               diagram.step(n)
+    sync / async           diagram.sync() / diagram.async()
+    param key value        diagram.setParam('key', value)
+
+Labels run to the end of the line; \\n in a label is a line break.
+Specs are parsed in a single pass, one line at a time, so large specs
+are parsed in time proportional to their size. Errors, including those
+raised while applying a statement to the diagram, are raised as
+SyntaxError naming the file and line.
+
+"""
+
+import re
+
+from sequenceplot import SyntaxError
+from SequenceObject import SequenceObject
+from Placeholder import Placeholder
+from Actor import Actor
+from SequenceDiagram import SequenceDiagram
+from PicParams import PicParams
+
+namePattern = r'[A-Za-z_][\w.]*'
+
+messagePattern = re.compile(r'({0})\s*(->>|-->|->|=>)\s*({0})\s*(?::\s?(.*))?$'.format(namePattern))
+statementPattern = re.compile(r'(\w+)(?:\s+(.*?))?\s*$')
+pairPattern = re.compile(r'({0})\s+({0})(?:\s*:\s?(.*))?$'.format(namePattern))
+targetPattern = re.compile(r'({0}(?:\s*,\s*{0})*)\s*(?::\s?(.*))?$'.format(namePattern))
+
+
+def unescapeLabel(text):
+    """
+    Return text with each \\n replaced by a line break.
+
+    """
+    if text is None:
+        return ''
+    if '\\' in text:
+        text = text.replace('\\n', '\n')
+    return text
+
+
+class SpecParser:
+    """
+    Builds a SequenceDiagram from spec lines.
+
+    Attributes:
+    diagram -- SequenceDiagram being built
+    filename -- name used in error messages
+    participants -- dictionary mapping participant names to sequence objects
+    frames -- stack of (pic name, line number) of the open frames
+    lineNumber -- number of the last line parsed
+
+    """
+    def __init__(self, diagram=None, filename='<spec>'):
+        """
+        Constructor for a parser.
+
+        Args:
+        diagram -- SequenceDiagram to add to; a new diagram if None
+        filename -- name used in error messages
+
+        """
+        if diagram is None:
+            diagram = SequenceDiagram()
+        self.diagram = diagram
+        self.filename = filename
+        self.participants = {}
+        self.frames = []
+        self.lineNumber = 0
+
+        self.statements = {
+            'participant': self.declareObject,
+            'actor': self.declareActor,
+            'placeholder': self.declarePlaceholder,
+            'message': self.message,
+            'return': self.returnMessage,
+            'create': self.create,
+            'destroy': self.destroy,
+            'activate': self.activate,
+            'deactivate': self.deactivate,
+            'delete': self.delete,
+            'complete': self.complete,
+            'constraint': self.constraint,
+            'note': self.note,
+            'frame': self.beginFrame,
+            'end': self.endFrame,
+            'step': self.step,
+            'sync': self.sync,
+            'async': self.async,
+            'param': self.param,
+            }
+
+        self.arrows = {
+            '->': self.call,
+            '->>': self.asyncCall,
+            '=>': self.push,
+            '-->': self.pop,
+            }
+
+    def error(self, message, lineNumber=None):
+        """
+        Return a SyntaxError for message at lineNumber, by default the
+        line being parsed.
+
+        """
+        if lineNumber is None:
+            lineNumber = self.lineNumber
+        return SyntaxError('{0}, line {1}: {2}'.format(self.filename, lineNumber, message))
+
+    def participant(self, name):
+        """
+        Return the sequence object for name, adding it to the diagram
+        if it has not been seen before.
+
+        """
+        try:
+            return self.participants[name]
+        except KeyError:
+            return self.declare(SequenceObject(name), name)
+
+    def declare(self, obj, name):
+        if name in self.participants:
+            raise self.error('participant {0!r} is already declared'.format(name))
+        self.diagram.add(obj)
+        self.participants[name] = obj
+        return obj
+
+    def target(self, text, count=1, labeled=False):
+        """
+        Split statement arguments into count participant names and an
+        optional label, returning the participants followed by the label.
+
+        """
+        match = targetPattern.match(text or '')
+        if match is None:
+            raise self.error('expected a participant name, got {0!r}'.format(text))
+
+        names = [name.strip() for name in match.group(1).split(',')]
+        label = match.group(2)
+        if count is not None and len(names) != count:
+            raise self.error('expected {0} participant name(s), got {1}'.format(count, len(names)))
+        if label is not None and not labeled:
+            raise self.error('unexpected label {0!r}'.format(label))
+
+        return [self.participant(name) for name in names] + [unescapeLabel(label)]
+
+    def feed(self, line):
+        """
+        Parse a single spec line.
+
+        """
+        self.lineNumber = self.lineNumber + 1
+        line = line.strip()
+
+        if not line or line[0] == '#':
+            return
+
+        try:
+            self.dispatch(line)
+        except (ValueError, KeyError) as e:
+            raise self.error('{0}: {1}'.format(e.__class__.__name__, e))
+
+    def dispatch(self, line):
+        """
+        Apply a stripped, non-comment spec line to the diagram.
+
+        """
+        match = messagePattern.match(line)
+        if match is not None:
+            source, arrow, target, label = match.groups()
+            self.arrows[arrow](self.participant(source), self.participant(target), unescapeLabel(label))
+            return
+
+        match = statementPattern.match(line)
+        if match is None or match.group(1) not in self.statements:
+            raise self.error('unknown statement {0!r}'.format(line))
+
+        keyword, arguments = match.groups()
+        self.statements[keyword](arguments)
+
+    def feedAll(self, lines):
+        """
+        Parse every line of an iterable of spec lines.
+
+        """
+        for line in lines:
+            self.feed(line)
+
+    def close(self):
+        """
+        Finish parsing, checking that every frame was ended.
+
+        Returns:
+        the diagram built
+
+        """
+        if self.frames:
+            raise self.error('frame is never ended', self.frames[-1][1])
+        return self.diagram
+
+    def call(self, source, target, label):
+        source.callMethod(target, label)
+
+    def asyncCall(self, source, target, label):
+        source.callMethod(target, label, requestSync=False)
+
+    def push(self, source, target, label):
+        source.pushMethod(target, label)
+
+    def pop(self, source, target, label):
+        target.popMethod(source, label)
+
+    def declareObject(self, arguments):
+        self.declareWith(SequenceObject, arguments)
+
+    def declareActor(self, arguments):
+        self.declareWith(Actor, arguments)
+
+    def declareWith(self, objectClass, arguments):
+        match = targetPattern.match(arguments or '')
+        if match is None or ',' in match.group(1):
+            raise self.error('expected a participant name, got {0!r}'.format(arguments))
+        name, label = match.groups()
+        if label is None:
+            label = name
+        self.declare(objectClass(unescapeLabel(label)), name)
+
+    def declarePlaceholder(self, arguments):
+        match = targetPattern.match(arguments or '')
+        if match is None or ',' in match.group(1) or match.group(2) is not None:
+            raise self.error('expected a participant name, got {0!r}'.format(arguments))
+        self.declare(Placeholder(), match.group(1))
+
+    def pair(self, arguments, usage):
+        match = pairPattern.match(arguments or '')
+        if match is None or match.group(3) is None:
+            raise self.error('expected "{0}"'.format(usage))
+        source, target, label = match.groups()
+        return self.participant(source), self.participant(target), unescapeLabel(label)
+
+    def message(self, arguments):
+        source, target, label = self.pair(arguments, 'message source target: label')
+        source.message(target, label)
+
+    def returnMessage(self, arguments):
+        source, target, label = self.pair(arguments, 'return source target: label')
+        source.rmessage(target, label)
+
+    def create(self, arguments):
+        source, target, label = self.pair(arguments, 'create source target: label')
+        source.createInstance(target, label)
+
+    def destroy(self, arguments):
+        match = pairPattern.match(arguments or '')
+        if match is None or match.group(3) is not None:
+            raise self.error('expected "destroy source target"')
+        source, target = match.group(1, 2)
+        self.participant(source).destroyInstance(self.participant(target))
+
+    def activate(self, arguments):
+        self.target(arguments)[0].active()
+
+    def deactivate(self, arguments):
+        self.target(arguments)[0].inactive()
+
+    def delete(self, arguments):
+        self.target(arguments)[0].delete()
+
+    def complete(self, arguments):
+        self.target(arguments)[0].complete()
+
+    def constraint(self, arguments):
+        obj, label = self.target(arguments, labeled=True)
+        obj.lconstraint(label)
+
+    def note(self, arguments):
+        targets = self.target(arguments, None, labeled=True)
+        label = targets.pop()
+        name = self.diagram.comment(targets[0], label)
+        for obj in targets[1:]:
+            self.diagram.connectToComment(obj, name)
+
+    def beginFrame(self, arguments):
+        obj, label = self.target(arguments, labeled=True)
+        self.frames.append((self.diagram.beginFrame(obj, label), self.lineNumber))
+
+    def endFrame(self, arguments):
+        obj = self.target(arguments)[0]
+        if not self.frames:
+            raise self.error('end without an open frame')
+        self.diagram.endFrame(obj, self.frames.pop()[0])
+
+    def step(self, arguments):
+        if arguments is None:
+            self.diagram.step(1)
+        elif arguments.isdigit():
+            self.diagram.step(int(arguments))
+        else:
+            raise self.error('expected a step count, got {0!r}'.format(arguments))
+
+    def sync(self, arguments):
+        if arguments is not None:
+            raise self.error('sync takes no arguments')
+        self.diagram.sync()
+
+    def async(self, arguments):
+        if arguments is not None:
+            raise self.error('async takes no arguments')
+        self.diagram.async()
+
+    def param(self, arguments):
+        words = (arguments or '').split()
+        if len(words) != 2 or words[0] not in PicParams.paramAttributes:
+            raise self.error('expected "param key value" with key one of {0}'.format(
+                ', '.join(sorted(PicParams.paramAttributes.keys()))))
+        try:
+            value = int(words[1])
+        except ValueError:
+            try:
+                value = float(words[1])
+            except ValueError:
+                raise self.error('parameter value must be a number, got {0!r}'.format(words[1]))
+        self.diagram.setParam(words[0], value)
+
+
+def parseSpec(lines, diagram=None, filename='<spec>'):
+    """
+    Build a diagram from spec text.
+
+    Args:
+    lines -- string, or iterable of lines, of spec text
+    diagram -- SequenceDiagram to add to; a new diagram if None
+    filename -- name used in error messages
+
+    Returns:
+    the diagram built
+
+    """
+    if isinstance(lines, basestring):
+        lines = lines.splitlines()
+
+    parser = SpecParser(diagram, filename)
+    parser.feedAll(lines)
+    return parser.close()
+
+
+def loadSpec(filename, diagram=None):
+    """
+    Build a diagram from a spec file, reading it one line at a time.
+
+    Args:
+    filename -- spec file name
+    diagram -- SequenceDiagram to add to; a new diagram if None
+
+    Returns:
+    the diagram built
+
+    """
+    with open(filename, 'rb') as infile:
+        return parseSpec(infile, diagram, filename)
@@ -0,0 +1,844 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+import re
+from xml.sax.saxutils import escape
+
+from sequenceplot import SyntaxError, picUnescapeString
+from Operations import *
+
+operationPattern = re.compile(r'^\s*(\w+)\s*\((.*)\)\s*;?\s*$', re.S)
+stringPattern = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+CREATE_LABEL = '&#171;create&#187;'
+DESTROY_LABEL = '&#171;destroy&#187;'
+
+macroCodes = {
+    'object': OBJECT,
+    'actor': ACTOR,
+    'pobject': PLACEHOLDER,
+    'placeholder_object': PLACEHOLDER,
+    'message': MESSAGE,
+    'rmessage': RMESSAGE,
+    'return_message': RMESSAGE,
+    'cmessage': CMESSAGE,
+    'create_message': CMESSAGE,
+    'dmessage': DMESSAGE,
+    'destroy_message': DMESSAGE,
+    'delete': DELETE,
+    'complete': COMPLETE,
+    'active': ACTIVE,
+    'inactive': INACTIVE,
+    'step': STEP,
+    'async': ASYNC,
+    'sync': SYNC,
+    'oconstraint': OCONSTRAINT,
+    'object_constraint': OCONSTRAINT,
+    'lconstraint': LCONSTRAINT,
+    'lifeline_constraint': LCONSTRAINT,
+    'lconstraint_below': LCONSTRAINT_BELOW,
+    'begin_frame': BEGIN_FRAME,
+    'end_frame': END_FRAME,
+    'comment': COMMENT,
+    'connect_to_comment': CONNECT_TO_COMMENT,
+    }
+
+
+def splitPicArguments(buf):
+    """
+    Split the argument list of a pic macro call on top level commas,
+    ignoring commas inside quoted strings or parentheses.
+
+    Args:
+    buf -- text between the outer parentheses of the macro call
+
+    """
+    result = []
+    current = []
+    quoted = False
+    depth = 0
+    index = 0
+    length = len(buf)
+
+    while index < length:
+        c = buf[index]
+        if quoted:
+            current.append(c)
+            if c == '\\' and index + 1 < length:
+                current.append(buf[index + 1])
+                index = index + 1
+            elif c == '"':
+                quoted = False
+        elif c == '"':
+            quoted = True
+            current.append(c)
+        elif c == '(':
+            depth = depth + 1
+            current.append(c)
+        elif c == ')':
+            depth = depth - 1
+            current.append(c)
+        elif c == ',' and depth == 0:
+            result.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(c)
+        index = index + 1
+
+    result.append(''.join(current).strip())
+    return result
+
+
+def parsePicOperation(buf):
+    """
+    Parse a single pic macro call such as 'message(A,B,"label");'.
+
+    Returns:
+    (macro name, list of argument strings)
+
+    """
+    match = operationPattern.match(buf)
+    if match is None:
+        raise SyntaxError('native engine cannot interpret pic operation: {0}'.format(buf))
+
+    if not match.group(2).strip():
+        return match.group(1), []
+
+    return match.group(1), splitPicArguments(match.group(2))
+
+
+def picStrings(arg):
+    """
+    Return the unescaped quoted strings contained in a pic argument.
+
+    """
+    return [picUnescapeString(s) for s in stringPattern.findall(arg)]
+
+
+def picAttributes(arg):
+    """
+    Return the unquoted words contained in a pic argument.
+
+    """
+    return stringPattern.sub(' ', arg).split()
+
+
+class Lifeline:
+    """
+    Layout state of a single object, mirroring the variables the
+    sequence.pic macros keep for it (active_<name>, lifestart_<name>).
+
+    """
+    def __init__(self, x, south, east):
+        self.x = x
+        self.south = south
+        self.east = east
+        self.active = 0
+        self.lifestart = south
+
+
+class SvgRenderer:
+    """
+    Native renderer that interprets the UMLGraph sequence.pic operations
+    recorded by SequenceObject and SequenceDiagram and writes SVG directly,
+    without running pic2plot.
+
+    Geometry follows the macro definitions in sequence.pic. All
+    coordinates are kept in pic inches with y growing upwards and are
+    converted to SVG points when the document is written.
+
+    """
+
+    scale = 72.0
+    fontSize = 0.125
+    textHeight = 0.15
+    margin = 0.1
+    lineWidth = 0.5
+    lineHeight = 0.5
+    arrowHeight = 0.1
+    cornerFold = 0.1
+    commentWidth = 1.0
+    commentHeight = 0.5
+    commentMove = 'up 0.25 right 0.25'
+
+    def __init__(self, params):
+        """
+        Constructor for the renderer.
+
+        Args:
+        params -- PicParams instance of the diagram being rendered
+
+        """
+        self.boxwid = float(params.boxWidth)
+        self.boxht = float(params.boxHeight)
+        self.awid = float(params.activeWidth)
+        self.spacing = float(params.messageSpacing)
+        self.movewid = float(params.objectSpacing)
+        self.dashwid = float(params.dashInterval)
+        self.maxWidth = float(params.diagramWidth)
+        self.maxHeight = float(params.diagramHeight)
+        self.underline = float(params.underline)
+
+        self.hereX = 0.0
+        self.hereY = 0.0
+        self.direction = 'right'
+        self.arrowFilled = True
+        self.arrowWidth = 0.05
+        self.lifelines = {}
+        self.boxes = {}
+        self.lastBox = None
+        self.elements = []
+        self.bounds = None
+
+        # pic point mapped to the SVG origin
+        self.originX = 0.0
+        self.originY = 0.0
+
+        # indexed by opcode
+        self.handlers = [
+            self.object,
+            self.actor,
+            self.placeholderObject,
+            self.message,
+            self.returnMessage,
+            self.createMessage,
+            self.destroyMessage,
+            self.delete,
+            self.complete,
+            self.active,
+            self.inactive,
+            self.step,
+            self.async,
+            self.sync,
+            self.objectConstraint,
+            self.lifelineConstraint,
+            self.lifelineConstraintBelow,
+            self.beginFrame,
+            self.endFrame,
+            self.comment,
+            self.connectToComment,
+            self.feed,
+            ]
+
+
+    def feedOperation(self, code, args):
+        """
+        Interpret a single operation of a SequenceDiagram's OperationList.
+
+        Args:
+        code -- opcode
+        args -- decoded arguments of the operation
+
+        """
+        values = []
+
+        for kind, arg in zip(operationKinds[code], args):
+            if kind == 'o':
+                values.append(objectPicName(arg))
+            elif kind == 'q':
+                values.append([escape(arg)])
+            elif kind == 't':
+                values.append([escape(line) for line in arg.splitlines()])
+            else:
+                values.append(arg)
+
+        self.handlers[code](*values)
+
+
+    def feed(self, operation):
+        """
+        Interpret a single pic operation.
+
+        Args:
+        operation -- pic operation string, such as a raw operation added
+                     with SequenceDiagram.pic()
+
+        """
+        name, args = parsePicOperation(operation)
+        code = macroCodes.get(name)
+
+        if code == STEP and not args:
+            args = ['1']
+
+        if code is None or len(args) != len(operationKinds[code]) - (code == COMMENT):
+            raise SyntaxError('native engine cannot interpret pic operation: {0}'.format(operation))
+
+        if code == COMMENT:
+            # box size and text share the last argument
+            text = args.pop()
+            args.append(' '.join(picAttributes(text)))
+            args.append(text)
+
+        values = []
+        for kind, arg in zip(operationKinds[code], args):
+            if kind in 'qt':
+                values.append(self.label(arg))
+            elif kind == 'n':
+                values.append(int(arg))
+            else:
+                values.append(arg)
+
+        self.handlers[code](*values)
+
+
+    def write(self, outfile):
+        """
+        Write the interpreted diagram as an SVG document.
+
+        Args:
+        outfile -- output file handle
+
+        """
+        if self.bounds is None:
+            self.bounds = [0.0, 0.0, 0.0, 0.0]
+
+        self.originX = self.bounds[0] - self.margin
+        self.originY = self.bounds[3] + self.margin
+        self.writeHeader(outfile)
+
+        for element in self.elements:
+            outfile.write(self.svgElement(element))
+            outfile.write('\n')
+
+        self.writeFooter(outfile)
+
+
+    def writeHeader(self, outfile):
+        """
+        Write the start of an SVG document sized to the current bounds.
+
+        """
+        minX, minY, maxX, maxY = self.bounds or [0.0, 0.0, 0.0, 0.0]
+        width = (maxX - minX + 2 * self.margin) * self.scale
+        height = (maxY - minY + 2 * self.margin) * self.scale
+
+        # pic2plot shrinks pictures exceeding maxpswid/maxpsht; do the same.
+        factor = min(1.0,
+                     self.maxWidth * self.scale / width,
+                     self.maxHeight * self.scale / height)
+
+        outfile.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        outfile.write('<svg xmlns="http://www.w3.org/2000/svg" version="1.1" '
+                      'width="{0:.2f}pt" height="{1:.2f}pt" '
+                      'viewBox="0 0 {2:.2f} {3:.2f}">\n'.format(width * factor,
+                                                              height * factor,
+                                                              width,
+                                                              height))
+        outfile.write('<g stroke="black" stroke-width="{0:.2f}" fill="none" '
+                      'font-family="Helvetica,Arial,sans-serif" '
+                      'font-size="{1:.2f}">\n'.format(0.01 * self.scale,
+                                                      self.fontSize * self.scale))
+
+
+    def writeFooter(self, outfile):
+        outfile.write('</g>\n')
+        outfile.write('</svg>\n')
+
+
+    def svgPoint(self, point):
+        x = (point[0] - self.originX) * self.scale
+        y = (self.originY - point[1]) * self.scale
+        return x, y
+
+
+    def svgElement(self, element):
+        kind = element[0]
+
+        if kind == 'line':
+            points = ' '.join(['{0:.2f},{1:.2f}'.format(*self.svgPoint(p)) for p in element[1]])
+            if element[2]:
+                return ('<polyline points="{0}" stroke-dasharray="{1:.2f}"/>'
+                        .format(points, self.dashwid * self.scale))
+            return '<polyline points="{0}"/>'.format(points)
+
+        if kind == 'polygon':
+            points = ' '.join(['{0:.2f},{1:.2f}'.format(*self.svgPoint(p)) for p in element[1]])
+            return '<polygon points="{0}" fill="black"/>'.format(points)
+
+        if kind == 'rect':
+            x0, y0 = self.svgPoint((element[1], element[4]))
+            x1, y1 = self.svgPoint((element[3], element[2]))
+            return ('<rect x="{0:.2f}" y="{1:.2f}" width="{2:.2f}" height="{3:.2f}"/>'
+                    .format(x0, y0, x1 - x0, y1 - y0))
+
+        if kind == 'circle':
+            x, y = self.svgPoint((element[1], element[2]))
+            return ('<circle cx="{0:.2f}" cy="{1:.2f}" r="{2:.2f}"/>'
+                    .format(x, y, element[3] * self.scale))
+
+        # text
+        x, y = self.svgPoint((element[1], element[2]))
+        return ('<text x="{0:.2f}" y="{1:.2f}" text-anchor="{2}" stroke="none" '
+                'fill="black" dominant-baseline="central">{3}</text>'
+                .format(x, y, element[3], element[4]))
+
+
+    def extend(self, x0, y0, x1=None, y1=None):
+        if x1 is None:
+            x1, y1 = x0, y0
+
+        if self.bounds is None:
+            self.bounds = [min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)]
+        else:
+            self.bounds[0] = min(self.bounds[0], x0, x1)
+            self.bounds[1] = min(self.bounds[1], y0, y1)
+            self.bounds[2] = max(self.bounds[2], x0, x1)
+            self.bounds[3] = max(self.bounds[3], y0, y1)
+
+
+    def line(self, points, dashed=False):
+        for x, y in points:
+            self.extend(x, y)
+        self.elements.append(('line', points, dashed))
+
+
+    def rect(self, x0, y0, x1, y1):
+        self.extend(x0, y0, x1, y1)
+        self.elements.append(('rect', x0, y0, x1, y1))
+
+
+    def arrow(self, points, dashed=False):
+        """
+        Draw a polyline with an arrowhead at its last point, filled for
+        synchronous and open for asynchronous messages.
+
+        """
+        self.line(points, dashed)
+
+        (x0, y0), (x1, y1) = points[-2], points[-1]
+        length = ((x1 - x0) ** 2 + (y1 - y0) ** 2) ** 0.5
+        if length == 0:
+            return
+
+        ux, uy = (x1 - x0) / length, (y1 - y0) / length
+        bx, by = x1 - ux * self.arrowHeight, y1 - uy * self.arrowHeight
+        half = self.arrowWidth / 2
+        left = (bx - uy * half, by + ux * half)
+        right = (bx + uy * half, by - ux * half)
+
+        if self.arrowFilled:
+            self.elements.append(('polygon', [left, (x1, y1), right]))
+        else:
+            self.elements.append(('line', [left, (x1, y1), right], False))
+
+
+    def text(self, x, y, lines, justify='center'):
+        """
+        Place text lines centered vertically on (x, y) the way pic
+        stacks the strings attached to an object.
+
+        Args:
+        lines -- list of (already escaped) text lines, empty strings allowed
+        justify -- 'center', 'ljust' or 'rjust'
+
+        """
+        anchor = {'center': 'middle', 'ljust': 'start', 'rjust': 'end'}[justify]
+        top = y + (len(lines) - 1) * self.textHeight / 2
+
+        for index, buf in enumerate(lines):
+            if not buf:
+                continue
+            ty = top - index * self.textHeight
+            width = len(buf) * self.fontSize * 0.6
+            if justify == 'center':
+                self.extend(x - width / 2, ty, x + width / 2, ty)
+            elif justify == 'ljust':
+                self.extend(x, ty, x + width, ty)
+            else:
+                self.extend(x - width, ty, x, ty)
+            self.elements.append(('text', x, ty, anchor, buf))
+
+
+    def label(self, arg):
+        return [escape(s) for s in picStrings(arg)]
+
+
+    def lifeline(self, name):
+        try:
+            return self.lifelines[name]
+        except KeyError:
+            raise SyntaxError('native engine found reference to undeclared object: {0}'.format(name))
+
+
+    def placeBox(self, name, width, height, invisible, labels):
+        """
+        Place a box at the current position in the current direction
+        and register it as a lifeline.
+
+        """
+        if self.direction == 'right':
+            cx, cy = self.hereX + width / 2, self.hereY
+        else:
+            cx, cy = self.hereX, self.hereY - height / 2
+
+        x0, y0, x1, y1 = cx - width / 2, cy - height / 2, cx + width / 2, cy + height / 2
+
+        if invisible:
+            self.extend(x0, y0, x1, y1)
+        else:
+            self.rect(x0, y0, x1, y1)
+        self.lastBox = (x0, y0, x1, y1)
+
+        if labels:
+            self.text(cx, cy, labels)
+
+        self.lifelines[name] = Lifeline(cx, y0, x1)
+        self.hereX, self.hereY = x1 + self.movewid, cy
+        return x0, y0, x1, y1
+
+
+    def object(self, name, labels):
+        x0, y0, x1, y1 = self.placeBox(name, self.boxwid, self.boxht, False, labels)
+
+        if self.underline:
+            cy = (y0 + y1) / 2
+            self.line([(x0 + .1, cy - .07), (x1 - .1, cy - .07)])
+
+
+    def placeholderObject(self, name):
+        self.placeBox(name, self.boxwid, self.boxht, True, [])
+
+
+    def actor(self, name, labels):
+        # Block of stick figure parts, as laid out by the actor macro.
+        # The invisible text line at the top of the head makes it .5 wide.
+        width, height = 0.5, 0.39
+
+        if self.direction == 'right':
+            cx, cy = self.hereX + width / 2, self.hereY
+        else:
+            cx, cy = self.hereX, self.hereY - height / 2
+
+        headY = cy + height / 2 - .06
+        neckY = headY - .06
+        hipY = neckY - .12
+        self.extend(cx - width / 2, cy - height / 2, cx + width / 2, cy + height / 2)
+        self.elements.append(('circle', cx, headY, .06))
+        self.line([(cx, neckY), (cx, hipY)])
+        self.line([(cx - .15, neckY - .02), (cx + .15, neckY - .02)])
+        self.line([(cx - .08, hipY - .15), (cx, hipY), (cx + .08, hipY - .15)])
+        self.text(cx, cy - height / 2 - self.textHeight / 2, labels)
+
+        lifeline = Lifeline(cx, cy - height / 2 - .05, cx + width / 2)
+        self.lifelines[name] = lifeline
+        self.hereX, self.hereY = cx + width / 2 + self.movewid, cy
+
+
+    def moveDown(self, distance):
+        self.direction = 'down'
+        self.hereY = self.hereY - distance
+
+
+    def height(self, code, args=()):
+        return operationHeight(code, args, self.spacing, self.boxht)
+
+
+    def extendLifeline(self, lifeline):
+        y = self.hereY
+
+        if lifeline.active > 0:
+            left = lifeline.x - self.awid / 2
+            for level in range(lifeline.active):
+                x = left + level * self.awid / 2
+                self.line([(x, lifeline.lifestart), (x, y)])
+            x = left + (lifeline.active + 1) * self.awid / 2
+            self.line([(x, lifeline.lifestart), (x, y)])
+        else:
+            self.line([(lifeline.x, lifeline.lifestart), (lifeline.x, y)], True)
+
+        lifeline.lifestart = y
+
+
+    def messageOffsets(self, source, target, toOffset):
+        if source.x <= target.x:
+            offFrom, offTo = self.awid * .6, -toOffset
+        else:
+            offFrom, offTo = -self.awid * .6, toOffset
+
+        # add half a box width for each level of nesting
+        if source.active > 1:
+            offFrom = offFrom + (source.active - 1) * self.awid / 2
+
+        return offFrom, offTo
+
+
+    def message(self, source, target, labels, dashed=False):
+        self.moveDown(self.height(RMESSAGE))
+        source = self.lifeline(source)
+        target = self.lifeline(target)
+        offFrom, offTo = self.messageOffsets(source, target, self.awid * .6)
+
+        if target.active > 1:
+            offTo = offTo + (target.active - 1) * self.awid / 2
+
+        y = self.hereY
+        x0 = source.x + offFrom
+
+        if source is target and not dashed:
+            x1, y1 = x0 + self.lineWidth, y - selfMessageHeight
+            self.arrow([(x0, y), (x1, y), (x1, y1), (x0, y1)])
+            self.text(x0 + self.lineWidth / 2, y - .125, labels + ['', '', ''], 'ljust')
+            self.hereX, self.hereY = x0, y1
+        else:
+            x1 = target.x + offTo
+            self.arrow([(x0, y), (x1, y)], dashed)
+            self.text((x0 + x1) / 2, y, labels + [''])
+            self.hereX = x1
+
+
+    def returnMessage(self, source, target, labels):
+        self.message(source, target, labels, True)
+
+
+    def createMessage(self, source, target, labels):
+        self.moveDown(self.spacing)
+        source = self.lifeline(source)
+        target = self.lifeline(target)
+        offFrom, offTo = self.messageOffsets(source, target, self.boxwid * .51)
+
+        y = self.hereY
+        x0, x1 = source.x + offFrom, target.x + offTo
+        self.arrow([(x0, y), (x1, y)])
+        self.text((x0 + x1) / 2, y, [CREATE_LABEL, ''])
+
+        if source.x <= target.x:
+            bx0 = x1
+        else:
+            bx0 = x1 - self.boxwid
+        box = (bx0, y - self.boxht / 2, bx0 + self.boxwid, y + self.boxht / 2)
+        self.rect(*box)
+        self.text(bx0 + self.boxwid / 2, y, labels)
+        self.line([(box[0] + .1, y - .07), (box[2] - .1, y - .07)])
+        self.lastBox = box
+
+        target.lifestart = box[1]
+        self.hereX = x1
+        self.moveDown(self.height(CMESSAGE) - self.spacing)
+
+
+    def drawX(self, lifeline):
+        x, y, d = lifeline.x, lifeline.lifestart, self.awid
+        self.line([(x - d, y - d), (x + d, y + d)])
+        self.line([(x - d, y + d), (x + d, y - d)])
+
+
+    def destroyMessage(self, source, target):
+        self.moveDown(self.height(DMESSAGE) - self.spacing)
+        self.message(source, target, [DESTROY_LABEL])
+        self.complete(target)
+        self.drawX(self.lifeline(target))
+
+
+    def delete(self, name):
+        self.complete(name)
+        lifeline = self.lifeline(name)
+        lifeline.lifestart = lifeline.lifestart - self.awid
+        self.drawX(lifeline)
+
+
+    def complete(self, name):
+        lifeline = self.lifeline(name)
+        self.extendLifeline(lifeline)
+
+        if lifeline.active:
+            # draw bottom of all active boxes
+            x = lifeline.x - self.awid / 2
+            self.line([(x, self.hereY), (x + (lifeline.active + 1) * self.awid / 2, self.hereY)])
+
+
+    def active(self, name):
+        lifeline = self.lifeline(name)
+        self.extendLifeline(lifeline)
+        # draw top of new active box
+        x = lifeline.x + (lifeline.active - 1) * self.awid / 2
+        self.line([(x, self.hereY), (x + self.awid, self.hereY)])
+        lifeline.active = lifeline.active + 1
+
+
+    def inactive(self, name):
+        lifeline = self.lifeline(name)
+        self.extendLifeline(lifeline)
+        lifeline.active = lifeline.active - 1
+        # draw bottom of innermost active box
+        x = lifeline.x + (lifeline.active - 1) * self.awid / 2
+        self.line([(x, self.hereY), (x + self.awid, self.hereY)])
+
+
+    def step(self, count):
+        self.moveDown(self.height(STEP, (count,)))
+
+
+    def async(self):
+        self.arrowFilled = False
+        self.arrowWidth = self.arrowWidth * 2
+
+
+    def sync(self):
+        self.arrowFilled = True
+        self.arrowWidth = self.arrowWidth / 2
+
+
+    def objectConstraint(self, labels):
+        if self.lastBox is None:
+            return
+        x0, y0, x1, y1 = self.lastBox
+        self.text(x0, y1 + self.boxht / 2, labels, 'ljust')
+
+
+    def lifelineConstraint(self, name, labels, below=False):
+        lifeline = self.lifeline(name)
+        offFrom = self.awid
+        # add half a box width for each level of nesting
+        if lifeline.active > 1:
+            offFrom = offFrom + (lifeline.active - 1) * self.awid / 2
+
+        x, y = lifeline.x + offFrom, self.hereY
+        if below:
+            self.text(x, y, [''] + labels, 'ljust')
+        else:
+            self.text(x, y, labels + [''], 'ljust')
+
+        self.lastBox = (x - self.boxwid / 2, y - self.boxht / 2, x + self.boxwid / 2, y + self.boxht / 2)
+        if self.direction == 'down':
+            self.hereY = y - self.height(LCONSTRAINT)
+        else:
+            self.hereX = x + self.boxwid / 2
+
+
+    def lifelineConstraintBelow(self, name, labels):
+        self.lifelineConstraint(name, labels, True)
+
+
+    def beginFrame(self, name, frameName, labels):
+        lifeline = self.lifeline(name)
+        # The lifeline will be cut here
+        self.extendLifeline(lifeline)
+
+        x, y = lifeline.x, self.hereY
+        box = (x - self.boxwid / 2, y - self.height(BEGIN_FRAME), x + self.boxwid / 2, y)
+        self.extend(*box)
+        self.text(x, y - self.boxht / 2, labels)
+        d = self.boxht / 2
+        self.line([(box[2], box[3]), (box[2], y - d), (box[2] - d, y - 2 * d), (box[0], box[1])])
+        self.boxes[frameName] = box
+        self.lastBox = box
+
+        # continue the lifeline below the frame-label
+        self.hereX, self.hereY = x, box[1]
+        lifeline.lifestart = self.hereY
+
+
+    def endFrame(self, name, frameName):
+        lifeline = self.lifeline(name)
+        try:
+            x0, y0, x1, y1 = self.boxes[frameName]
+        except KeyError:
+            raise SyntaxError('native engine found end_frame without begin_frame: {0}'.format(frameName))
+
+        right = lifeline.x + self.boxwid / 2
+        box = (x0, self.hereY, right, y1)
+        self.rect(*box)
+        self.lastBox = box
+        self.hereX = (x0 + right) / 2
+
+
+    def parseMovement(self, buf):
+        dx, dy = 0.0, 0.0
+        words = buf.split()
+        index = 0
+
+        while index < len(words):
+            word = words[index]
+            distance = None
+            if index + 1 < len(words):
+                try:
+                    distance = float(words[index + 1])
+                    index = index + 1
+                except ValueError:
+                    distance = None
+            if word == 'up':
+                dy = dy + (self.lineHeight if distance is None else distance)
+            elif word == 'down':
+                dy = dy - (self.lineHeight if distance is None else distance)
+            elif word == 'right':
+                dx = dx + (self.lineWidth if distance is None else distance)
+            elif word == 'left':
+                dx = dx - (self.lineWidth if distance is None else distance)
+            index = index + 1
+
+        return dx, dy
+
+
+    def comment(self, name, commentName, movement, boxSize, labels):
+        lifeline = self.lifeline(name)
+        oldY = self.hereY
+
+        # draw the connecting line, at which's end the box is positioned
+        dx, dy = self.parseMovement(movement or self.commentMove)
+        x, y = lifeline.x + dx, oldY + dy
+        self.line([(lifeline.x, oldY), (x, y)], True)
+
+        width, height = self.commentWidth, self.commentHeight
+        attributes = boxSize.split()
+        for index, word in enumerate(attributes[:-1]):
+            if word in ('wid', 'width'):
+                width = float(attributes[index + 1])
+            elif word in ('ht', 'height'):
+                height = float(attributes[index + 1])
+
+        if self.direction == 'right':
+            box = (x, y - height / 2, x + width, y + height / 2)
+        else:
+            box = (x - width / 2, y - height, x + width / 2, y)
+        self.text((box[0] + box[2]) / 2, (box[1] + box[3]) / 2, labels)
+
+        # draw the frame of the comment
+        x0, y0, x1, y1 = box
+        fold = self.cornerFold
+        self.line([(x0, y1), (x1 - fold, y1), (x1, y1 - fold), (x1, y0), (x0, y0), (x0, y1)])
+        self.line([(x1 - fold, y1), (x1 - fold, y1 - fold), (x1, y1 - fold)])
+
+        if commentName:
+            self.boxes[commentName] = box
+        self.lastBox = box
+
+        # restore Here.y
+        self.hereX, self.hereY = lifeline.x, oldY
+
+
+    def connectToComment(self, name, commentName):
+        lifeline = self.lifeline(name)
+        try:
+            x0, y0, x1, y1 = self.boxes[commentName]
+        except KeyError:
+            raise SyntaxError('native engine found reference to unknown comment: {0}'.format(commentName))
+
+        x, y = lifeline.x, self.hereY
+        # find the best connection-point of the comment to use as line-end
+        if x < x0:
+            end = (x0, (y0 + y1) / 2)
+        elif x > x1:
+            end = (x1, (y0 + y1) / 2)
+        elif y < y0:
+            end = ((x0 + x1) / 2, y0)
+        elif y > y1:
+            end = ((x0 + x1) / 2, y1)
+        else:
+            end = None
+
+        if end is not None:
+            self.line([(x, y), end], True)
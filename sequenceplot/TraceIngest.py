@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+"""
+Incremental ingestion of span/event traces into a SequenceDiagram.
+
+Traces are read one record at a time from JSON lines or CSV files. Each
+record is a dictionary with the fields
+
+    event -- 'start' or 'end' of a span, or 'message' for a one way message
+    span -- span identifier pairing a 'start' with its 'end'
+    from -- name of the calling participant
+    to -- name of the called participant
+    label -- request label for 'start' and 'message', response label for 'end'
+
+Participants are added to the diagram the first time they are seen.
+Only the participants and the currently open spans are kept in memory,
+so files of any size can be ingested in one pass.
+
+"""
+
+import csv
+import json
+
+from sequenceplot import SyntaxError
+from SequenceObject import SequenceObject
+from Actor import Actor
+
+traceFields = ('event', 'span', 'from', 'to', 'label')
+
+
+def utf8(value):
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    return value
+
+
+def decodeJsonRecord(line):
+    """
+    Decode a JSON trace record. Strings are returned as UTF-8 encoded
+    str, as read from CSV traces, so that labels can be emitted as pic.
+    Raises ValueError if line is not a JSON object.
+
+    """
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError('Trace record is not a JSON object: {0!r}'.format(record))
+    return dict((utf8(key), utf8(value)) for key, value in record.iteritems())
+
+
+def readJsonEvents(infile):
+    """
+    Generate trace records from a file handle of JSON lines. Blank
+    lines are skipped.
+
+    """
+    for line in infile:
+        line = line.strip()
+        if line:
+            yield decodeJsonRecord(line)
+
+
+def readCsvEvents(infile):
+    """
+    Generate trace records from a file handle of CSV rows. The first
+    row names the columns.
+
+    """
+    for row in csv.DictReader(infile):
+        yield row
+
+
+class TraceIngester:
+    """
+    Feeds trace records into a diagram, mapping span starts to
+    pushMethod() and span ends to popMethod().
+
+    Attributes:
+    diagram -- SequenceDiagram being built
+    participants -- dictionary mapping participant names to sequence objects
+    openSpans -- dictionary mapping the ids of started, not yet ended
+                 spans to their (caller, callee) objects
+    source -- name of the trace used in error messages
+    recordNumber -- number of the last record fed, starting at 1
+
+    """
+    def __init__(self, diagram, actors=(), fields=None, source='<trace>'):
+        """
+        Constructor for an ingester.
+
+        Args:
+        diagram -- SequenceDiagram to add participants and messages to
+        actors -- names of participants to draw as actors
+        fields -- optional dictionary mapping the standard field names
+                  (event, span, from, to, label) to the names used by
+                  the trace
+        source -- name of the trace used in error messages
+
+        """
+        self.diagram = diagram
+        self.actors = set(actors)
+        self.participants = {}
+        self.openSpans = {}
+        self.source = source
+        self.recordNumber = 0
+        self.fields = dict((name, name) for name in traceFields)
+
+        if fields:
+            self.fields.update(fields)
+
+    def participant(self, name):
+        """
+        Return the sequence object for name, adding it to the diagram
+        if it has not been seen before.
+
+        """
+        try:
+            return self.participants[name]
+        except KeyError:
+            if name in self.actors:
+                obj = Actor(name)
+            else:
+                obj = SequenceObject(name)
+            self.diagram.add(obj)
+            self.participants[name] = obj
+            return obj
+
+    def error(self, message):
+        """
+        Return a SyntaxError for message at the last record fed.
+
+        """
+        return SyntaxError('{0}, record {1}: {2}'.format(self.source, self.recordNumber, message))
+
+    def feed(self, record):
+        """
+        Apply a single trace record to the diagram. Span ends without
+        a known start and without from/to fields are ignored. Raises
+        SyntaxError naming the record for unknown events and for
+        records missing a from or to field.
+
+        """
+        self.recordNumber += 1
+        fields = self.fields
+        event = record.get(fields['event'])
+        span = record.get(fields['span'])
+        label = record.get(fields['label']) or ''
+
+        if event == 'end':
+            ends = self.openSpans.pop(span, None)
+            if ends is None:
+                if not record.get(fields['from']) or not record.get(fields['to']):
+                    return
+                ends = (self.participant(record[fields['from']]),
+                        self.participant(record[fields['to']]))
+            caller, callee = ends
+            caller.popMethod(callee, label)
+            return
+
+        if event not in ('start', 'message'):
+            raise self.error('unknown trace event {0!r}'.format(event))
+
+        for field in ('from', 'to'):
+            if not record.get(fields[field]):
+                raise self.error('missing {0!r} field'.format(fields[field]))
+
+        caller = self.participant(record[fields['from']])
+        callee = self.participant(record[fields['to']])
+
+        if event == 'start':
+            caller.pushMethod(callee, label)
+            self.openSpans[span] = (caller, callee)
+        else:
+            caller.callMethod(callee, label)
+
+    def declareAll(self, records):
+        """
+        Add the participants of every record of an iterable of trace
+        records, in the order they are first seen, without recording
+        any message.
+
+        """
+        fields = self.fields
+        for record in records:
+            for field in ('from', 'to'):
+                name = record.get(fields[field])
+                if name:
+                    self.participant(name)
+
+    def feedAll(self, records):
+        """
+        Apply every record of an iterable of trace records.
+
+        """
+        for record in records:
+            self.feed(record)
+
+
+def ingestFile(diagram, filename, format=None, actors=(), fields=None):
+    """
+    Ingest a JSON lines or CSV trace file into diagram. A streaming
+    diagram is given its participants in a first pass over the file,
+    so that the messages of the second are written through to its
+    sink as they are read.
+
+    Args:
+    diagram -- SequenceDiagram to build
+    filename -- trace file name
+    format -- 'json' or 'csv'; guessed from the file extension if None
+    actors -- names of participants to draw as actors
+    fields -- optional mapping of standard to trace field names
+
+    Returns:
+    the TraceIngester used, holding the participants seen
+
+    """
+    if format is None:
+        if filename.lower().endswith('.csv'):
+            format = 'csv'
+        else:
+            format = 'json'
+
+    ingester = TraceIngester(diagram, actors, fields, filename)
+
+    if format == 'csv':
+        readEvents = readCsvEvents
+    else:
+        readEvents = readJsonEvents
+
+    if diagram.sink is not None:
+        # A streaming diagram needs its objects before its first
+        # message, so declare the participants in a first pass.
+        with open(filename, 'rb') as infile:
+            ingester.declareAll(readEvents(infile))
+
+    with open(filename, 'rb') as infile:
+        ingester.feedAll(readEvents(infile))
+
+    return ingester
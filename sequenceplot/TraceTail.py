@@ -0,0 +1,351 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+"""
+Follow a growing trace and keep a rendered diagram of its latest events.
+
+Records are read on a background thread, from a file being appended to
+or from a local socket, and kept in a sliding window of the most recent
+events. The diagram is rebuilt from the window and re-rendered once the
+trace has been quiet for the debounce interval, or at the latest after
+maxDelay seconds. Events arriving while a render is in progress are
+coalesced into the next render.
+
+"""
+
+import csv
+import os
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from Queue import Queue
+
+from SequenceDiagram import SequenceDiagram
+from TraceIngest import TraceIngester, decodeJsonRecord
+
+
+def reportSkipped(source, lineNumber, error):
+    """
+    Report a malformed trace record that has been skipped on stderr.
+
+    """
+    sys.stderr.write('{0}, line {1}: skipped malformed record: {2}\n'.format(source, lineNumber, error))
+
+
+def followFile(filename, format=None, pollInterval=0.25, stopEvent=None):
+    """
+    Generate trace records from a file that is being appended to, like
+    tail -f. Partial lines are held back until they are complete, and
+    the file is read again from the start if it is truncated or
+    replaced. Malformed records are reported and skipped.
+
+    Args:
+    filename -- JSON lines or CSV trace file name
+    format -- 'json' or 'csv'; guessed from the file extension if None
+    pollInterval -- seconds to wait for new data at the end of the file
+    stopEvent -- optional threading.Event ending the generator once set
+
+    """
+    if format is None:
+        if filename.lower().endswith('.csv'):
+            format = 'csv'
+        else:
+            format = 'json'
+
+    infile = None
+    identity = None
+    partial = ''
+    header = None
+    lineNumber = 0
+
+    while stopEvent is None or not stopEvent.is_set():
+        if infile is None:
+            try:
+                infile = open(filename, 'rb')
+            except IOError:
+                time.sleep(pollInterval)
+                continue
+            identity = os.fstat(infile.fileno()).st_ino
+            partial = ''
+            header = None
+            lineNumber = 0
+
+        line = infile.readline()
+
+        if not line:
+            try:
+                status = os.stat(filename)
+            except OSError:
+                status = None
+            if status is None or status.st_ino != identity or status.st_size < infile.tell():
+                infile.close()
+                infile = None
+            else:
+                time.sleep(pollInterval)
+            continue
+
+        partial = partial + line
+        if not partial.endswith('\n'):
+            continue
+        line, partial = partial.strip(), ''
+        lineNumber = lineNumber + 1
+        if not line:
+            continue
+
+        try:
+            if format == 'csv':
+                row = next(csv.reader([line]))
+                if header is None:
+                    header = row
+                    continue
+                record = dict(zip(header, row))
+            else:
+                record = decodeJsonRecord(line)
+        except (ValueError, csv.Error) as e:
+            reportSkipped(filename, lineNumber, e)
+            continue
+
+        yield record
+
+    if infile is not None:
+        infile.close()
+
+
+def listenSocket(address, stopEvent=None):
+    """
+    Generate trace records sent as JSON lines to a local socket. Any
+    number of clients may connect; each connection is read on its own
+    thread. Malformed records are reported and skipped.
+
+    Args:
+    address -- path of a Unix domain socket, or a (host, port) pair
+    stopEvent -- optional threading.Event ending the generator once set
+
+    """
+    if isinstance(address, basestring):
+        if os.path.exists(address):
+            os.unlink(address)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(address)
+    server.listen(5)
+    server.settimeout(0.25)
+
+    records = Queue()
+
+    def readConnection(connection, peer):
+        infile = connection.makefile('rb')
+        try:
+            for lineNumber, line in enumerate(infile, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.put(decodeJsonRecord(line))
+                except ValueError as e:
+                    reportSkipped(peer or address, lineNumber, e)
+        finally:
+            infile.close()
+            connection.close()
+
+    def accept():
+        while stopEvent is None or not stopEvent.is_set():
+            try:
+                connection, peer = server.accept()
+            except socket.timeout:
+                continue
+            except socket.error:
+                break
+            connection.settimeout(None)
+            thread = threading.Thread(target=readConnection, args=(connection, peer))
+            thread.daemon = True
+            thread.start()
+        server.close()
+        records.put(None)
+
+    thread = threading.Thread(target=accept)
+    thread.daemon = True
+    thread.start()
+
+    while True:
+        record = records.get()
+        if record is None:
+            return
+        yield record
+
+
+class TraceTail:
+    """
+    Long-running follower that keeps a diagram of the latest events of
+    a trace rendered.
+
+    Attributes:
+    filenamePrefix -- output filename prefix of the rendered diagram
+    window -- deque of the most recent trace records
+    renders -- number of renders done
+    failures -- number of renders that raised an error
+
+    """
+    def __init__(self, filenamePrefix, filetype='svg', engine='pic2plot', window=1000,
+                 debounce=0.5, maxDelay=5.0, actors=(), fields=None, configure=None):
+        """
+        Constructor for a trace follower.
+
+        Args:
+        filenamePrefix -- output filename prefix string
+        filetype -- output format, legal values are those supported by pic2plot
+        engine -- 'pic2plot' (default) or 'native', see SequenceDiagram.render()
+        window -- number of most recent trace records to draw; an end
+                  record whose start has left the window is not drawn
+        debounce -- seconds without new records to wait before rendering
+        maxDelay -- longest time in seconds a new record waits to be rendered
+        actors -- names of participants to draw as actors
+        fields -- optional mapping of standard to trace field names
+        configure -- optional callable, called with each new diagram
+                     before the records are replayed into it, for
+                     example to set parameters
+
+        """
+        self.filenamePrefix = filenamePrefix
+        self.filetype = filetype
+        self.engine = engine
+        self.window = deque(maxlen=window)
+        self.debounce = debounce
+        self.maxDelay = maxDelay
+        self.actors = actors
+        self.fields = fields
+        self.configure = configure
+        self.renders = 0
+        self.failures = 0
+
+        self.condition = threading.Condition()
+        self.firstPending = None
+        self.lastPending = None
+        self.exhausted = False
+        self.stopEvent = threading.Event()
+
+    def stop(self):
+        """
+        Make run() return after the render in progress, if any.
+
+        """
+        self.stopEvent.set()
+        with self.condition:
+            self.condition.notify()
+
+    def read(self, records):
+        """
+        Append records to the window as they arrive. Run on the reader
+        thread. An error ending records is reported on stderr.
+
+        """
+        try:
+            for record in records:
+                now = time.time()
+                with self.condition:
+                    self.window.append(record)
+                    if self.firstPending is None:
+                        self.firstPending = now
+                    self.lastPending = now
+                    self.condition.notify()
+                if self.stopEvent.is_set():
+                    break
+        except Exception as e:
+            sys.stderr.write('{0}: trace reading stopped: {1}\n'.format(self.filenamePrefix, e))
+        finally:
+            with self.condition:
+                self.exhausted = True
+                self.condition.notify()
+
+    def build(self, records):
+        """
+        Build a diagram from a snapshot of the window. Span ends whose
+        start has fallen out of the window are dropped.
+
+        """
+        diagram = SequenceDiagram()
+        if self.configure is not None:
+            self.configure(diagram)
+        ingester = TraceIngester(diagram, self.actors, self.fields)
+        fields = ingester.fields
+        for record in records:
+            if record.get(fields['event']) == 'end' and record.get(fields['span']) not in ingester.openSpans:
+                continue
+            ingester.feed(record)
+        return diagram
+
+    def render(self, records):
+        """
+        Render a diagram of records, replacing the previous output only
+        once the new one is complete.
+
+        """
+        diagram = self.build(records)
+        prefix = self.filenamePrefix + '.next'
+        try:
+            diagram.render(prefix, self.filetype, self.engine)
+            os.rename(prefix + '.' + self.filetype, self.filenamePrefix + '.' + self.filetype)
+        finally:
+            if os.path.exists(prefix + '.pic'):
+                os.remove(prefix + '.pic')
+        self.renders = self.renders + 1
+
+    def run(self, records):
+        """
+        Follow records, re-rendering as they arrive, until the records
+        are exhausted or stop() is called. A render that fails is
+        reported on stderr and following continues.
+
+        Args:
+        records -- iterable of trace records, such as followFile() or
+                   listenSocket()
+
+        """
+        reader = threading.Thread(target=self.read, args=(records,))
+        reader.daemon = True
+        reader.start()
+
+        while not self.stopEvent.is_set():
+            with self.condition:
+                while True:
+                    if self.stopEvent.is_set():
+                        return
+                    now = time.time()
+                    if self.firstPending is not None:
+                        due = min(self.lastPending + self.debounce,
+                                  self.firstPending + self.maxDelay)
+                        if self.exhausted or now >= due:
+                            break
+                        self.condition.wait(due - now)
+                    elif self.exhausted:
+                        return
+                    else:
+                        self.condition.wait(self.maxDelay)
+
+                snapshot = list(self.window)
+                self.firstPending = None
+                self.lastPending = None
+
+            try:
+                self.render(snapshot)
+            except Exception as e:
+                self.failures = self.failures + 1
+                sys.stderr.write('{0}: render failed: {1}\n'.format(self.filenamePrefix, e))
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# Copyright 2012 Yummy Melon Software LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author: Charles Y. Choi
+
+"""
+Validation of the operations recorded by a diagram.
+
+Mistakes in building a diagram usually produce garbled pic2plot output
+rather than an error. findProblems() checks the recorded operations in
+a single pass, before anything is rendered, for
+
+    objects used after delete(), dmessage() or destroyInstance()
+    operations on objects the diagram does not declare
+    create messages to objects that are not placeholders, or that
+    were already created
+    endFrame() names that no open beginFrame() returned, and frames
+    that are never ended
+    inactive() calls on objects that are not active
+    connectToComment() names that no comment() returned
+
+"""
+
+from sequenceplot import ValidationError
+from Operations import *
+
+
+def objectName(labels, index):
+    label = labels.get(index)
+    if label:
+        return '{0} ({1!r})'.format(objectPicName(index), label)
+    return objectPicName(index)
+
+
+def findProblems(diagram):
+    """
+    Check the recorded operations of diagram.
+
+    Args:
+    diagram -- SequenceDiagram instance, not streaming
+
+    Returns:
+    list of problem descriptions, empty if the diagram is valid. Each
+    names the operation at fault by its position among the recorded
+    operations, counting from 1, and its pic text.
+
+    """
+    if diagram.sink is not None:
+        raise ValueError('Streaming diagram does not keep its operations for validation')
+
+    with diagram.lock:
+        labels = dict((index, obj.label) for obj, index in diagram.objectIndex.items())
+        ignoredInactive = [(diagram.objectIndex[obj], position) for obj, position in diagram.ignoredInactive]
+        declared = {}
+        for code, args in diagram.declarations:
+            declared[args[0]] = code
+
+        problems = []
+        removed = {}
+        created = set()
+        activeCounts = {}
+        openFrames = {}
+        comments = set()
+        ignored = 0
+
+        for number, (code, args) in enumerate(diagram.operations, 1):
+            while ignored < len(ignoredInactive) and ignoredInactive[ignored][1] < number:
+                problems.append('before operation {0}: inactive() on {1}, which is not active'.format(
+                    number, objectName(labels, ignoredInactive[ignored][0])))
+                ignored = ignored + 1
+
+            messages = []
+
+            for kind, arg in zip(operationKinds[code], args):
+                if kind != 'o':
+                    continue
+                if arg not in declared:
+                    messages.append('{0} is not declared in the diagram'.format(objectPicName(arg)))
+                elif arg in removed:
+                    messages.append('{0} was removed by operation {1}'.format(objectName(labels, arg),
+                                                                              removed[arg]))
+
+            if code == DELETE:
+                removed.setdefault(args[0], number)
+            elif code == DMESSAGE:
+                removed.setdefault(args[1], number)
+            elif code == CMESSAGE:
+                target = args[1]
+                if declared.get(target, PLACEHOLDER) != PLACEHOLDER:
+                    messages.append('{0} is not a placeholder'.format(objectName(labels, target)))
+                elif target in created:
+                    messages.append('{0} was already created'.format(objectName(labels, target)))
+                created.add(target)
+            elif code == ACTIVE:
+                activeCounts[args[0]] = activeCounts.get(args[0], 0) + 1
+            elif code == INACTIVE:
+                if activeCounts.get(args[0], 0) > 0:
+                    activeCounts[args[0]] = activeCounts[args[0]] - 1
+                else:
+                    messages.append('{0} is not active'.format(objectName(labels, args[0])))
+            elif code == BEGIN_FRAME:
+                openFrames[args[1]] = number
+            elif code == END_FRAME:
+                if openFrames.pop(args[1], None) is None:
+                    messages.append('no open frame is named {0}'.format(args[1]))
+            elif code == COMMENT:
+                comments.add(args[1])
+            elif code == CONNECT_TO_COMMENT:
+                if args[1] not in comments:
+                    messages.append('no comment is named {0}'.format(args[1]))
+
+            for message in messages:
+                problems.append('operation {0} [{1}]: {2}'.format(number, picOperation(code, args), message))
+
+        for index, position in ignoredInactive[ignored:]:
+            problems.append('after the last operation: inactive() on {0}, which is not active'.format(
+                objectName(labels, index)))
+
+        for name, number in sorted(openFrames.items(), key=lambda item: item[1]):
+            problems.append('operation {0}: frame {1} is never ended'.format(number, name))
+
+    return problems
+
+
+def validateDiagram(diagram):
+    """
+    Check the recorded operations of diagram, raising ValidationError
+    listing every problem found.
+
+    Args:
+    diagram -- SequenceDiagram instance, not streaming
+
+    """
+    problems = findProblems(diagram)
+    if problems:
+        raise ValidationError('{0} problem(s) found in diagram: {1}'.format(len(problems), problems[0]),
+                              problems)
@@ -29,14 +29,44 @@ class SyntaxError(Exception):
         return repr(self.value)
 
 
+class RenderError(Exception):
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return repr(self.value)
+
+
+class ValidationError(Exception):
+    def __init__(self, value, problems=()):
+        self.value = value
+        self.problems = list(problems)
+
+    def __str__(self):
+        return repr(self.value)
+
+
 def picEscapeString(buf):
     result = buf.replace('"', '\\"')
     return result
 
+
+def picUnescapeString(buf):
+    result = buf.replace('\\"', '"')
+    return result
+
     
 
 from SequenceObject import SequenceObject
 from Placeholder import Placeholder
 from Actor import Actor
 from SequenceDiagram import SequenceDiagram
-
+from BatchRender import renderMany
+from AsyncRender import setRenderConcurrency
+from RenderCache import RenderCache
+from RenderStats import RenderStats
+from IncrementalRenderer import IncrementalRenderer
+from TraceIngest import TraceIngester, ingestFile
+from TraceTail import TraceTail, followFile, listenSocket
+from SpecParser import SpecParser, parseSpec, loadSpec
+from RenderServer import RenderServer, RenderService
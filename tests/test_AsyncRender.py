@@ -0,0 +1,70 @@
+#
+# This file is a work in progress.
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from sequenceplot import SequenceDiagram, SequenceObject, RenderError, setRenderConcurrency
+import sequenceplot.AsyncRender
+import sequenceplot.Pic2plot
+
+class TestAsyncRender(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.pic2plotCommand = sequenceplot.Pic2plot.pic2plotCommand
+
+    def tearDown(self):
+        sequenceplot.Pic2plot.pic2plotCommand = self.pic2plotCommand
+        setRenderConcurrency(multiprocessing.cpu_count())
+        shutil.rmtree(self.directory)
+
+    def test_handle(self):
+        sequenceplot.Pic2plot.pic2plotCommand = lambda picFilename, filetype: ['cat', picFilename]
+        results = []
+        diagram = SequenceDiagram([SequenceObject('a')])
+        prefix = os.path.join(self.directory, 'handle')
+
+        handle = diagram.renderAsync(prefix, 'svg', callback=results.append)
+
+        self.assertTrue(handle.wait(10))
+        self.assertTrue(handle.done())
+        self.assertEqual(handle.outfileName(), prefix + '.svg')
+        self.assertEqual(results, [handle.result])
+        with open(prefix + '.pic') as picFile:
+            with open(prefix + '.svg') as outFile:
+                self.assertEqual(picFile.read(), outFile.read())
+
+    def test_timeout(self):
+        sequenceplot.Pic2plot.pic2plotCommand = lambda picFilename, filetype: ['sleep', '10']
+        diagram = SequenceDiagram()
+
+        start = time.time()
+        handle = diagram.renderAsync(os.path.join(self.directory, 'timeout'), 'svg', timeout=0.2)
+
+        self.assertTrue(handle.wait(5))
+        self.assertTrue(time.time() - start < 5)
+        self.assertRaises(RenderError, handle.outfileName)
+
+    def test_workers(self):
+        sequenceplot.Pic2plot.pic2plotCommand = lambda picFilename, filetype: ['cat', picFilename]
+        setRenderConcurrency(2)
+        diagram = SequenceDiagram([SequenceObject('a')])
+
+        handles = [diagram.renderAsync(os.path.join(self.directory, 'worker{0}'.format(i)), 'svg')
+                   for i in range(8)]
+
+        for handle in handles:
+            self.assertTrue(handle.wait(10))
+            self.assertTrue(handle.result.error is None)
+
+        workers = [thread for thread in threading.enumerate() if thread.name == 'sequenceplot-render']
+        for worker in workers:
+            if worker not in sequenceplot.AsyncRender.renderWorkers:
+                worker.join(5)
+        self.assertEqual(len([worker for worker in workers if worker.is_alive()]), 2)
@@ -0,0 +1,86 @@
+#
+# This file is a work in progress.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import sequenceplot.Pic2plot
+from sequenceplot import SequenceDiagram, SequenceObject, RenderCache, RenderStats, renderMany
+
+class TestBatchRender(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_results(self):
+        pic2plotCommand = sequenceplot.Pic2plot.pic2plotCommand
+        def fakePic2plot(picFilename, filetype):
+            if picFilename.endswith('bad.pic'):
+                return ['sh', '-c', 'echo broken >&2; exit 1']
+            return ['cat', picFilename]
+        sequenceplot.Pic2plot.pic2plotCommand = fakePic2plot
+        try:
+            diagram = SequenceDiagram()
+            prefixes = [os.path.join(self.directory, name) for name in ('d0', 'd1', 'bad', 'd3')]
+
+            results = renderMany([(prefix, diagram) for prefix in prefixes], 'svg', jobs=2)
+        finally:
+            sequenceplot.Pic2plot.pic2plotCommand = pic2plotCommand
+
+        self.assertEqual([result.filenamePrefix for result in results], prefixes)
+        self.assertEqual([result.ok() for result in results], [True, True, False, True])
+        self.assertTrue('broken' in results[2].error.value)
+        for result in results:
+            self.assertTrue(os.path.exists(result.filenamePrefix + '.pic'))
+            self.assertEqual(result.outfileName, result.filenamePrefix + '.svg')
+            if result.ok():
+                with open(result.filenamePrefix + '.pic') as picFile:
+                    with open(result.outfileName) as outfile:
+                        self.assertEqual(outfile.read(), picFile.read())
+
+    def test_formats(self):
+        pic2plotCommand = sequenceplot.Pic2plot.pic2plotCommand
+        plotCommand = sequenceplot.Pic2plot.plotCommand
+        runs = []
+        def fakePic2plot(picFilename, filetype):
+            runs.append(filetype)
+            return ['cat', picFilename]
+        sequenceplot.Pic2plot.pic2plotCommand = fakePic2plot
+        sequenceplot.Pic2plot.plotCommand = lambda metaFilename, filetype: ['cat', metaFilename]
+        try:
+            a = SequenceObject('a')
+            b = SequenceObject('b')
+            diagram = SequenceDiagram([a, b], stats=RenderStats())
+            a.message(b, 'hello')
+            prefix = os.path.join(self.directory, 'd')
+            cache = RenderCache(os.path.join(self.directory, 'cache'))
+
+            results = diagram.renderFormats(prefix, ['svg', 'png', 'ps'], cache=cache)
+
+            self.assertEqual(runs, ['meta'])
+            self.assertEqual([result.outfileName for result in results],
+                             [prefix + '.svg', prefix + '.png', prefix + '.ps'])
+            with open(prefix + '.pic') as infile:
+                pic = infile.read()
+            for name in [prefix + '.meta'] + [result.outfileName for result in results]:
+                with open(name) as infile:
+                    self.assertEqual(infile.read(), pic)
+            self.assertEqual(diagram.stats.renders, 3)
+
+            results = diagram.renderFormats(prefix, ['svg', 'gif'], cache=cache)
+
+            self.assertEqual(runs, ['meta'])
+            self.assertTrue(all(result.ok() for result in results))
+            self.assertEqual(diagram.stats.cacheHits, 1)
+
+            sequenceplot.Pic2plot.pic2plotCommand = lambda picFilename, filetype: ['false']
+            results = diagram.renderFormats(prefix, ['fig'])
+            self.assertFalse(results[0].ok())
+        finally:
+            sequenceplot.Pic2plot.pic2plotCommand = pic2plotCommand
+            sequenceplot.Pic2plot.plotCommand = plotCommand
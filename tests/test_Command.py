@@ -0,0 +1,86 @@
+#
+# This file is a work in progress.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import sequenceplot.Pic2plot
+from sequenceplot.Command import main
+
+pic2plotCommand = sequenceplot.Pic2plot.pic2plotCommand
+
+builder = '''
+from sequenceplot import SequenceObject, SequenceDiagram
+
+a = SequenceObject('a')
+b = SequenceObject('b')
+diagram = SequenceDiagram([a, b])
+a.message(b, '{0}()')
+diagram.render(__file__[:-3], engine='native')
+'''
+
+class TestCommand(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.state = os.path.join(self.directory, 'state.json')
+        self.inputs = []
+        for name in ('first', 'second', 'third'):
+            path = os.path.join(self.directory, name + '.py')
+            with open(path, 'w') as outfile:
+                outfile.write(builder.format(name))
+            self.inputs.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_command(self, *args):
+        return main(['-q', '--state', self.state] + list(args))
+
+    def test_parallel(self):
+        self.assertEqual(self.run_command('-j', '3', *self.inputs), 0)
+        for path in self.inputs:
+            self.assertTrue(os.path.exists(path[:-3] + '.svg'))
+
+    def test_unchanged(self):
+        self.assertEqual(self.run_command('-j', '1', *self.inputs), 0)
+        for path in self.inputs:
+            os.remove(path[:-3] + '.svg')
+
+        self.assertEqual(self.run_command('-j', '1', *self.inputs), 0)
+        for path in self.inputs:
+            self.assertFalse(os.path.exists(path[:-3] + '.svg'))
+
+        self.assertEqual(self.run_command('-j', '1', '--force', self.inputs[0]), 0)
+        self.assertTrue(os.path.exists(self.inputs[0][:-3] + '.svg'))
+
+    def test_spec(self):
+        spec = os.path.join(self.directory, 'spec.seq')
+        with open(spec, 'w') as outfile:
+            outfile.write('a -> b: first()\nb -> a: second()\n')
+        output = os.path.join(self.directory, 'out')
+
+        self.assertEqual(self.run_command('-e', 'native', '-o', output, spec), 0)
+        self.assertTrue(os.path.exists(os.path.join(output, 'spec.svg')))
+
+        # an unchanged spec is rendered again if its output is gone
+        os.remove(os.path.join(output, 'spec.svg'))
+        self.assertEqual(self.run_command('-e', 'native', '-o', output, spec), 0)
+        self.assertTrue(os.path.exists(os.path.join(output, 'spec.svg')))
+
+        sequenceplot.Pic2plot.pic2plotCommand = lambda picFilename, filetype: ['cat', picFilename]
+        try:
+            self.assertEqual(self.run_command('-T', 'png', '-o', output, spec), 0)
+        finally:
+            sequenceplot.Pic2plot.pic2plotCommand = pic2plotCommand
+        self.assertTrue(os.path.exists(os.path.join(output, 'spec.png')))
+
+    def test_failure(self):
+        with open(self.inputs[1], 'w') as outfile:
+            outfile.write('raise ValueError("broken")\n')
+
+        self.assertEqual(self.run_command('-j', '1', *self.inputs), 1)
+        self.assertEqual(self.run_command('-j', '1', *self.inputs), 1)
+        self.assertFalse(os.path.exists(self.inputs[1][:-3] + '.svg'))
@@ -0,0 +1,60 @@
+#
+# This file is a work in progress.
+
+import threading
+import unittest
+from StringIO import StringIO
+
+from sequenceplot import SequenceDiagram, SequenceObject
+
+def build(index, results):
+    client = SequenceObject('client{0}'.format(index))
+    server = SequenceObject('server{0}'.format(index))
+    diagram = SequenceDiagram([client, server])
+    for count in range(50):
+        client.callMethod(server, 'call{0}()'.format(index), response='ok')
+    outfile = StringIO()
+    diagram.run(outfile)
+    results[index] = outfile.getvalue()
+
+class TestConcurrency(unittest.TestCase):
+
+    def test_independent(self):
+        first = SequenceDiagram([SequenceObject('a')])
+        second = SequenceDiagram()
+        self.assertEqual(len(second.objectList), 0)
+        self.assertEqual(len(second.operations), 0)
+        self.assertFalse(first.params is second.params)
+
+    def test_threads(self):
+        results = {}
+        threads = [threading.Thread(target=build, args=(index, results)) for index in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for index in range(16):
+            self.assertEqual(results[index].count('message(O0,O1,"call{0}()");'.format(index)), 50)
+            self.assertEqual(results[index].count('rmessage(O1,O0,"ok");'), 50)
+
+    def test_shared_active(self):
+        server = SequenceObject('server')
+        diagram = SequenceDiagram([server])
+
+        def toggle():
+            for count in range(200):
+                server.active()
+                server.inactive()
+
+        threads = [threading.Thread(target=toggle) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(server.activeCount, 0)
+        self.assertEqual(diagram.ignoredInactive, [])
+        outfile = StringIO()
+        diagram.run(outfile)
+        self.assertEqual(outfile.getvalue().count('inactive(O0);'), 8 * 200)
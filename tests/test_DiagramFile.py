@@ -0,0 +1,108 @@
+#
+# This file is a work in progress.
+
+import os
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from sequenceplot import SequenceObject, Actor, Placeholder, SequenceDiagram
+
+def picText(diagram):
+    outfile = StringIO()
+    diagram.run(outfile)
+    return outfile.getvalue()
+
+class TestDiagramFile(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'diagram.sqpl')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def build(self):
+        user = Actor('user')
+        o = SequenceObject(':Toolkit')
+        p = Placeholder()
+        diagram = SequenceDiagram([user, o, p])
+        diagram.setParam('objectSpacing', 1.75)
+
+        user.pushMethod(o, 'run()')
+        o.createInstance(p, 'p:Peer')
+        o.callMethod(p, 'handleExpose()', 'done')
+        name = diagram.comment(o, 'two\nlines')
+        diagram.connectToComment(user, name)
+        o.destroyInstance(p)
+        diagram.step(3)
+        return diagram
+
+    def test_roundtrip(self):
+        diagram = self.build()
+        diagram.save(self.filename)
+
+        for mmapped in (True, False):
+            loaded = SequenceDiagram.load(self.filename, mmapped)
+
+            self.assertEqual(picText(loaded), picText(diagram))
+            self.assertEqual(loaded.params['objectSpacing'], 1.75)
+            self.assertEqual([obj.label for obj in loaded.objectList], ['user', ':Toolkit'])
+            self.assertEqual(loaded.operations.labels, diagram.operations.labels)
+
+    def test_ignoredInactive(self):
+        diagram = self.build()
+        diagram.findObject('user').inactive()
+        diagram.save(self.filename)
+
+        loaded = SequenceDiagram.load(self.filename)
+
+        self.assertEqual([(obj.label, position) for obj, position in loaded.ignoredInactive],
+                         [('user', len(diagram.operations))])
+        self.assertEqual(loaded.problems(), diagram.problems())
+
+    def test_continue(self):
+        diagram = self.build()
+        diagram.save(self.filename)
+        loaded = SequenceDiagram.load(self.filename)
+
+        for d in (diagram, loaded):
+            user = d.findObject('user')
+            toolkit = d.findObject(':Toolkit')
+            toolkit.popMethod(user, 'ok')
+            d.comment(user, 'after')
+
+        self.assertEqual(picText(loaded), picText(diagram))
+
+    def test_invalid(self):
+        with open(self.filename, 'wb') as outfile:
+            outfile.write('not a diagram')
+        self.assertRaises(ValueError, SequenceDiagram.load, self.filename)
+
+        self.build().save(self.filename)
+        with open(self.filename, 'rb') as infile:
+            data = infile.read()
+        with open(self.filename, 'wb') as outfile:
+            outfile.write(data[:-5])
+        self.assertRaises(ValueError, SequenceDiagram.load, self.filename)
+
+        diagram = SequenceDiagram(sink=StringIO())
+        self.assertRaises(ValueError, diagram.save, self.filename)
+
+    def test_corrupt(self):
+        self.build().save(self.filename)
+        with open(self.filename, 'rb') as infile:
+            data = infile.read()
+
+        # the kind of the first object follows the header and the meta
+        # section of three ints
+        position = 8 + 5 + 12 + 5
+        with open(self.filename, 'wb') as outfile:
+            outfile.write(data[:position] + '\xff' + data[position + 1:])
+        self.assertRaises(ValueError, SequenceDiagram.load, self.filename)
+
+        diagram = self.build()
+        diagram.operations.codes[0] = 255
+        diagram.save(self.filename)
+        self.assertRaises(ValueError, SequenceDiagram.load, self.filename)
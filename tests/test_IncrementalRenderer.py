@@ -0,0 +1,76 @@
+#
+# This file is a work in progress.
+
+import os
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from sequenceplot import SequenceDiagram, SequenceObject, IncrementalRenderer
+
+def elementCount(svg):
+    return len([line for line in svg.splitlines() if line.startswith(('<polyline', '<polygon', '<rect', '<text', '<circle'))])
+
+class TestIncrementalRenderer(unittest.TestCase):
+
+    def setUp(self):
+        self.client = SequenceObject('client')
+        self.server = SequenceObject('server')
+        self.diagram = SequenceDiagram([self.client, self.server])
+        self.live = IncrementalRenderer(self.diagram)
+
+    def native(self):
+        directory = tempfile.mkdtemp()
+        try:
+            prefix = os.path.join(directory, 'native')
+            self.diagram.renderNative(prefix)
+            with open(prefix + '.svg') as infile:
+                return infile.read()
+        finally:
+            shutil.rmtree(directory)
+
+    def test_delta(self):
+        header = self.live.update()
+        self.assertTrue(header)
+
+        self.client.message(self.server, 'first()')
+        first = self.live.update()
+        self.assertTrue(first)
+        self.assertEqual(self.live.update(), [])
+
+        self.client.message(self.server, 'second()')
+        self.assertEqual(len(self.live.update()), len(first))
+        self.assertEqual(len(self.live.fragments), len(header) + 2 * len(first))
+
+    def test_document(self):
+        self.client.callMethod(self.server, 'get()', response='ok')
+        self.live.write(StringIO())
+        self.server.active()
+        self.diagram.step(3)
+
+        outfile = StringIO()
+        self.live.write(outfile)
+        native = self.native()
+        self.assertEqual(outfile.getvalue().splitlines()[1], native.splitlines()[1])
+        self.assertEqual(elementCount(outfile.getvalue()), elementCount(native))
+
+    def test_trailing_step(self):
+        self.client.message(self.server, 'first()')
+        self.diagram.step()
+        self.live.write(StringIO())
+        self.diagram.step(4)
+        self.client.message(self.server, 'second()')
+
+        outfile = StringIO()
+        self.live.write(outfile)
+        self.assertEqual(outfile.getvalue().splitlines()[1], self.native().splitlines()[1])
+
+    def test_params(self):
+        self.client.message(self.server, 'first()')
+        self.live.update()
+        self.diagram.setParam('objectSpacing', 3)
+
+        outfile = StringIO()
+        self.live.write(outfile)
+        self.assertEqual(outfile.getvalue().splitlines()[1], self.native().splitlines()[1])
@@ -0,0 +1,63 @@
+#
+# This file is a work in progress.
+
+import re
+import unittest
+from StringIO import StringIO
+
+from sequenceplot import SequenceObject, SequenceDiagram
+
+def build(objectCount, callCount):
+    objects = [SequenceObject('o{0}'.format(i)) for i in range(objectCount)]
+    diagram = SequenceDiagram(objects)
+    for i in range(callCount):
+        objects[0].callMethod(objects[i % (objectCount - 1) + 1], 'call{0}()'.format(i), 'ok')
+    return diagram, objects
+
+class TestLayout(unittest.TestCase):
+
+    def test_lifelines(self):
+        diagram, objects = build(3, 1)
+        diagram.setParam('objectSpacing', 1.5)
+
+        layout = diagram.layout()
+
+        positions = [layout.lifelines[obj] for obj in objects]
+        self.assertAlmostEqual(positions[1] - positions[0], 0.75 + 1.5)
+        self.assertAlmostEqual(positions[2] - positions[1], 0.75 + 1.5)
+        self.assertAlmostEqual(layout.width, layout.bounds[2] - layout.bounds[0])
+
+    def test_height(self):
+        short = build(2, 2)[0].layout()
+        tall = build(2, 12)[0].layout()
+
+        # each call adds two steps and its request and response lines
+        self.assertTrue(tall.height > short.height + 10 * 4 * 0.25 - 0.01)
+        self.assertAlmostEqual(tall.width, short.width)
+
+    def test_autoSize(self):
+        diagram = build(12, 80)[0]
+        operationCount = len(diagram.operations)
+
+        layout = diagram.autoSize(slack=0.5)
+
+        self.assertTrue(layout.width > 11 and layout.height > 11)
+        self.assertTrue(layout.width + 0.5 <= diagram.params['diagramWidth'] < layout.width + 0.52)
+        self.assertTrue(layout.height + 0.5 <= diagram.params['diagramHeight'] < layout.height + 0.52)
+        self.assertEqual(len(diagram.operations), operationCount)
+
+        outfile = StringIO()
+        diagram.renderTo(outfile, engine='native')
+        match = re.search(r'width="([\d.]+)pt" height="([\d.]+)pt" viewBox="0 0 ([\d.]+) ([\d.]+)"',
+                          outfile.getvalue())
+        self.assertEqual(match.group(1, 2), match.group(3, 4))
+
+    def test_raw(self):
+        diagram, objects = build(2, 1)
+        expected = diagram.layout()
+        diagram.pic('line from O0.s to O1.s;')
+
+        layout = diagram.layout()
+
+        self.assertEqual(layout.bounds, expected.bounds)
+        self.assertEqual(layout.lifelines, expected.lifelines)
@@ -0,0 +1,40 @@
+#
+# This file is a work in progress.
+
+import unittest
+from StringIO import StringIO
+
+from sequenceplot import SequenceDiagram, SequenceObject
+from sequenceplot.MacroPrelude import loadMacroTable
+
+class TestMacroPrelude(unittest.TestCase):
+
+    def setUp(self):
+        self.diagram = SequenceDiagram()
+        self.table = loadMacroTable(self.diagram.picPath)
+
+    def test_cached(self):
+        self.assertTrue(loadMacroTable(self.diagram.picPath) is self.table)
+
+    def test_closure(self):
+        self.assertEqual(self.table.closure(['rmessage']), set(['rmessage', 'return_message']))
+        self.assertEqual(self.table.closure(['dmessage', 'box']),
+                         set(['dmessage', 'destroy_message', 'message', 'complete',
+                              'extend_lifeline', 'drawx']))
+
+    def test_prelude(self):
+        client = SequenceObject('client')
+        server = SequenceObject('server')
+        self.diagram.addObjects([client, server])
+        client.message(server, 'hello')
+        self.diagram.pic('rmessage(O1,O0,"bye");')
+
+        outfile = StringIO()
+        self.diagram.run(outfile)
+        pic = outfile.getvalue()
+
+        self.assertFalse('copy ' in pic)
+        for name in ('object', 'message', 'complete', 'extend_lifeline', 'rmessage', 'return_message'):
+            self.assertTrue('define {0} {{'.format(name) in pic, name)
+        for name in ('actor', 'cmessage', 'begin_frame', 'comment'):
+            self.assertFalse('define {0} {{'.format(name) in pic, name)
@@ -0,0 +1,44 @@
+#
+# This file is a work in progress.
+
+import unittest
+from StringIO import StringIO
+
+from sequenceplot import SequenceDiagram, SequenceObject, Placeholder, Actor
+
+class TestObjectRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.objects = [SequenceObject('s{0}'.format(i)) for i in range(5)]
+        self.diagram = SequenceDiagram(self.objects)
+
+    def test_remove(self):
+        self.objects[1].delete()
+        self.objects[3].delete()
+        self.assertEqual(list(self.diagram.objectList), [self.objects[0], self.objects[2], self.objects[4]])
+        self.assertEqual(self.diagram.findObject('s1'), None)
+        self.assertTrue(self.diagram.findObject('s2') is self.objects[2])
+        self.assertRaises(ValueError, self.diagram.objectList.remove, self.objects[1])
+
+        outfile = StringIO()
+        self.diagram.run(outfile)
+        completed = [line for line in outfile.getvalue().splitlines() if line.startswith('complete(')]
+        self.assertEqual(completed, ['complete(O0);', 'complete(O2);', 'complete(O4);'])
+
+    def test_unlabeled_actor(self):
+        actor = Actor()
+        diagram = SequenceDiagram([actor, self.objects[0]])
+        self.objects[0].destroyInstance(actor)
+        self.assertEqual(list(diagram.objectList), [self.objects[0]])
+
+        self.objects[1].label = 'renamed'
+        self.objects[1].delete()
+        self.assertFalse(self.objects[1] in self.diagram.objectList)
+        self.assertEqual(self.diagram.findObject('s1'), None)
+
+    def test_relabel(self):
+        placeholder = Placeholder()
+        self.diagram.add(placeholder)
+        self.objects[0].createInstance(placeholder, 'w: worker')
+        self.assertTrue(self.diagram.findObject('w: worker') is placeholder)
+        self.assertEqual(self.diagram.findObject(None), None)
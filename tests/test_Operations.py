@@ -0,0 +1,46 @@
+#
+# This file is a work in progress.
+
+import unittest
+
+from sequenceplot.Operations import *
+
+class TestOperations(unittest.TestCase):
+
+    def setUp(self):
+        self.operations = OperationList()
+        self.operations.append(OBJECT, (0, 'c: client'))
+        self.operations.append(MESSAGE, (0, 1, 'get("key")'))
+        self.operations.append(MESSAGE, (1, 0, 'get("key")'))
+        self.operations.append(COMMENT, (1, 'N_0', '', 'wid 1.5', 'two\nlines'))
+
+    def test_pic(self):
+        self.assertEqual(list(self.operations.picLines()),
+                         ['object(O0,"c: client");',
+                          'message(O0,O1,"get(\\"key\\")");',
+                          'message(O1,O0,"get(\\"key\\")");',
+                          'comment(O1,N_0,,wid 1.5 "two""lines");'])
+
+    def test_intern(self):
+        self.assertEqual(self.operations.labels.count('get("key")'), 1)
+
+    def test_truncate(self):
+        mark = self.operations.mark()
+        self.operations.append(COMPLETE, (0,))
+        self.operations.truncate(mark)
+        self.assertEqual(len(self.operations), 4)
+        self.assertEqual(list(self.operations)[-1][0], COMMENT)
+
+    def test_steps(self):
+        self.operations.append(STEP, (1,))
+        self.operations.append(STEP, (2,))
+        mark = self.operations.mark()
+        self.operations.append(STEP, (4,))
+        self.assertEqual(len(self.operations), 5)
+        self.assertEqual(list(self.operations.picLines())[-1], 'down; move spacing * 7;')
+
+        self.operations.truncate(mark)
+        self.assertEqual(list(self.operations)[-1], (STEP, (3,)))
+        self.operations.append(ACTIVE, (0,))
+        self.operations.append(STEP, (1,))
+        self.assertEqual(list(self.operations.picLines())[-1], 'step();')
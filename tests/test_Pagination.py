@@ -0,0 +1,113 @@
+#
+# This file is a work in progress.
+
+import os
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from sequenceplot import SequenceDiagram, SequenceObject, Placeholder
+from sequenceplot.Operations import operationHeight
+from sequenceplot.SvgRenderer import SvgRenderer
+import sequenceplot.Pic2plot
+
+def pageLines(page):
+    outfile = StringIO()
+    page.run(outfile)
+    return outfile.getvalue().splitlines()
+
+class TestPagination(unittest.TestCase):
+
+    def setUp(self):
+        self.client = SequenceObject('client')
+        self.server = SequenceObject('server')
+        self.diagram = SequenceDiagram([self.client, self.server])
+
+    def test_single(self):
+        self.client.message(self.server, 'hello')
+        pages = self.diagram.pages()
+        self.assertEqual(len(pages), 1)
+
+        outfile = StringIO()
+        self.diagram.run(outfile)
+        self.assertEqual(pageLines(pages[0]), outfile.getvalue().splitlines())
+
+    def test_heights(self):
+        peer = Placeholder()
+        self.diagram.add(peer)
+        self.client.message(self.server, 'hello')
+        self.client.lconstraint('{t < 1s}')
+        self.server.lconstraintBelow('{retried}')
+        self.server.message(self.server, 'self()')
+        self.client.cmessage(peer, 'p:Peer')
+        name = self.diagram.beginFrame(self.client, 'loop')
+        self.server.rmessage(self.client, 'ok')
+        self.diagram.endFrame(self.server, name)
+        self.client.dmessage(peer)
+
+        params = self.diagram.params
+        renderer = SvgRenderer(params)
+        for code, args in self.diagram.declarations:
+            renderer.feedOperation(code, args)
+        top = renderer.hereY
+        budget = 0.0
+        for code, args in self.diagram.operations:
+            renderer.feedOperation(code, args)
+            budget = budget + operationHeight(code, args, float(params.messageSpacing),
+                                              float(params.boxHeight))
+
+        self.assertAlmostEqual(budget, top - renderer.hereY)
+
+    def test_pages(self):
+        self.server.active()
+        self.diagram.async()
+        for count in range(40):
+            self.client.message(self.server, 'm{0}()'.format(count))
+
+        pages = self.diagram.pages(pageHeight=2.0)
+        self.assertEqual(len(pages), 5)
+
+        messages = 0
+        for number, page in enumerate(pages):
+            lines = pageLines(page)
+            self.assertTrue('object(O0,"client");' in lines)
+            self.assertTrue('object(O1,"server");' in lines)
+            self.assertEqual(lines[-3:], ['complete(O0);', 'complete(O1);', '.PE'])
+            if number:
+                self.assertTrue('active_O1=1;' in lines)
+                self.assertTrue('async();' in lines)
+            messages = messages + len([line for line in lines if line.startswith('message(')])
+        self.assertEqual(messages, 40)
+
+    def test_frame(self):
+        for count in range(10):
+            self.client.message(self.server, 'before()')
+        name = self.diagram.beginFrame(self.client, 'loop')
+        for count in range(6):
+            self.client.message(self.server, 'inside()')
+        self.diagram.endFrame(self.server, name)
+
+        pages = self.diagram.pages(pageHeight=2.0)
+        self.assertEqual(len(pages), 2)
+        for page in pages:
+            lines = ' '.join(pageLines(page))
+            self.assertEqual(lines.count('begin_frame('), lines.count('end_frame('))
+
+    def test_render(self):
+        directory = tempfile.mkdtemp()
+        pic2plotCommand = sequenceplot.Pic2plot.pic2plotCommand
+        sequenceplot.Pic2plot.pic2plotCommand = lambda picFilename, filetype: ['cat', picFilename]
+        try:
+            for count in range(20):
+                self.client.message(self.server, 'ping()')
+            prefix = os.path.join(directory, 'trace')
+            results = self.diagram.renderPages(prefix, 'svg', pageHeight=2.0, jobs=2)
+            self.assertEqual([result.outfileName for result in results],
+                             [prefix + '-001.svg', prefix + '-002.svg', prefix + '-003.svg'])
+            for result in results:
+                self.assertTrue(result.ok())
+                self.assertTrue(os.path.exists(result.outfileName))
+        finally:
+            sequenceplot.Pic2plot.pic2plotCommand = pic2plotCommand
+            shutil.rmtree(directory)
@@ -0,0 +1,70 @@
+#
+# This file is a work in progress.
+
+import os
+import time
+import unittest
+from StringIO import StringIO
+
+import sequenceplot.Pic2plot
+from sequenceplot import SequenceDiagram, SequenceObject, RenderError, RenderStats
+
+pic2plotCommand = sequenceplot.Pic2plot.pic2plotCommand
+
+def build(count):
+    a = SequenceObject('a')
+    b = SequenceObject('b')
+    diagram = SequenceDiagram([a, b])
+    for i in range(count):
+        a.callMethod(b, 'call{0}()'.format(i), 'result{0}'.format(i))
+    return diagram
+
+def picText(diagram):
+    outfile = StringIO()
+    diagram.run(outfile)
+    return outfile.getvalue()
+
+class TestRenderBytes(unittest.TestCase):
+
+    def setUp(self):
+        self.command = ['cat']
+        sequenceplot.Pic2plot.pic2plotCommand = lambda picFilename, filetype: self.command
+
+    def tearDown(self):
+        sequenceplot.Pic2plot.pic2plotCommand = pic2plotCommand
+
+    def test_bytes(self):
+        # large enough to fill the pipes in both directions
+        stats = RenderStats()
+        diagram = build(5000)
+        diagram.stats = stats
+
+        result = diagram.renderBytes('png')
+
+        self.assertEqual(result, picText(diagram))
+        self.assertEqual(stats.renders, 1)
+        self.assertEqual(stats.outputBytes, len(result))
+
+    def test_native(self):
+        diagram = build(3)
+        outfile = StringIO()
+        diagram.renderTo(outfile, engine='native')
+
+        self.assertTrue(outfile.getvalue().startswith('<?xml'))
+        self.assertRaises(ValueError, diagram.renderBytes, 'png', 'native')
+
+    def test_failure(self):
+        self.command = ['sh', '-c', 'cat > /dev/null; echo bad input >&2; exit 3']
+        try:
+            build(1).renderBytes()
+        except RenderError as e:
+            self.assertTrue('exit status 3' in e.value)
+            self.assertTrue('bad input' in e.value)
+        else:
+            self.fail('no RenderError')
+
+    def test_timeout(self):
+        self.command = ['sleep', '5']
+        start = time.time()
+        self.assertRaises(RenderError, build(1).renderBytes, 'svg', 'pic2plot', 0.2)
+        self.assertTrue(time.time() - start < 4)
@@ -0,0 +1,81 @@
+#
+# This file is a work in progress.
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+from sequenceplot import RenderCache, SequenceDiagram, SequenceObject
+import sequenceplot.Pic2plot
+from sequenceplot.PicParams import PicParams
+
+class TestRenderCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = RenderCache(os.path.join(self.directory, 'cache'))
+        self.picPath = self.write('sequence.pic', 'define step { down; move spacing; }\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, buf):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as outfile:
+            outfile.write(buf)
+        return path
+
+    def key(self, buf, filetype='svg'):
+        picFilename = self.write('d.pic', buf)
+        return self.cache.key(picFilename, PicParams(), self.picPath, filetype)
+
+    def test_key(self):
+        first = self.key('object(O0,"a");\nmessage(O0,O1,"m");\n')
+        second = self.key('object(O0,"a");\nmessage(O0,O1,"m");\n')
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, self.key('object(O0,"a");\nmessage(O0,O0,"m");\n'))
+        self.assertNotEqual(first, self.key('object(O0,"a");\nmessage(O0,O1,"m");\n', 'png'))
+
+    def test_fetch_store(self):
+        outfileName = self.write('d.svg', '<svg/>')
+        key = self.key('step();\n')
+        self.assertFalse(self.cache.fetch(key, os.path.join(self.directory, 'e.svg')))
+
+        self.cache.store(key, outfileName)
+        self.assertTrue(self.cache.fetch(key, os.path.join(self.directory, 'e.svg')))
+        with open(os.path.join(self.directory, 'e.svg')) as infile:
+            self.assertEqual(infile.read(), '<svg/>')
+
+    def test_evict(self):
+        outfileName = self.write('d.svg', 'x' * 100)
+        self.cache.store('old.svg', outfileName)
+        os.utime(self.cache.entryPath('old.svg'), (time.time() - 60, time.time() - 60))
+        self.cache.store('new.svg', outfileName)
+
+        self.cache.evict(150)
+        self.assertFalse(os.path.exists(self.cache.entryPath('old.svg')))
+        self.assertTrue(os.path.exists(self.cache.entryPath('new.svg')))
+
+    def test_hardlink_rewrite(self):
+        pic2plotCommand = sequenceplot.Pic2plot.pic2plotCommand
+        sequenceplot.Pic2plot.pic2plotCommand = lambda picFilename, filetype: ['cat', picFilename]
+        cache = RenderCache(os.path.join(self.directory, 'links'), hardlink=True)
+        prefix = os.path.join(self.directory, 'linked')
+        try:
+            first = SequenceDiagram([SequenceObject('a')])
+            first.render(prefix, 'svg', cache=cache)
+            first.render(prefix, 'svg', cache=cache)
+            with open(prefix + '.svg') as infile:
+                cached = infile.read()
+
+            SequenceDiagram([SequenceObject('b')]).render(prefix, 'svg')
+        finally:
+            sequenceplot.Pic2plot.pic2plotCommand = pic2plotCommand
+
+        entries = os.listdir(os.path.join(self.directory, 'links'))
+        self.assertEqual(len(entries), 1)
+        with open(os.path.join(self.directory, 'links', entries[0])) as infile:
+            self.assertEqual(infile.read(), cached)
+        self.assertFalse(os.path.exists(prefix + '.svg.tmp'))
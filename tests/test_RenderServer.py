@@ -0,0 +1,84 @@
+#
+# This file is a work in progress.
+
+import json
+import threading
+import unittest
+import urllib2
+
+import sequenceplot.Pic2plot
+from sequenceplot import RenderServer, RenderService, SyntaxError
+
+pic2plotCommand = sequenceplot.Pic2plot.pic2plotCommand
+
+class TestRenderServer(unittest.TestCase):
+
+    def setUp(self):
+        sequenceplot.Pic2plot.pic2plotCommand = lambda picFilename, filetype: ['sh', '-c', 'sleep 0.2; cat']
+
+    def tearDown(self):
+        sequenceplot.Pic2plot.pic2plotCommand = pic2plotCommand
+
+    def test_coalesce(self):
+        service = RenderService()
+        outputs = []
+        threads = [threading.Thread(target=lambda: outputs.append(service.render('a -> b: x()')))
+                   for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(outputs), 6)
+        self.assertEqual(len(set(outputs)), 1)
+        self.assertTrue('message(O0,O1,"x()");' in outputs[0])
+        self.assertEqual(service.renders, 1)
+        self.assertEqual(service.hits + service.coalesced, 5)
+
+    def test_lru(self):
+        service = RenderService(cacheSize=2, engine='native')
+        for spec in ('a -> b: 1', 'a -> b: 2', 'a -> b: 1', 'a -> b: 3', 'a -> b: 1', 'a -> b: 2'):
+            service.render(spec)
+
+        self.assertEqual(service.hits, 2)
+        self.assertEqual(service.renders, 4)
+        self.assertEqual(len(service.cache), 2)
+        self.assertRaises(SyntaxError, service.render, 'a ->')
+        self.assertRaises(ValueError, service.render, 'a -> b: 1', 'exe')
+        self.assertRaises(ValueError, service.render, 'a -> b: 1', 'png')
+        self.assertEqual(service.requests, 7)
+
+    def test_http(self):
+        server = RenderServer(('127.0.0.1', 0), RenderService(engine='native'), quiet=True)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        url = 'http://127.0.0.1:{0}'.format(server.server_address[1])
+        try:
+            response = urllib2.urlopen(url + '/render?type=svg', 'a -> b: x()\n')
+            self.assertEqual(response.getcode(), 200)
+            self.assertEqual(response.info().gettype(), 'image/svg+xml')
+            self.assertTrue(response.read().startswith('<?xml'))
+
+            try:
+                urllib2.urlopen(url + '/render', 'frame a: f\n')
+            except urllib2.HTTPError as e:
+                self.assertEqual(e.code, 400)
+                self.assertTrue('line 1' in e.read())
+            else:
+                self.fail('no error for an invalid spec')
+
+            try:
+                urllib2.urlopen(url + '/render?type=png', 'a -> b: x()\n')
+            except urllib2.HTTPError as e:
+                self.assertEqual(e.code, 400)
+                self.assertTrue('native engine' in e.read())
+            else:
+                self.fail('no error for png from the native engine')
+
+            stats = json.loads(urllib2.urlopen(url + '/stats').read())
+            self.assertEqual(stats['requests'], 2)
+            self.assertEqual(stats['failures'], 1)
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
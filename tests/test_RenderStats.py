@@ -0,0 +1,55 @@
+#
+# This file is a work in progress.
+
+import os
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from sequenceplot import SequenceDiagram, SequenceObject, RenderStats, renderMany
+import sequenceplot.Pic2plot
+
+class TestRenderStats(unittest.TestCase):
+
+    def setUp(self):
+        self.events = []
+        self.stats = RenderStats(self.events.append)
+        self.client = SequenceObject('client')
+        self.server = SequenceObject('server')
+        self.diagram = SequenceDiagram([self.client, self.server], stats=self.stats)
+        self.client.callMethod(self.server, 'get()', response='ok')
+
+    def test_run(self):
+        outfile = StringIO()
+        self.diagram.run(outfile)
+
+        summary = self.stats.summary()
+        self.assertEqual(summary['operations']['object'], 2)
+        self.assertEqual(summary['operations']['message'], 1)
+        self.assertEqual(summary['operations']['rmessage'], 1)
+        self.assertEqual(summary['operations']['complete'], 2)
+        self.assertEqual(summary['runs'], 1)
+        self.assertEqual(summary['picBytes'], len(outfile.getvalue()))
+        self.assertEqual(self.events[0]['event'], 'run')
+        self.assertTrue(self.events[0]['diagram'] is self.diagram)
+
+    def test_render(self):
+        directory = tempfile.mkdtemp()
+        pic2plotCommand = sequenceplot.Pic2plot.pic2plotCommand
+        sequenceplot.Pic2plot.pic2plotCommand = lambda picFilename, filetype: ['cat', picFilename]
+        try:
+            prefix = os.path.join(directory, 'single')
+            self.diagram.render(prefix, 'svg')
+            renderMany([(os.path.join(directory, 'batch{0}'.format(i)), self.diagram) for i in range(2)],
+                       'svg', jobs=2)
+
+            renders = [event for event in self.events if event['event'] == 'render']
+            self.assertEqual(len(renders), 3)
+            self.assertEqual(renders[0]['outfileName'], prefix + '.svg')
+            self.assertEqual(renders[0]['outputBytes'], os.path.getsize(prefix + '.svg'))
+            self.assertEqual(self.stats.renders, 3)
+            self.assertEqual(self.stats.outputBytes, sum([event['outputBytes'] for event in renders]))
+        finally:
+            sequenceplot.Pic2plot.pic2plotCommand = pic2plotCommand
+            shutil.rmtree(directory)
@@ -20,3 +20,7 @@ class TestSequenceDiagram(unittest.TestCase):
         print self.diagram.objectList
         self.assertEqual(len(self.diagram.objectList), 2)
 
+
+    def test_names(self):
+        self.assertEqual(self.client.picName(), 'O0')
+        self.assertEqual(self.server.picName(), 'O1')
@@ -0,0 +1,85 @@
+#
+# This file is a work in progress.
+
+import unittest
+
+from sequenceplot import SequenceObject, SequenceDiagram, SyntaxError, parseSpec
+from sequenceplot.Operations import *
+
+class TestSpecParser(unittest.TestCase):
+
+    def test_authentication(self):
+        spec = '''
+        # authentication example
+        participant c: c: client
+        participant s: s: server
+        param objectSpacing 1.75
+
+        frame c: Login
+        c => s: login(username, password)
+        s --> c: sessionID, userInfo
+        end s
+        '''
+
+        client = SequenceObject('c: client')
+        server = SequenceObject('s: server')
+        expected = SequenceDiagram([client, server])
+        expected.setParam('objectSpacing', 1.75)
+        frameName = expected.beginFrame(client, 'Login')
+        client.callMethod(server, 'login(username, password)', response='sessionID, userInfo')
+        expected.endFrame(server, frameName)
+
+        diagram = parseSpec(spec)
+
+        self.assertEqual(diagram.operations.codes, expected.operations.codes)
+        self.assertEqual([obj.label for obj in diagram.objectList], ['c: client', 's: server'])
+        self.assertEqual(diagram.operations.labels, expected.operations.labels)
+        self.assertEqual(diagram.params['objectSpacing'], 1.75)
+
+    def test_statements(self):
+        spec = '\n'.join(['actor u: User',
+                          'placeholder p',
+                          'u -> a: run()',
+                          'a ->> b: notify()',
+                          'create a p: p:Peer',
+                          'note a, b: two\\nlines',
+                          'constraint b: {fast}',
+                          'destroy a p',
+                          'step 3',
+                          'complete b'])
+
+        diagram = parseSpec(spec)
+
+        self.assertEqual([obj.label for obj in diagram.objectList], ['User', 'a', 'b'])
+        self.assertEqual(diagram.operations.codes.count(COMMENT), 1)
+        self.assertEqual(diagram.operations.codes.count(CONNECT_TO_COMMENT), 1)
+        self.assertTrue('two\nlines' in diagram.operations.labels)
+        self.assertTrue('p:Peer' in diagram.operations.labels)
+        self.assertEqual(diagram.operations.codes[-1], COMPLETE)
+
+    def test_underline(self):
+        plain = parseSpec('param underline 0\na -> b: x()').renderBytes(engine='native')
+        underlined = parseSpec('param underline 1\na -> b: x()').renderBytes(engine='native')
+
+        self.assertEqual(parseSpec('param underline 0').params['underline'], 0)
+        self.assertEqual(parseSpec('param boxWidth 1e0').params['boxWidth'], 1.0)
+        self.assertNotEqual(plain, underlined)
+
+    def test_errors(self):
+        cases = [('a -> b: x\nbogus statement', 2),
+                 ('a -> b: x\n\nstep many', 3),
+                 ('participant a\nparticipant a', 2),
+                 ('end a', 1),
+                 ('frame a: f\na -> b: x', 1),
+                 ('param objectSpacing wide', 1),
+                 ('param color 1', 1),
+                 ('destroy a', 1),
+                 ('a -> b: x\ndelete b\ndelete b', 3)]
+
+        for spec, lineNumber in cases:
+            try:
+                parseSpec(spec, filename='test.seq')
+            except SyntaxError as e:
+                self.assertTrue('test.seq, line {0}:'.format(lineNumber) in e.value, e.value)
+            else:
+                self.fail('no error for {0!r}'.format(spec))
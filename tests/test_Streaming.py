@@ -0,0 +1,47 @@
+#
+# This file is a work in progress.
+
+import unittest
+from StringIO import StringIO
+
+from sequenceplot import SequenceDiagram, SequenceObject
+
+class TestStreaming(unittest.TestCase):
+
+    def test_stream(self):
+        sink = StringIO()
+        client = SequenceObject('client')
+        server = SequenceObject('server')
+        diagram = SequenceDiagram([client, server], sink=sink)
+        diagram.setParam('objectSpacing', 1.5)
+        self.assertEqual(sink.getvalue(), '')
+
+        client.callMethod(server, 'login()', response='ok')
+        self.assertEqual(len(diagram.operations), 0)
+        self.assertTrue('message(O0,O1,"login()");' in sink.getvalue())
+
+        diagram.setParam('messageSpacing', 0.5)
+        diagram.run()
+        lines = sink.getvalue().splitlines()
+        self.assertEqual(lines[0], '.PS')
+        self.assertTrue('movewid=1.5;' in lines)
+        self.assertTrue(lines.index('object(O1,"server");') < lines.index('step();'))
+        self.assertTrue(lines.index('spacing=0.5;') > lines.index('step();'))
+        self.assertEqual(lines[-1], '.PE')
+        self.assertRaises(ValueError, client.message, server, 'late()')
+
+    def test_steps(self):
+        sink = StringIO()
+        client = SequenceObject('client')
+        diagram = SequenceDiagram([client], sink=sink)
+        diagram.step(3)
+        diagram.step(2)
+        diagram.setParam('messageSpacing', 0.5)
+        diagram.step()
+        diagram.run()
+        lines = sink.getvalue().splitlines()
+        self.assertEqual(lines[-5:], ['down; move spacing * 5;',
+                                      'spacing=0.5;',
+                                      'step();',
+                                      'complete(O0);',
+                                      '.PE'])
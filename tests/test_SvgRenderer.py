@@ -0,0 +1,37 @@
+#
+# This file is a work in progress.
+
+import unittest
+from StringIO import StringIO
+
+from sequenceplot import SyntaxError
+from sequenceplot.PicParams import PicParams
+from sequenceplot.SvgRenderer import SvgRenderer, splitPicArguments
+
+class TestSvgRenderer(unittest.TestCase):
+
+    def render(self, operations):
+        renderer = SvgRenderer(PicParams())
+        for operation in operations:
+            renderer.feed(operation)
+        outfile = StringIO()
+        renderer.write(outfile)
+        return renderer, outfile.getvalue()
+
+    def test_split(self):
+        args = splitPicArguments('A,B,"f(a, \\"b\\")"')
+        self.assertEqual(args, ['A', 'B', '"f(a, \\"b\\")"'])
+
+    def test_message(self):
+        renderer, buf = self.render(['object(A,"a: client");',
+                                     'object(B,"b: server");',
+                                     'step();',
+                                     'message(A,B,"login(user, \\"pw\\")");',
+                                     'complete(A);',
+                                     'complete(B);'])
+        self.assertTrue(buf.startswith('<?xml'))
+        self.assertTrue('login(user, "pw")' in buf)
+        self.assertEqual(renderer.hereY, -2 * PicParams.messageSpacing)
+
+    def test_unknown(self):
+        self.assertRaises(SyntaxError, self.render, ['box "raw pic";'])
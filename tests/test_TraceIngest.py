@@ -0,0 +1,75 @@
+#
+# This file is a work in progress.
+
+import os
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from sequenceplot import SequenceDiagram, SyntaxError, TraceIngester, ingestFile
+from sequenceplot.TraceIngest import readCsvEvents, readJsonEvents
+
+trace = '''event,span,from,to,label
+start,1,client,server,login()
+start,2,server,db,query()
+end,2,,,rows
+end,1,,,sessionID
+'''
+
+class TestTraceIngest(unittest.TestCase):
+
+    def test_csv(self):
+        diagram = SequenceDiagram()
+        ingester = TraceIngester(diagram, actors=['client'])
+        ingester.feedAll(readCsvEvents(StringIO(trace)))
+        outfile = StringIO()
+        diagram.run(outfile)
+
+        lines = outfile.getvalue().splitlines()
+        self.assertEqual(sorted(ingester.participants), ['client', 'db', 'server'])
+        self.assertEqual(ingester.openSpans, {})
+        self.assertTrue('actor(O0,"client");' in lines)
+        self.assertTrue(lines.index('message(O1,O2,"query()");') < lines.index('rmessage(O2,O1,"rows");'))
+
+    def test_json(self):
+        records = list(readJsonEvents(StringIO('{"event": "message", "from": "a", "to": "b"}\n\n')))
+        self.assertEqual(len(records), 1)
+
+    def test_json_unicode(self):
+        trace = '{"event": "message", "from": "caf\\u00e9", "to": "b", "label": "caf\\u00e9()"}\n'
+        diagram = SequenceDiagram()
+        TraceIngester(diagram).feedAll(readJsonEvents(StringIO(trace)))
+        outfile = StringIO()
+        diagram.run(outfile)
+
+        lines = outfile.getvalue().splitlines()
+        self.assertTrue('object(O0,"caf\xc3\xa9");' in lines)
+        self.assertTrue('message(O0,O1,"caf\xc3\xa9()");' in lines)
+
+    def test_streaming(self):
+        handle, filename = tempfile.mkstemp(suffix='.csv')
+        try:
+            with os.fdopen(handle, 'w') as outfile:
+                outfile.write(trace)
+
+            sink = StringIO()
+            streaming = SequenceDiagram(sink=sink)
+            ingestFile(streaming, filename, actors=['client'])
+            streaming.run()
+
+            buffered = SequenceDiagram()
+            ingestFile(buffered, filename, actors=['client'])
+            outfile = StringIO()
+            buffered.run(outfile)
+        finally:
+            os.remove(filename)
+
+        body = lambda text: text[text.index('actor(O0'):]
+        self.assertEqual(body(sink.getvalue()), body(outfile.getvalue()))
+
+    def test_missing_field(self):
+        records = readCsvEvents(StringIO(trace.replace('server,db', 'server,')))
+        ingester = TraceIngester(SequenceDiagram(), source='trace.csv')
+        with self.assertRaises(SyntaxError) as context:
+            ingester.feedAll(records)
+        self.assertEqual(context.exception.value, "trace.csv, record 2: missing 'to' field")
@@ -0,0 +1,161 @@
+#
+# This file is a work in progress.
+
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from StringIO import StringIO
+
+import sequenceplot.Pic2plot
+from sequenceplot.TraceTail import TraceTail, followFile, listenSocket
+
+def records(count):
+    return [{'event': 'message', 'from': 'client', 'to': 'server{0}'.format(i % 3), 'label': 'm{0}()'.format(i)}
+            for i in range(count)]
+
+class TestTraceTail(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_window(self):
+        built = []
+        prefix = os.path.join(self.directory, 'live')
+        tail = TraceTail(prefix, engine='native', window=4, debounce=0.05,
+                         configure=built.append)
+
+        tail.run(iter(records(50)))
+
+        self.assertTrue(tail.renders >= 1)
+        self.assertTrue(os.path.exists(prefix + '.svg'))
+        self.assertFalse(os.path.exists(prefix + '.next.svg'))
+        self.assertEqual([record['label'] for record in tail.window], ['m46()', 'm47()', 'm48()', 'm49()'])
+        self.assertEqual(len(built[-1].operations.labels), 4)
+
+    def test_orphaned_end(self):
+        built = []
+        prefix = os.path.join(self.directory, 'live')
+        spans = [{'event': 'start', 'span': '1', 'from': 'a', 'to': 'b', 'label': 'login()'},
+                 {'event': 'start', 'span': '2', 'from': 'b', 'to': 'c', 'label': 'query()'},
+                 {'event': 'end', 'span': '2', 'label': 'rows'},
+                 {'event': 'end', 'span': '1', 'from': 'a', 'to': 'b', 'label': 'session'}]
+        pic2plotCommand = sequenceplot.Pic2plot.pic2plotCommand
+        sequenceplot.Pic2plot.pic2plotCommand = lambda picFilename, filetype: ['cat', picFilename]
+        try:
+            tail = TraceTail(prefix, window=3, debounce=0.05, configure=built.append)
+            tail.run(iter(spans))
+        finally:
+            sequenceplot.Pic2plot.pic2plotCommand = pic2plotCommand
+
+        self.assertEqual(built[-1].operations.labels, ['query()', 'rows'])
+        self.assertEqual(built[-1].ignoredInactive, [])
+        self.assertTrue(os.path.exists(prefix + '.svg'))
+        self.assertEqual(sorted(os.listdir(self.directory)), ['live.svg'])
+
+    def test_render_failure(self):
+        calls = []
+        prefix = os.path.join(self.directory, 'live')
+
+        def configure(diagram):
+            calls.append(diagram)
+            if len(calls) == 1:
+                raise ValueError('broken')
+
+        def slow():
+            yield records(1)[0]
+            time.sleep(0.5)
+            for record in records(3):
+                yield record
+
+        tail = TraceTail(prefix, engine='native', debounce=0.05, configure=configure)
+        stderr, sys.stderr = sys.stderr, StringIO()
+        try:
+            tail.run(slow())
+            errors = sys.stderr.getvalue()
+        finally:
+            sys.stderr = stderr
+
+        self.assertEqual(tail.failures, 1)
+        self.assertTrue(tail.renders >= 1)
+        self.assertTrue('render failed: broken' in errors)
+        self.assertTrue(os.path.exists(prefix + '.svg'))
+
+    def test_follow(self):
+        filename = os.path.join(self.directory, 'trace.jsonl')
+        stopEvent = threading.Event()
+        lines = [json.dumps(record) + '\n' for record in records(3)]
+
+        def write():
+            with open(filename, 'wb') as outfile:
+                outfile.write(lines[0])
+                outfile.write(lines[1][:10])
+                outfile.flush()
+                time.sleep(0.1)
+                outfile.write(lines[1][10:])
+                outfile.write(lines[2])
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        result = []
+        for record in followFile(filename, pollInterval=0.01, stopEvent=stopEvent):
+            result.append(record['label'])
+            if len(result) == 3:
+                stopEvent.set()
+        writer.join()
+        self.assertEqual(result, ['m0()', 'm1()', 'm2()'])
+
+    def test_follow_malformed(self):
+        filename = os.path.join(self.directory, 'trace.jsonl')
+        stopEvent = threading.Event()
+        with open(filename, 'wb') as outfile:
+            outfile.write(json.dumps(records(1)[0]) + '\n{"event": \n[1, 2]\n')
+            outfile.write(json.dumps(records(2)[1]) + '\n')
+
+        result = []
+        stderr, sys.stderr = sys.stderr, StringIO()
+        try:
+            for record in followFile(filename, pollInterval=0.01, stopEvent=stopEvent):
+                result.append(record['label'])
+                if len(result) == 2:
+                    stopEvent.set()
+            errors = sys.stderr.getvalue()
+        finally:
+            sys.stderr = stderr
+
+        self.assertEqual(result, ['m0()', 'm1()'])
+        self.assertTrue(filename + ', line 2: skipped malformed record' in errors)
+        self.assertTrue(filename + ', line 3: skipped malformed record' in errors)
+
+    def test_socket(self):
+        address = os.path.join(self.directory, 'trace.sock')
+        stopEvent = threading.Event()
+        source = listenSocket(address, stopEvent)
+
+        def send():
+            while not os.path.exists(address):
+                time.sleep(0.01)
+            client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            client.connect(address)
+            client.sendall('not json\n'.join([json.dumps(record) + '\n' for record in records(2)]))
+            client.close()
+
+        sender = threading.Thread(target=send)
+        stderr, sys.stderr = sys.stderr, StringIO()
+        try:
+            sender.start()
+            self.assertEqual([next(source)['label'], next(source)['label']], ['m0()', 'm1()'])
+            errors = sys.stderr.getvalue()
+        finally:
+            sys.stderr = stderr
+        stopEvent.set()
+        sender.join()
+        self.assertTrue(address + ', line 2: skipped malformed record' in errors)
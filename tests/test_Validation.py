@@ -0,0 +1,86 @@
+#
+# This file is a work in progress.
+
+import os
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+import sequenceplot.Pic2plot
+from sequenceplot import SequenceObject, Placeholder, SequenceDiagram, ValidationError, renderMany
+
+class TestValidation(unittest.TestCase):
+
+    def setUp(self):
+        self.a = SequenceObject('a')
+        self.b = SequenceObject('b')
+        self.p = Placeholder()
+
+    def diagram(self, strict=False):
+        return SequenceDiagram([self.a, self.b, self.p], strict=strict)
+
+    def test_valid(self):
+        diagram = self.diagram()
+        name = diagram.beginFrame(self.a, 'frame')
+        self.a.createInstance(self.p, 'p:Peer')
+        self.a.callMethod(self.p, 'run()', 'done')
+        self.a.destroyInstance(self.p)
+        comment = diagram.comment(self.b, 'note')
+        diagram.connectToComment(self.a, comment)
+        diagram.endFrame(self.b, name)
+
+        self.assertEqual(diagram.problems(), [])
+        diagram.validate()
+
+    def test_removed(self):
+        diagram = self.diagram()
+        self.a.message(self.b, 'first')
+        self.b.delete()
+        self.a.message(self.b, 'second')
+
+        problems = diagram.problems()
+
+        self.assertEqual(len(problems), 1)
+        self.assertTrue(problems[0].startswith('operation 3 [message(O0,O1,"second");]'))
+        self.assertTrue("O1 ('b') was removed by operation 2" in problems[0])
+
+    def test_mistakes(self):
+        diagram = self.diagram()
+        self.a.createInstance(self.b, 'b2')
+        self.a.createInstance(self.p, 'p')
+        self.a.createInstance(self.p, 'p')
+        self.b.inactive()
+        diagram.endFrame(self.b, 'N_5')
+        diagram.connectToComment(self.a, 'N_6')
+        diagram.beginFrame(self.a, 'open')
+
+        problems = diagram.problems()
+
+        self.assertEqual(len(problems), 6)
+        self.assertTrue('is not a placeholder' in problems[0])
+        self.assertTrue('was already created' in problems[1])
+        self.assertTrue(problems[2].startswith('before operation 4: inactive() on'))
+        self.assertTrue('no open frame is named N_5' in problems[3])
+        self.assertTrue('no comment is named N_6' in problems[4])
+        self.assertTrue('is never ended' in problems[5])
+
+    def test_strict(self):
+        diagram = self.diagram(strict=True)
+        self.a.delete()
+        self.a.message(self.b, 'late')
+
+        self.assertRaises(ValidationError, diagram.run, StringIO())
+        self.assertRaises(ValidationError, diagram.renderBytes, 'svg', 'native')
+
+        directory = tempfile.mkdtemp()
+        pic2plotCommand = sequenceplot.Pic2plot.pic2plotCommand
+        sequenceplot.Pic2plot.pic2plotCommand = lambda picFilename, filetype: self.fail('pic2plot was run')
+        try:
+            self.assertRaises(ValidationError, diagram.renderBytes)
+            results = renderMany([(os.path.join(directory, 'strict'), diagram)])
+        finally:
+            sequenceplot.Pic2plot.pic2plotCommand = pic2plotCommand
+            shutil.rmtree(directory)
+        self.assertTrue(isinstance(results[0].error, ValidationError))
+        self.assertEqual(len(results[0].error.problems), 1)